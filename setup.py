@@ -20,7 +20,7 @@ setup(name='units',
                    "Topic :: Scientific/Engineering",
                    "Topic :: Software Development :: Libraries :: Python Modules",
                    "Topic :: Utilities"],
-      packages=['units', 'units.tests'],
+      packages=['units', 'units.benchmarks', 'units.contrib', 'units.contrib.django', 'units.tests'],
       platforms=["all"],
       provides=['units'],
       )
\ No newline at end of file
@@ -172,22 +172,42 @@ __copyright__ = '2009'
 __license__   = 'Python Software Foundation License'
 __contact__   = 'aran@arandonohue.com'
 
+import units.conversion
+import units.expression
 import units.si
-from units.composed_unit import ComposedUnit
+from units.composed_unit import ComposedUnit, define
 from units.leaf_unit import LeafUnit
 from units.named_composed_unit import NamedComposedUnit
-from units.registry import REGISTRY
-
-def unit(specifier, symbal=u'', name=u'', is_si=False):
-    """Main factory for units.
+from units.registry import REGISTRY, active, using
+from units.instrument import instrumented, stats
+
+def unit(specifier, symbal=u'', name=u'', is_si=False, registry=None):
+    """Main factory for units. Besides single specifiers, it understands
+    unit expressions; see units.expression. Units are looked up in and
+    defined in the given registry, by default the active one; see
+    units.registry.
     
     >>> unit('m') == unit('m')
     True
     >>> unit('m') != unit('s')
     True
+    >>> unit('m / s^2') is unit('m') / unit('s') ** 2
+    True
     """
-    if specifier in REGISTRY:
-        return REGISTRY[specifier]
+    if registry is not None:
+        with using(registry):
+            return unit(specifier, symbal, name, is_si)
+    
+    registry = active()
+    found = registry.get(specifier)
+    if found is None and registry.parent is not None:
+        found = registry.parent.find(specifier)
+    if found is not None:
+        return found
+    elif _load(registry, specifier):
+        return unit(specifier, symbal, name, is_si)
+    elif units.expression.is_expression(specifier):
+        return units.expression.parse(specifier, unit)
     elif units.si.can_make(specifier):
         return units.si.prefixed_unit(specifier)
     else:
@@ -199,9 +219,55 @@ def named_unit(specifier, numer, denom, multiplier=1, symbal=u'', name=u'', is_s
     numer_units = [unit(x) for x in numer]
     denom_units = [unit(x) for x in denom]
     
-    return NamedComposedUnit(specifier, ComposedUnit(numer_units, denom_units, multiplier), symbal, name, is_si)
+    (composed, factor) = define(numer_units, denom_units, multiplier)
+    return NamedComposedUnit(specifier, composed, symbal, name, is_si, factor)
 
 def scaled_unit(specifier, base_specifier, multiplier, symbal=u'', name=u'', is_si=False):
     """Shortcut to create and return a new unit that is
     a scaled_unit multiplication of another."""
-    return NamedComposedUnit(specifier, ComposedUnit([unit(base_specifier)], [], multiplier), symbal, name, is_si)
\ No newline at end of file
+    (composed, factor) = define([unit(base_specifier)], [], multiplier)
+    return NamedComposedUnit(specifier, composed, symbal, name, is_si, factor)
+
+def warmup(pairs):
+    """Pre-populate the conversion cache before serving traffic.
+    Takes (source, target) pairs of units or unit specifiers.
+    
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> warmup([('mi', 'km'), (unit('ft'), unit('m'))])
+    >>> (unit('mi'), unit('km')) in units.conversion.FACTORS
+    True
+    """
+    units.conversion.warmup([(_as_unit(source), _as_unit(target)) for (source, target) in pairs])
+
+def converter(source, target):
+    """Return a callable converting plain numbers from the source unit
+    to the target unit, given as units or unit specifiers. See
+    units.conversion.Converter.
+    
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> inches_to_cm = converter('inch', 'cm')
+    >>> inches_to_cm.factor
+    2.54
+    """
+    return units.conversion.Converter(_as_unit(source), _as_unit(target))
+
+def _load(registry, specifier):
+    """Run the lazy loader for specifier, or for the unit it is an SI
+    prefix of, of the registry or the nearest parent that has one.
+    Return whether one ran."""
+    while registry is not None:
+        if registry.providers:
+            if registry.load(specifier):
+                return True
+            if units.si.prefixed(specifier) and registry.load(units.si.without_prefix(specifier)):
+                return True
+        registry = registry.parent
+    return False
+
+def _as_unit(unit_or_specifier):
+    """Look up unit specifiers, passing units through unchanged."""
+    if hasattr(unit_or_specifier, 'squeeze'):
+        return unit_or_specifier
+    return unit(unit_or_specifier)
@@ -0,0 +1,24 @@
+"""Command-line tools for the 'units' module.
+
+    python -m units normalize --help
+"""
+
+import argparse
+import sys
+
+import units.normalize
+
+def main(argv=None):
+    """Parse the command line and run the chosen command."""
+    parser = argparse.ArgumentParser(prog='python -m units')
+    commands = parser.add_subparsers(dest='command')
+    
+    normalize = commands.add_parser('normalize', help='convert "<qty> <unit>" columns of CSV or JSON-lines files')
+    units.normalize.add_arguments(normalize)
+    normalize.set_defaults(run=units.normalize.main)
+    
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
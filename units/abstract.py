@@ -1,11 +1,19 @@
 """An abstract base class to define the interface for all units."""
 
-from units.compatibility import compatible
-from units.exception import IncompatibleUnitsError
+from units.conversion import multipliers
 from units.quantity import Quantity
 
 class AbstractUnit(object):
-    """Parent class/interface for units."""
+    """Parent class/interface for units.
+    
+    Every unit has a dimension attribute: a hashable signature of the leaf
+    units it is built from and their exponents, computed once when the
+    unit is made. Units are compatible iff their dimensions are equal.
+    
+    Units use __slots__ rather than a per-instance __dict__ to stay small.
+    """
+    
+    __slots__ = ('_si', 'dimension')
     
     def __init__(self, is_si=False):
         self._si = is_si
@@ -14,10 +22,9 @@ class AbstractUnit(object):
         """Overload the function call operator to convert units."""
         if not hasattr(quantity, 'unit'):
             return Quantity(quantity, self)
-        elif compatible(self, quantity.unit):
-            return Quantity(quantity.num * quantity.unit.squeeze() / self.squeeze(), self)
         else:
-            raise IncompatibleUnitsError()
+            (from_mult, to_mult) = multipliers(quantity.unit, self)
+            return quantity.__class__(quantity.num * from_mult / to_mult, self)
     
     def canonical(self):
         """Return an immutable, comparable derivative of this unit"""
@@ -0,0 +1,81 @@
+"""Measure the memory cost of each Quantity.
+
+Run with::
+
+    python -m units.benchmarks.memory
+
+It reports bytes per object for plain floats, for quantities laid out
+with a per-instance __dict__ (as they were before __slots__), and for
+quantities as they are now. tracemalloc is used where available
+(Python 3.4+); elsewhere the sizes come from sys.getsizeof.
+"""
+
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from units import unit
+from units.quantity import Quantity
+
+class DictQuantity(Quantity):
+    """A Quantity with a per-instance __dict__, laid out like a Quantity
+    before __slots__."""
+    pass
+
+def traced_size(factory, count):
+    """Average bytes allocated per object made by factory."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        objects = [factory(i) for i in range(count)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum([stat.size_diff for stat in after.compare_to(before, 'filename')])
+    # Don't count the list holding the objects.
+    allocated -= sys.getsizeof(objects)
+    return float(allocated) / count
+
+def shallow_size(factory, count):
+    """Average bytes per object made by factory, summing sys.getsizeof
+    over the object, its __dict__ and its number."""
+    total = 0
+    for i in range(count):
+        obj = factory(i)
+        total += sys.getsizeof(obj)
+        if hasattr(obj, '__dict__'):
+            total += sys.getsizeof(obj.__dict__)
+        if hasattr(obj, 'num'):
+            total += sys.getsizeof(obj.num)
+    return float(total) / count
+
+def measure(count=100000):
+    """Return a list of (label, bytes per object) pairs."""
+    if tracemalloc:
+        size = traced_size
+    else:
+        size = shallow_size
+    metre = unit('m')
+    return [
+        ('float', size(float, count)),
+        ('Quantity with __dict__', size(lambda i: DictQuantity(float(i), metre), count)),
+        ('Quantity', size(lambda i: Quantity(float(i), metre), count)),
+    ]
+
+def main():
+    """Print the measurements."""
+    if tracemalloc:
+        method = 'tracemalloc'
+    else:
+        method = 'sys.getsizeof'
+    print('Bytes per object (%s):' % method)
+    for (label, size) in measure():
+        print('  %-24s %6.1f' % (label, size))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Measure the overhead of Quantity operators relative to plain floats.
+
+Run with::
+
+    python -m units.benchmarks.operators
+
+Each operator is timed on two quantities in the same unit, on two
+quantities in different but compatible units, and on two bare floats.
+"""
+
+import timeit
+
+SETUP = '''
+from units import unit
+from units.predefined import define_units
+from units.quantity import Quantity
+define_units()
+x, y = 3.0, 4.0
+same_x, same_y = Quantity(3.0, unit('m')), Quantity(4.0, unit('m'))
+mixed_x, mixed_y = Quantity(3.0, unit('m')), Quantity(4.0, unit('ft'))
+'''
+
+OPERATORS = [('add', '%s_x + %s_y'),
+             ('sub', '%s_x - %s_y'),
+             ('eq', '%s_x == %s_y'),
+             ('lt', '%s_x < %s_y')]
+
+def best_time(statement, number):
+    """The best of three timings, in seconds per run of statement."""
+    return min(timeit.repeat(statement, SETUP, repeat=3, number=number)) / number
+
+def measure(number=100000):
+    """Return a list of (operator, float seconds, same-unit seconds,
+    mixed-unit seconds) tuples."""
+    results = []
+    for (name, template) in OPERATORS:
+        bare = best_time(template.replace('%s_', ''), number)
+        same = best_time(template % ('same', 'same'), number)
+        mixed = best_time(template % ('mixed', 'mixed'), number)
+        results.append((name, bare, same, mixed))
+    return results
+
+def main():
+    """Print the measurements."""
+    print('%-4s %10s %18s %18s' % ('op', 'float', 'same unit', 'mixed units'))
+    for (name, bare, same, mixed) in measure():
+        print('%-4s %8.3fus %8.3fus %5.1fx %8.3fus %5.1fx' % (
+            name, bare * 1e6, same * 1e6, same / bare, mixed * 1e6, mixed / bare))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measure the size and speed of pickled quantities.
+
+Run with::
+
+    python -m units.benchmarks.pickling
+
+Each payload is pickled with the highest protocol and loaded again. It
+reports bytes per element and round-trip microseconds per element for
+plain floats, for (number, specifier) pairs, for lists of quantities
+in one unit and in several units, and for a quantity array when NumPy
+is available.
+"""
+
+import time
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from units import unit
+from units.predefined import define_units
+from units.quantity import Quantity
+
+try:
+    from units.quantity_array import QuantityArray
+except ImportError:
+    QuantityArray = None
+
+def payloads(count):
+    """Return a list of (label, payload) pairs of count elements each."""
+    speed = unit('km') / unit('h')
+    mixed = [unit('m'), unit('ft'), unit('mi'), speed]
+    result = [('float', [float(i) for i in range(count)]),
+              ('(float, specifier)', [(float(i), 'km') for i in range(count)]),
+              ('Quantity, one unit', [Quantity(float(i), speed) for i in range(count)]),
+              ('Quantity, 4 units', [Quantity(float(i), mixed[i % 4]) for i in range(count)])]
+    if QuantityArray is not None:
+        result.append(('QuantityArray', QuantityArray(range(count), speed)))
+    return result
+
+def round_trip(payload, repeat=3):
+    """Return the pickled size of payload and the best time, in seconds,
+    to pickle and unpickle it."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        data = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        pickle.loads(data)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return (len(data), best)
+
+def measure(count=100000):
+    """Return a list of (label, bytes per element, seconds per element)
+    tuples."""
+    define_units()
+    results = []
+    for (label, payload) in payloads(count):
+        (size, seconds) = round_trip(payload)
+        results.append((label, float(size) / count, seconds / count))
+    return results
+
+def main():
+    """Print the measurements."""
+    print('%-20s %10s %12s' % ('payload', 'bytes/elt', 'us/elt'))
+    for (label, size, seconds) in measure():
+        print('%-20s %10.1f %12.3f' % (label, size, seconds * 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Microbenchmarks for the hot paths of the 'units' module, with JSON
+output and comparison against a saved baseline.
+
+Run with::
+
+    python -m units.benchmarks.suite --output results.json
+    python -m units.benchmarks.suite --baseline results.json
+
+Each benchmark is a statement timed with timeit. Where there is a
+natural plain-float equivalent, it is timed too and the overhead
+reported as a ratio. Memory per object comes from units.benchmarks.memory.
+Comparing against a baseline prints the benchmarks that slowed down by
+more than the threshold and exits with status 1 if there are any.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import units.benchmarks.memory
+
+SETUP = '''
+from units import unit
+from units.composed_unit import ComposedUnit, cancel
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.registry import REGISTRY, Registry
+define_units()
+scratch = Registry(parent=REGISTRY)
+metre, foot, second = unit('m'), unit('ft'), unit('s')
+x, y, factor = 3.0, 4.0, 0.3048
+same_x, same_y = Quantity(3.0, metre), Quantity(4.0, metre)
+mixed_x, mixed_y = Quantity(3.0, metre), Quantity(4.0, foot)
+leaves = [unit('leaf%d' % i) for i in range(64)]
+'''
+
+def operand_setup(count):
+    """Setup adding operand lists of count units for composed unit
+    benchmarks, alternating leaf and named units."""
+    return SETUP + '''
+numer = [leaves[i] for i in range(%(count)d)]
+denom = [[metre, unit('km'), unit('ft')][i %% 3] for i in range(%(count)d)]
+composed = ComposedUnit(numer, denom)
+''' % {'count': count}
+
+REDUCE_SETUP = SETUP + '''
+from units.reduce import total
+lengths = [Quantity(float(i), [metre, foot][i % 2]) for i in range(1000)]
+floats = [float(i) for i in range(1000)]
+'''
+
+BENCHMARKS = [
+    # (name, statement, plain float statement or None, setup)
+    ('lookup.hit', "unit('m')", None, SETUP),
+    ('lookup.prefixed', "scratch.clear(); unit('km', registry=scratch)", None, SETUP),
+    ('lookup.miss', "scratch.clear(); unit('blog', registry=scratch)", None, SETUP),
+    ('lookup.expression', "unit('kg * m / s^2')", None, SETUP),
+    ('quantity.add.same', 'same_x + same_y', 'x + y', SETUP),
+    ('quantity.add.mixed', 'mixed_x + mixed_y', 'x + y * factor', SETUP),
+    ('quantity.mul.same', 'same_x * same_y', 'x * y', SETUP),
+    ('quantity.mul.mixed', 'mixed_x * mixed_y', 'x * y', SETUP),
+    ('quantity.div.same', 'same_x / same_y', 'x / y', SETUP),
+    ('quantity.div.mixed', 'mixed_x / mixed_y', 'x / y', SETUP),
+    ('quantity.lt.same', 'same_x < same_y', 'x < y', SETUP),
+    ('quantity.lt.mixed', 'mixed_x < mixed_y', 'x < y * factor', SETUP),
+    ('quantity.eq.mixed', 'mixed_x == mixed_y', 'x == y * factor', SETUP),
+    ('convert.call', 'metre(mixed_y)', 'y * factor', SETUP),
+    ('startup.define_units', 'REGISTRY.clear(); define_units()', None, SETUP),
+    ('reduce.sum.1000', 'sum(lengths[1:], lengths[0])', 'sum(floats)', REDUCE_SETUP),
+    ('reduce.total.1000', 'total(lengths)', 'sum(floats)', REDUCE_SETUP),
+]
+
+LIMITS = {'lookup.miss': 20000}
+"""Caps on runs per timing for benchmarks that leave garbage behind.
+A leaf unit refers to itself through its dimension, so only the cycle
+collector frees it, and timeit turns that off while timing."""
+
+for operands in [1, 4, 16, 64]:
+    BENCHMARKS.extend([
+        ('composed.new.%d' % operands, 'ComposedUnit(numer, denom)', None, operand_setup(operands)),
+        ('composed.squeeze.%d' % operands, 'composed.squeeze()', None, operand_setup(operands)),
+        ('composed.cancel.%d' % operands, 'cancel(numer, denom)', None, operand_setup(operands)),
+    ])
+
+def best_time(statement, setup, budget=0.2, limit=10 ** 7):
+    """The best of three timings of statement, in seconds per run,
+    running it enough times to take about budget seconds per timing,
+    but at most limit times."""
+    timer = timeit.Timer(statement, setup)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= budget / 10 or number >= limit:
+            break
+        number *= 10
+    number = max(1, min(limit, int(number * budget / max(elapsed, 1e-9))))
+    return min(timer.repeat(3, number)) / number
+
+def run(pattern='', budget=0.2):
+    """Run the benchmarks whose names contain pattern. Return a dict
+    mapping names to dicts of results."""
+    results = {}
+    for (name, statement, float_statement, setup) in BENCHMARKS:
+        if pattern not in name:
+            continue
+        seconds = best_time(statement, setup, budget, LIMITS.get(name, 10 ** 7))
+        result = {'seconds': seconds}
+        if float_statement is not None:
+            result['float_seconds'] = best_time(float_statement, setup, budget)
+            result['overhead'] = seconds / result['float_seconds']
+        results[name] = result
+    
+    # Measuring memory takes milliseconds, so measure everything and
+    # keep what matches.
+    sizes = dict(units.benchmarks.memory.measure(10000))
+    for (label, size) in sizes.items():
+        if pattern in 'memory.' + label:
+            results['memory.' + label] = {'bytes': size, 'overhead': size / sizes['float']}
+    return results
+
+def report(results):
+    """Return a JSON-serializable report of results and where they were
+    measured."""
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'results': results}
+
+def compare(results, baseline, threshold=1.25):
+    """Return a sorted list of (name, baseline value, new value, ratio)
+    for the benchmarks in both results and baseline that got slower or
+    bigger by more than threshold times."""
+    regressions = []
+    for (name, result) in results.items():
+        if name not in baseline:
+            continue
+        key = 'seconds' in result and 'seconds' or 'bytes'
+        (old, new) = (baseline[name][key], result[key])
+        if old and new / old > threshold:
+            regressions.append((name, old, new, new / old))
+    return sorted(regressions)
+
+def format_result(name, result):
+    """One line describing a benchmark result."""
+    if 'bytes' in result:
+        line = '%-28s %10.1f B  ' % (name, result['bytes'])
+    else:
+        line = '%-28s %10.3f us ' % (name, result['seconds'] * 1e6)
+    if 'overhead' in result:
+        line += ' %6.1fx float' % result['overhead']
+    return line
+
+def main(argv=None):
+    """Run the suite from the command line."""
+    parser = argparse.ArgumentParser(prog='python -m units.benchmarks.suite')
+    parser.add_argument('-k', '--filter', default='', help='only run benchmarks whose names contain this')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('-b', '--baseline', help='compare against results in this JSON file')
+    parser.add_argument('-t', '--threshold', type=float, default=1.25,
+                        help='ratio to the baseline that counts as a regression')
+    parser.add_argument('--budget', type=float, default=0.2, help='seconds per timing')
+    args = parser.parse_args(argv)
+    
+    results = run(args.filter, args.budget)
+    for name in sorted(results):
+        print(format_result(name, results[name]))
+    
+    if args.output:
+        output = open(args.output, 'w')
+        try:
+            json.dump(report(results), output, indent=2, sort_keys=True)
+        finally:
+            output.close()
+    
+    if args.baseline:
+        baseline = open(args.baseline)
+        try:
+            previous = json.load(baseline)['results']
+        finally:
+            baseline.close()
+        regressions = compare(results, previous, args.threshold)
+        for (name, old, new, ratio) in regressions:
+            print('REGRESSION %-28s %.4g -> %.4g (%.2fx)' % (name, old, new, ratio))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""A small, thread-safe, bounded cache shared by the unit machinery."""
+
+import threading
+from collections import OrderedDict
+
+class LRUCache(object):
+    """Map keys to values, evicting the least recently used entry once
+    more than maxsize entries are held. A maxsize of None never evicts.
+
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.put('a', 1)
+    1
+    >>> cache.put('b', 2)
+    2
+    >>> cache.get('a')
+    1
+    >>> cache.put('c', 3)
+    3
+    >>> 'b' in cache
+    False
+    >>> (cache.hits, cache.misses)
+    (1, 0)
+    """
+
+    def __init__(self, maxsize=1024):
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_maxsize(self):
+        """The most entries this cache will hold, or None if unbounded."""
+        return self._maxsize
+
+    def set_maxsize(self, maxsize):
+        """Change the bound, evicting entries if the cache is now too big."""
+        self._lock.acquire()
+        try:
+            self._maxsize = maxsize
+            self._evict()
+        finally:
+            self._lock.release()
+    maxsize = property(get_maxsize, set_maxsize)
+
+    def _evict(self):
+        """Drop least recently used entries until within bounds.
+        Callers must hold the lock."""
+        if self._maxsize is not None:
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Return the value cached for key, or default on a miss."""
+        self._lock.acquire()
+        try:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+        finally:
+            self._lock.release()
+
+    def put(self, key, value):
+        """Cache value under key and return the cached value. If another
+        thread cached the key first, its value wins and is returned."""
+        self._lock.acquire()
+        try:
+            if key in self._data:
+                return self._data[key]
+            self._data[key] = value
+            self._evict()
+            return value
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        """Forget all entries and reset the hit/miss counters."""
+        self._lock.acquire()
+        try:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self._lock.release()
+
+    def info(self):
+        """Return a dict of hits, misses, current size and maxsize."""
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self._maxsize}
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
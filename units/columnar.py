@@ -0,0 +1,231 @@
+"""Columnar files of quantities, read through memory maps. Requires
+NumPy.
+
+A file holds any number of named columns with the same number of rows.
+Each column has its own unit and is stored either as raw float64
+values or as int64 fixed-point values, which are multiples of a scale
+in the column's unit. Fixed-point columns can also be delta encoded,
+which suits time series: each block of rows stores its first value and
+then the differences between successive values.
+
+Opening a file maps it into memory without reading it. Columns hand
+out QuantityArray slices, so reading part of a column only touches the
+pages holding that part, and converting a column into another unit is
+one vectorized multiplication.
+
+>>> import os, tempfile
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> from units.quantity_array import QuantityArray
+>>> define_units()
+>>> path = os.path.join(tempfile.mkdtemp(), 'trip.ucol')
+>>> write(path, [('time', QuantityArray([0.0, 0.5, 1.0], unit('s'))),
+...              ('distance', QuantityArray([0.0, 12.5, 25.0], unit('m')))],
+...       scales={'time': 0.001}, delta=['time'])
+>>> trip = ColumnFile(path)
+>>> print(trip['distance'][1:])
+[12.5 25. ] m
+>>> print(trip['time'].to(unit('ms')).num)
+[   0.  500. 1000.]
+>>> trip.close()
+
+The file starts with a 16-byte header: the magic bytes 'UCOL', a format
+version byte, a padding byte, the number of columns (uint16) and the
+number of rows (uint64). A directory follows, with for each column its
+name and unit, encoded as in units.wire, and then an encoding byte (0
+for float64, 1 for fixed point), a delta flag byte, the scale (float64),
+the rows per delta block (uint64) and the offset of its data (uint64).
+Each column's data starts at a multiple of 8 bytes. Everything is
+little-endian.
+"""
+
+import struct
+
+import numpy
+
+from units.conversion import multipliers
+from units.quantity_array import QuantityArray
+from units.wire import decode_string, decode_unit, encode_string, encode_unit, padding
+
+MAGIC = 'UCOL'
+VERSION = 1
+HEADER = struct.Struct('<4sBxHQ')
+ENTRY = struct.Struct('<BBdQQ')
+
+FLOAT64 = 0
+FIXED = 1
+
+BLOCK_ROWS = 4096
+"""Rows per delta-encoded block. Reading a slice of a delta-encoded
+column decodes from the start of the block it begins in."""
+
+def encode_column(array, scale=None, delta=False, block_rows=BLOCK_ROWS):
+    """Return the stored form of a column's numbers as a NumPy array."""
+    numbers = numpy.asarray(array.num, dtype=numpy.float64).ravel()
+    if scale is None:
+        if delta:
+            raise ValueError('Only fixed-point columns can be delta encoded')
+        return numbers.astype('<f8')
+    
+    stored = numpy.rint(numbers / scale).astype('<i8')
+    if delta and len(stored):
+        absolute = stored
+        stored = absolute.copy()
+        stored[1:] -= absolute[:-1]
+        stored[::block_rows] = absolute[::block_rows]
+    return stored
+
+def write(path, columns, scales=None, delta=()):
+    """Write a columnar file. columns is a sequence of (name,
+    QuantityArray) pairs, all of the same length. scales maps the names
+    of columns to store as fixed point to their scale, in the column's
+    unit; delta lists the fixed-point columns to delta encode.
+    """
+    scales = scales or {}
+    lengths = set([len(array) for (_, array) in columns])
+    if len(lengths) > 1:
+        raise ValueError('Columns have different lengths')
+    rows = lengths and lengths.pop() or 0
+    
+    blocks = []
+    entries = []
+    for (name, array) in columns:
+        scale = scales.get(name)
+        blocks.append(encode_column(array, scale, name in delta))
+        if scale is None:
+            entries.append((encode_string(name) + encode_unit(array.unit), FLOAT64, False, 1.0))
+        else:
+            entries.append((encode_string(name) + encode_unit(array.unit), FIXED, name in delta, scale))
+    
+    offset = HEADER.size + sum([len(prefix) + ENTRY.size for (prefix, _, _, _) in entries])
+    directory = []
+    for ((prefix, encoding, is_delta, scale), block) in zip(entries, blocks):
+        offset += padding(offset)
+        directory.append(prefix + ENTRY.pack(encoding, is_delta, scale, BLOCK_ROWS, offset))
+        offset += block.nbytes
+    
+    output = open(path, 'wb')
+    try:
+        output.write(HEADER.pack(MAGIC, VERSION, len(columns), rows))
+        written = HEADER.size
+        for entry in directory:
+            output.write(entry)
+            written += len(entry)
+        for block in blocks:
+            output.write('\0' * padding(written))
+            written += padding(written)
+            output.write(block.tostring())
+            written += block.nbytes
+    finally:
+        output.close()
+
+class Column(object):
+    """One column of a ColumnFile. Indexing or slicing it returns
+    quantities in the column's unit."""
+    
+    def __init__(self, name, unit, data, encoding, delta, scale, block_rows):
+        self.name = name
+        self.unit = unit
+        self.encoding = encoding
+        self.delta = delta
+        self.scale = scale
+        self.block_rows = block_rows
+        self._data = data
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def numbers(self, start=0, stop=None):
+        """The column's numbers from start to stop, in its unit. Float64
+        columns return a read-only view of the file."""
+        (start, stop, _) = slice(start, stop).indices(len(self))
+        if self.encoding == FLOAT64:
+            return self._data[start:stop]
+        if not self.delta:
+            return self._data[start:stop] * self.scale
+        
+        # Decode whole blocks from the one holding start.
+        first = start - start % self.block_rows
+        stored = self._data[first:stop]
+        padded = numpy.zeros(-(-len(stored) // self.block_rows) * self.block_rows, dtype=numpy.int64)
+        padded[:len(stored)] = stored
+        decoded = padded.reshape(-1, self.block_rows).cumsum(axis=1).ravel()
+        return decoded[start - first:stop - first] * self.scale
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            (start, stop, step) = index.indices(len(self))
+            rows = xrange(start, stop, step)
+            if not rows:
+                return QuantityArray(self.numbers(0, 0), self.unit)
+            if step == 1:
+                return QuantityArray(self.numbers(start, stop), self.unit)
+            # Read the rows spanned, then step through them.
+            (low, high) = (min(rows[0], rows[-1]), max(rows[0], rows[-1]) + 1)
+            return QuantityArray(self.numbers(low, high)[start - low::step], self.unit)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Row index out of range')
+        return QuantityArray(self.numbers(index, index + 1), self.unit)[0]
+    
+    def array(self):
+        """The whole column as a QuantityArray."""
+        return self[:]
+    
+    def to(self, unit, start=0, stop=None):
+        """The column, or rows start to stop of it, converted into unit
+        with a single multiplication."""
+        (from_mult, to_mult) = multipliers(self.unit, unit)
+        factor = float(from_mult) / to_mult
+        if self.encoding == FIXED and not self.delta:
+            (start, stop, _) = slice(start, stop).indices(len(self))
+            return QuantityArray(self._data[start:stop] * (self.scale * factor), unit)
+        return QuantityArray(self.numbers(start, stop) * factor, unit)
+
+class ColumnFile(object):
+    """A columnar file of quantities, mapped into memory. Look columns
+    up by name."""
+    
+    def __init__(self, path):
+        self.path = path
+        raw = numpy.memmap(path, dtype=numpy.uint8, mode='r')
+        header = buffer(raw)
+        if len(raw) < HEADER.size:
+            raise ValueError('Truncated column file')
+        (magic, version, count, rows) = HEADER.unpack_from(header, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a version %d column file' % VERSION)
+        
+        self.rows = rows
+        self.columns = {}
+        self.names = []
+        position = HEADER.size
+        for _ in range(count):
+            (name, position) = decode_string(header, position)
+            (unit, position) = decode_unit(header, position)
+            (encoding, delta, scale, block_rows, offset) = ENTRY.unpack_from(header, position)
+            position += ENTRY.size
+            if offset + 8 * rows > len(raw):
+                raise ValueError('Truncated column file')
+            dtype = encoding == FLOAT64 and '<f8' or '<i8'
+            data = raw[offset:offset + 8 * rows].view(dtype)
+            self.columns[name] = Column(name, unit, data, encoding, bool(delta), scale, block_rows)
+            self.names.append(name)
+    
+    def __getitem__(self, name):
+        return self.columns[name]
+    
+    def __len__(self):
+        return self.rows
+    
+    def close(self):
+        """Drop this file's columns. The mapping is released once no
+        arrays viewing it remain."""
+        self.columns = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
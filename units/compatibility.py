@@ -1,12 +1,28 @@
 """Check the compatibility of units."""
 
+def dimension(exponents):
+    """Return the dimension signature for a dict mapping leaf units to
+    their integer or Fraction exponents. Signatures are hashable and are
+    equal iff the exponents are. They are not interned, so that nothing
+    keeps leaf units alive once their registries are gone.
+    """
+    signature = []
+    for (leaf, exponent) in exponents.items():
+        if exponent:
+            if exponent.denominator == 1:
+                exponent = int(exponent)
+            signature.append((leaf, exponent))
+    return tuple(sorted(signature))
+
 def compatible(unit1, unit2):
     """True iff quantities in the given units can be interchanged
     for some multiplier.
     """
-    return unit1.canonical() == unit2.canonical()
+    dimension1 = unit1.dimension
+    dimension2 = unit2.dimension
+    return dimension1 is dimension2 or dimension1 == dimension2
 
 def within_epsilon(quantity1, quantity2):
     """True iff the given quantities are close to each other within reason."""
     epsilon = 10 ** -9
-    return abs(quantity1 - quantity2).num < epsilon
\ No newline at end of file
+    return abs(quantity1 - quantity2).num < epsilon
@@ -1,9 +1,37 @@
 """Composed units are quotients of products of other units
 (but not other composed units.)
-Utility methods here for working with abstract fractions."""
+Utility methods here for working with abstract fractions.
+
+Internally a composed unit is a map from leaf units to their exponents,
+which may be integers or Fractions, plus a multiplier. Multiplying,
+dividing, raising to powers and cancelling all merge these maps, so
+their cost depends on the number of distinct leaf units rather than on
+the size of the exponents.
+
+>>> from fractions import Fraction
+>>> from units import unit
+>>> area = unit('m') ** 2
+>>> area ** Fraction(1, 2) is unit('m')
+True
+"""
+
+from fractions import Fraction
 
 from units.abstract import AbstractUnit
-from units.compatibility import compatible
+from units.cache import LRUCache
+from units.compatibility import dimension
+
+INTERNED = LRUCache(maxsize=1024)
+"""Composed units keyed on their squeezed form, so that structurally
+identical composed units are one shared object. Inspect INTERNED.info()
+for hit and miss counts."""
+
+TOLERANCE = Fraction(1, 2 ** 50)
+"""How far, relative to its value, a float multiplier may be from the
+exact value it is taken to stand for. See exact()."""
+
+EXACT = LRUCache(maxsize=1024)
+"""Map float multipliers to the exact values they stand for."""
 
 def unbox(numer, denom, multiplier):
     """Attempts to convert the fractional unit represented by the parameters
@@ -19,25 +47,110 @@ def unbox(numer, denom, multiplier):
     
     return None
 
-def cancel(numer, denom):
-    """Cancel out compatible units in the given numerator and denominator.
-    Return a triple of the implied quantity multiplier that has been
-    squeezed out, the new numerator and the new denominator."""
+def merge(exponents, signature, power=1):
+    """Add the exponents of a dimension signature, scaled by power,
+    into the exponents dict. Return the dict."""
+    for (leaf, exponent) in signature:
+        exponents[leaf] = exponents.get(leaf, 0) + exponent * power
+    return exponents
+
+def expand(signature, sign):
+    """List the leaf units in signature whose exponents have the given
+    sign, each repeated as many times as its exponent."""
+    result = []
+    for (leaf, exponent) in signature:
+        exponent *= sign
+        if exponent > 0:
+            if exponent != int(exponent):
+                raise ValueError('%s has a fractional exponent' % leaf)
+            result += [leaf] * int(exponent)
+    return result
+
+def product_factor(numer, denom):
+    """The exact factor of the quotient of the products of the given
+    units."""
+    factor = 1
+    for unit in numer:
+        factor *= unit.factor
+    for unit in denom:
+        factor = Fraction(factor) / unit.factor
+    return factor
+
+def collect(numer, denom):
+    """Return the exponent map and the implied multiplier of the quotient
+    of the products of the given units."""
+    exponents = {}
     multiplier = 1
     
-    simple_numer = numer[:]
-    simple_denom = denom[:]
+    for unit in numer:
+        merge(exponents, unit.dimension)
+        multiplier *= unit.squeeze()
+    
+    for unit in denom:
+        merge(exponents, unit.dimension, -1)
+        multiplier /= unit.squeeze()
+    
+    return (exponents, multiplier)
+
+def exact(number):
+    """The exact value a multiplier stands for. A float is taken to
+    stand for a nearby fraction with a small denominator or a short
+    decimal if there is one within a few units in the last place, so
+    2.54 stands for 127/50, 1000 / 3600.0 for 5/18 and 0.01 ** 3 for
+    1e-6. This is only a guess, used where a multiplier's exact value
+    was not worked out from the units it was made from.
     
-    for nleaf in numer:
-        remaining_denom = simple_denom[:]
-        for dleaf in remaining_denom:
-            if compatible(nleaf, dleaf):
-                multiplier *= nleaf.squeeze() / dleaf.squeeze()
-                simple_numer.remove(nleaf)
-                simple_denom.remove(dleaf)
-                break
+    >>> exact(0.01 ** 3)
+    Fraction(1, 1000000)
+    >>> exact(1000 / 3600.0)
+    Fraction(5, 18)
+    """
+    if not isinstance(number, float):
+        return number
+    found = EXACT.get(number)
+    if found is None:
+        found = EXACT.put(number, nearby_fraction(number))
+    return found
+
+def nearby_fraction(number):
+    """The fraction exact() takes the float number to stand for."""
+    if number.is_integer():
+        return Fraction(int(number))
+    value = Fraction(number)
+    for candidate in (value.limit_denominator(10 ** 6), Fraction('%.15g' % number)):
+        if abs(candidate - value) <= abs(value) * TOLERANCE:
+            return candidate
+    return Fraction(repr(number))
+
+def define(numer, denom, multiplier=1):
+    """Compose the quotient of products of units for defining a named
+    unit. Return the composed unit and its exact factor to leaf units.
     
-    return (simple_numer, simple_denom, multiplier)
+    The factor is worked out exactly from the factors of the units, so
+    a float multiplier is rounded once, however long the chain of
+    definitions behind it.
+    
+    >>> from units import unit
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> (litre, factor) = define([unit('dm')] * 3, [])
+    >>> (litre.squeeze(), factor)
+    (0.001, Fraction(1, 1000))
+    """
+    (exponents, chained) = collect(numer, denom)
+    chained *= multiplier
+    factor = exact(multiplier) * product_factor(numer, denom)
+    if isinstance(chained, float):
+        chained = float(factor)
+    return (compose(exponents, chained, factor=lambda: factor), factor)
+
+def cancel(numer, denom):
+    """Cancel out compatible units in the given numerator and denominator.
+    Return a triple of the implied quantity multiplier that has been
+    squeezed out, the new numerator and the new denominator."""
+    (exponents, multiplier) = collect(numer, denom)
+    signature = dimension(exponents)
+    return (expand(signature, 1), expand(signature, -1), multiplier)
 
 def squeeze(numer, denom):
     """Simplify.
@@ -45,111 +158,176 @@ def squeeze(numer, denom):
     Some units imply quantities. For example, a kilometre implies a quantity
     of a thousand metres. This 'squeezes' out these implied quantities,
     returning a modified multiplier and simpler units."""
+    return cancel(numer, denom)
+
+def compose(exponents, multiplier=1, cls=None, factor=None):
+    """Return the unit with the given exponent map and multiplier,
+    unboxed to a number or leaf unit where possible and otherwise
+    interned. factor, if given, is a function returning the exact value
+    of the multiplier, worked out from the units it was made from; it
+    is called when the unit is first made. Without it, the unit's
+    factor is guessed from the multiplier with exact()."""
+    signature = dimension(exponents)
     
-    result_numer = []
-    result_denom = []
-    result_mult = 1
-    
-    for unit in numer:
-        while hasattr(unit, 'composed_unit'):
-            unit = unit.composed_unit
-        
-        if hasattr(unit, 'numer'):
-            result_numer += unit.numer
-            result_denom += unit.denom
-            result_mult *= unit.squeeze()
-        else:
-            result_numer += [unit]
-    
-    for unit in denom:
-        while hasattr(unit, 'composed_unit'):
-            unit = unit.composed_unit
-        
-        if hasattr(unit, 'numer'):
-            result_denom += unit.numer
-            result_numer += unit.denom
-            result_mult /= unit.squeeze()
-        else:
-            result_denom += [unit]
-    
-    result_numer.sort()
-    result_denom.sort()
+    if not signature and multiplier:
+        return multiplier
     
-    (simpler_numer, simpler_denom, cancellation_mult) = cancel(result_numer, result_denom)
+    if multiplier == 1 and len(signature) == 1 and signature[0][1] == 1:
+        return signature[0][0]
     
-    result_mult *= cancellation_mult
+    cls = cls or ComposedUnit
     
-    return (simpler_numer, simpler_denom, result_mult)
+    # The multiplier's type is part of the key so that 28 and 28.0
+    # don't share a unit and change the result of integer division.
+    key = (cls, signature, type(multiplier), multiplier)
+    composed = INTERNED.get(key)
+    if composed is None:
+        composed = AbstractUnit.__new__(cls)
+        AbstractUnit.__init__(composed, is_si=False)
+        composed.dimension = signature
+        composed.multiplier = multiplier
+        composed._factor = None
+        composed = INTERNED.put(key, composed)
+    if composed._factor is None and factor is not None:
+        composed._factor = factor()
+    return composed
 
 
 class ComposedUnit(AbstractUnit):
-    """A ComposedUnit is a quotient of products of units."""
+    """A ComposedUnit is a quotient of products of units.
+    
+    Instances are interned: constructing the same squeezed numerator,
+    denominator and multiplier twice returns the same object.
+    
+    >>> from units import unit
+    >>> ComposedUnit([unit('m')], [unit('s')]) is unit('m') / unit('s')
+    True
+    """
+    
+    __slots__ = ('multiplier', '_factor')
     
     def __new__(cls, numer, denom, multiplier=1):
         """Construct a unit that is a quotient of products of units,
         including an implicit quantity multiplier."""
         
-        (squeezed_numer, squeezed_denom, squeezed_multiplier) = squeeze(numer, denom)
+        (exponents, squeezed_multiplier) = collect(numer, denom)
         
-        multiplier *= squeezed_multiplier
-        
-        unboxed = unbox(squeezed_numer, squeezed_denom, multiplier)
-        if unboxed:
-            return unboxed
-        
-        return super(ComposedUnit, cls).__new__(cls)
+        return compose(exponents, multiplier * squeezed_multiplier, cls,
+                       lambda: exact(multiplier) * product_factor(numer, denom))
     
     def __init__(self, numer, denom, multiplier=1):
-        super(ComposedUnit, self).__init__(is_si=False)
-        
-        (self.numer, self.denom, self.multiplier) = squeeze(numer, denom)
-        self.multiplier *= multiplier
-        
-        self.orig_numer = numer
-        self.orig_denom = denom
-        self.orig_multiplier = multiplier
+        """All of the work happens in __new__, so that an interned unit
+        is not squeezed again each time it is handed out."""
+        # pylint: disable-msg=W0231,W0613
+        pass
+    
+    def get_numer(self):
+        """The leaf units of the numerator, repeated by exponent."""
+        return expand(self.dimension, 1)
+    numer = property(get_numer)
+    
+    def get_denom(self):
+        """The leaf units of the denominator, repeated by exponent."""
+        return expand(self.dimension, -1)
+    denom = property(get_denom)
+    
+    def get_exponents(self):
+        """A dict mapping each leaf unit to its exponent."""
+        return dict(self.dimension)
+    exponents = property(get_exponents)
     
     def __str__(self):
-        if self.denom:
-            return ((' * '.join([str(x) for x in self.orig_numer]) or '1') + ' * '.join([str(x) for x in self.orig_denom]))
+        numer = format_terms(self.dimension, 1)
+        denom = format_terms(self.dimension, -1)
+        if denom:
+            return (numer or '1') + ' / ' + denom
         else:
-            return ' * '.join([str(x) for x in self.numer])
+            return numer
     
     def __repr__(self):
+        if all([exponent == int(exponent) for (_, exponent) in self.dimension]):
+            params = [self.numer, self.denom, self.multiplier]
+        else:
+            params = [self.exponents, self.multiplier]
         return '%(name)s(%(params)s)' % {
             'name': self.__class__.__name__,
-            'params': ', '.join([repr(x) for x in [self.orig_numer, self.orig_denom, self.orig_multiplier]])
+            'params': ', '.join([repr(x) for x in params])
         }
     
+    def __reduce__(self):
+        return (restore, (self.dimension, self.multiplier, self.__class__))
+    
     def canonical(self):
         """Return an immutable, comparable version of this unit,
         dropping any multiplier."""
-        if self.denom or len(self.numer) != 1:
-            return (tuple(self.numer), tuple(self.denom))
+        if len(self.dimension) == 1 and self.dimension[0][1] == 1:
+            return self.dimension[0][0]
         else:
-            return self.numer[0]
+            return self.dimension
     
     def squeeze(self):
         """Return this unit's implicit quantity multiplier."""
         return self.multiplier
     
+    def get_factor(self):
+        """The exact value of the multiplier, worked out from the factors
+        of the units it was made from, or else guessed with exact()."""
+        if self._factor is None:
+            return exact(self.multiplier)
+        return self._factor
+    factor = property(get_factor)
+    
     def __mul__(self, other):
-        if hasattr(other, "numer"):
-            assert(hasattr(other, "denom"))
-            return ComposedUnit(self.numer + other.numer, self.denom + other.denom, self.squeeze() * other.squeeze())
-        else:
-            return ComposedUnit(self.numer + [other], self.denom, self.squeeze())
+        return compose(merge(dict(self.dimension), other.dimension),
+                       self.multiplier * other.squeeze(), self.__class__,
+                       lambda: self.factor * other.factor)
     
     def invert(self):
         """Return (this unit)^-1."""
-        return ComposedUnit(self.denom, self.numer, 1 / self.squeeze())
+        return compose(merge({}, self.dimension, -1), 1 / self.squeeze(), self.__class__,
+                       lambda: 1 / Fraction(self.factor))
     
     def __div__(self, other):
-        if hasattr(other, "invert"):
-            return self * other.invert()
-        else:
-            return ComposedUnit(self.numer, self.denom + [other], self.squeeze() / other.squeeze())
+        return compose(merge(dict(self.dimension), other.dimension, -1),
+                       self.multiplier / other.squeeze(), self.__class__,
+                       lambda: Fraction(self.factor) / other.factor)
     
     def __pow__(self, exponent):
-        return ComposedUnit(self.numer * exponent, self.denom * exponent, self.squeeze() ** exponent)
-            
\ No newline at end of file
+        exponent = rational(exponent)
+        multiplier = self.multiplier
+        if multiplier != 1:
+            # Avoid turning an integral 1 into a float for negative powers.
+            multiplier **= exponent
+        factor = None
+        if isinstance(exponent, int):
+            factor = lambda: Fraction(self.factor) ** exponent
+        return compose(merge({}, self.dimension, exponent), multiplier, self.__class__, factor)
+
+def restore(signature, multiplier, cls):
+    """Unpickle a composed unit from its dimension signature and
+    multiplier, interning it again."""
+    return compose(dict(signature), multiplier, cls)
+
+def rational(exponent):
+    """Check that exponent is an integer or a Fraction, and simplify
+    integral Fractions to integers."""
+    if isinstance(exponent, Fraction):
+        if exponent.denominator == 1:
+            return int(exponent)
+        return exponent
+    elif exponent == int(exponent):
+        return int(exponent)
+    raise ValueError('Units can only be raised to integer or Fraction powers, not %r' % (exponent,))
+
+def format_terms(signature, sign):
+    """Format the leaf units in signature whose exponents have the given
+    sign, writing integer powers out as repeated products."""
+    terms = []
+    for (leaf, exponent) in signature:
+        exponent *= sign
+        if exponent > 0:
+            if exponent == int(exponent):
+                terms += [str(leaf)] * int(exponent)
+            else:
+                terms.append('%s ** %s' % (leaf, exponent))
+    return ' * '.join(terms)
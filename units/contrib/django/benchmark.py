@@ -0,0 +1,129 @@
+"""Measure the UnitField against a local SQLite database.
+
+Run with::
+
+    python -m units.contrib.django.benchmark
+
+It compares two models of trips: one storing each distance as a
+"number specifier" string in a char column, which has to be loaded and
+parsed row by row to be filtered or sorted, and one storing it in a
+UnitField, which filters and sorts in the database. It reports the
+microseconds per row to insert the rows, to load them all, to find the
+rows in a range of distances and to sort them.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.db import connection, models
+
+from units import unit
+from units.contrib.django.models import UnitField
+
+SPECIFIERS = ['m', 'km', 'mi', 'ft']
+
+def configure(path):
+    """Set Django up to use the SQLite database file at path."""
+    settings.configure(DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                                              'NAME': path}})
+    django.setup()
+
+def make_models():
+    """Return the two trip models, once Django is set up."""
+    
+    class TextTrip(models.Model):
+        """A distance stored as text."""
+        distance = models.CharField(max_length=64)
+        
+        class Meta:
+            """Not part of an installed app."""
+            app_label = 'units_benchmarks'
+    
+    class UnitTrip(models.Model):
+        """A distance stored in a UnitField."""
+        distance = UnitField(unit='km')
+        
+        class Meta:
+            """Not part of an installed app."""
+            app_label = 'units_benchmarks'
+    
+    return (TextTrip, UnitTrip)
+
+def parse(text):
+    """Parse a "number specifier" string into a quantity."""
+    (number, specifier) = text.split(' ', 1)
+    return unit(specifier)(float(number))
+
+def distances(count):
+    """count distances in a mix of units."""
+    return [unit(SPECIFIERS[i % 4])(float(i % 1000)) for i in range(count)]
+
+def best_time(function, repeat=3):
+    """The best time, in seconds, of calling function repeat times."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def measure(count=10000):
+    """Return a list of (operation, seconds per row with text, seconds
+    per row with a UnitField) tuples."""
+    (TextTrip, UnitTrip) = make_models()
+    with connection.schema_editor() as editor:
+        editor.create_model(TextTrip)
+        editor.create_model(UnitTrip)
+    
+    quantities = distances(count)
+    (low, high) = (unit('km')(0.2), unit('km')(0.4))
+    
+    def insert_text():
+        """Replace the text trips."""
+        TextTrip.objects.all().delete()
+        TextTrip.objects.bulk_create([TextTrip(distance='%r %s' % (quantity.num, quantity.unit.specifier))
+                                      for quantity in quantities])
+    
+    def insert_unit():
+        """Replace the UnitField trips."""
+        UnitTrip.objects.all().delete()
+        UnitTrip.objects.bulk_create([UnitTrip(distance=quantity) for quantity in quantities])
+    
+    results = [('insert', best_time(insert_text), best_time(insert_unit))]
+    results.append(('load', best_time(lambda: [parse(trip.distance) for trip in TextTrip.objects.all()]),
+                    best_time(lambda: [trip.distance for trip in UnitTrip.objects.all()])))
+    results.append(('range filter',
+                    best_time(lambda: [distance for distance in
+                                       [parse(trip.distance) for trip in TextTrip.objects.all()]
+                                       if low <= distance <= high]),
+                    best_time(lambda: [trip.distance for trip in
+                                       UnitTrip.objects.filter(distance__range=(low, high))])))
+    results.append(('order by',
+                    best_time(lambda: sorted([parse(trip.distance) for trip in TextTrip.objects.all()])),
+                    best_time(lambda: [trip.distance for trip in UnitTrip.objects.order_by('distance')])))
+    
+    with connection.schema_editor() as editor:
+        editor.delete_model(TextTrip)
+        editor.delete_model(UnitTrip)
+    return [(label, text / count, field / count) for (label, text, field) in results]
+
+def main():
+    """Print the measurements."""
+    directory = tempfile.mkdtemp()
+    configure(os.path.join(directory, 'benchmark.sqlite3'))
+    try:
+        print('%-14s %12s %12s' % ('operation', 'text us/row', 'field us/row'))
+        for (label, text, field) in measure():
+            print('%-14s %12.3f %12.3f' % (label, text * 1e6, field * 1e6))
+    finally:
+        connection.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
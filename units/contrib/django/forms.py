@@ -0,0 +1,84 @@
+"""A Django form field for quantities, the form field of a UnitField.
+
+Quantities are entered as text such as '26.2 mi', or as a plain number
+in the field's unit. Only units that are already registered, or
+expressions over them, are accepted, so form input never defines new
+units.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+
+from units import unit as find_unit
+from units.compatibility import compatible
+from units.expression import is_expression, parse
+from units.normalize import split_quantity
+from units.quantity import Quantity
+from units.registry import active
+from units.wire import lookup
+
+__all__ = ('QuantityField',)
+
+def find(specifier):
+    """The unit for specifier, without defining any new units."""
+    if is_expression(specifier):
+        return parse(specifier, lookup)
+    return lookup(specifier)
+
+def specifier_of(unit):
+    """A specifier that unit() turns back into unit: the specifier a
+    unit is registered under, or else an expression over leaf units."""
+    specifier = getattr(unit, 'specifier', None)
+    if specifier is not None and active().find(specifier) is unit:
+        return specifier
+    terms = []
+    for (leaf, exponent) in unit.dimension:
+        if exponent == 1:
+            terms.append(leaf.specifier)
+        else:
+            terms.append('%s^(%s)' % (leaf.specifier, exponent))
+    multiplier = unit.squeeze()
+    if multiplier != 1:
+        terms.insert(0, repr(multiplier))
+    return ' * '.join(terms)
+
+class QuantityField(forms.Field):
+    """A form field whose cleaned value is a Quantity compatible with
+    unit, the unit or unit specifier plain numbers are taken to be in."""
+    
+    default_error_messages = {
+        'invalid': 'Enter a quantity, such as "12.5 km".',
+        'incompatible': 'Enter a quantity in units compatible with %(unit)s.',
+    }
+    
+    def __init__(self, unit=None, **kwargs):
+        if unit is None:
+            raise TypeError('QuantityField needs a unit')
+        if not hasattr(unit, 'squeeze'):
+            unit = find_unit(unit)
+        self.unit = unit
+        super(QuantityField, self).__init__(**kwargs)
+    
+    def prepare_value(self, value):
+        if isinstance(value, Quantity):
+            return '%r %s' % (value.num, specifier_of(value.unit))
+        return value
+    
+    def to_python(self, value):
+        if isinstance(value, Quantity):
+            return value
+        if value in self.empty_values:
+            return None
+        try:
+            return Quantity(float(value), self.unit)
+        except (TypeError, ValueError):
+            pass
+        try:
+            (number, specifier) = split_quantity(value)
+            found = find(specifier)
+        except ValueError:
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        if not compatible(found, self.unit):
+            raise ValidationError(self.error_messages['incompatible'], code='incompatible',
+                                  params={'unit': specifier_of(self.unit)})
+        return Quantity(number, found)
@@ -1,54 +1,188 @@
+"""A Django model field for quantities.
+
+A UnitField stores each quantity in two columns: its magnitude in the
+leaf units it is made of, as an indexed float column, and the unit to
+display it in, as a unit specifier in a char column named after the
+field with '_unit' appended. Because every quantity of a dimension is
+stored in the same units, range filters and ordering run in the
+database::
+
+    class Trip(models.Model):
+        distance = UnitField(unit='km')
+    
+    Trip.objects.create(distance=unit('mi')(26.2))
+    Trip.objects.filter(distance__gte=unit('km')(40)).order_by('distance')
+
+Quantities used in lookups or assigned to the field are converted into
+the stored units. Plain numbers are taken to be in the field's unit, so
+with the field above, Trip(distance=5) is a trip of 5 km, and
+filter(distance__gte=40) finds trips of at least 40 km. Loading a row
+reads the float and the specifier; the unit is looked up in a cache
+kept by the field, so loading does no parsing. In forms, the field is a
+units.contrib.django.forms.QuantityField.
+"""
+
+from operator import truediv
+
 from django.db import models
 
-from units import unit as Unit
+from units import unit as find_unit
+from units.compatibility import compatible
+from units.contrib.django.forms import QuantityField, specifier_of
+from units.exception import IncompatibleUnitsError
 from units.predefined import define_units
 from units.quantity import Quantity
 define_units()
 
 __all__ = ('UnitField',)
 
-class UnitProxy(Unit):
-    def __init__(self, field, instance, quantity, unit):
+class Magnitude(float):
+    """A magnitude in leaf units, as stored in the database, rather than
+    a plain number in the field's unit."""
+    
+    __slots__ = ()
+
+class UnitSpecifierField(models.CharField):
+    """The column holding the display unit of a UnitField. Only added
+    to a model once, whichever of the two fields is added first."""
+    
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        if name in [field.name for field in cls._meta.local_fields]:
+            return
+        super(UnitSpecifierField, self).contribute_to_class(cls, name, *args, **kwargs)
+
+class QuantityDescriptor(object):
+    """Gives a model instance's UnitField attribute as a Quantity, built
+    from the stored magnitude and display unit."""
+    
+    def __init__(self, field):
         self.field = field
-        self.instance = instance
-        super(UnitProxy, self).__init__(quantity, unit)
-    
-    def _set_quantity(self, quantity):
-        self._quantity = quantity
-        setattr(self.instance, self.field.value_field, quantity)
-        
-    def _get_quantity(self):
-        return self._quantity
-    
-    def _set_unit(self, unit):
-        self._unit = unit
-        setattr(self.instance, self.field.currency_field, strcurrency(unit))
-        
-    def _get_unit(self):
-        return self._unit
-        
-    quantity = property(_get_quantity, _set_quantity)
-    unit = property(_get_unit, _set_unit)
-
-class UnitField(Field):
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        attname = self.field.attname
+        if attname not in instance.__dict__:
+            # Deferred by only() or defer().
+            instance.refresh_from_db(fields=[attname])
+        base = instance.__dict__[attname]
+        if base is None:
+            return None
+        return self.field.from_base(base, getattr(instance, self.field.unit_attname))
+    
+    def __set__(self, instance, value):
+        if isinstance(value, Quantity):
+            setattr(instance, self.field.unit_attname, specifier_of(value.unit))
+            value = Magnitude(self.field.to_base(value))
+        elif value is not None and not isinstance(value, Magnitude):
+            value = Magnitude(self.field.to_base(Quantity(float(value), self.field.unit)))
+        instance.__dict__[self.field.attname] = value
+
+class UnitField(models.FloatField):
+    """A model field holding a Quantity. unit is the unit, or unit
+    specifier, that quantities are displayed in by default; quantities
+    assigned to the field must be compatible with it. The magnitude
+    column is indexed unless db_index=False is given."""
     
     description = "Django model field for a python unit object."
     
-    __metaclass__ = models.SubfieldBase
+    def __init__(self, verbose_name=None, name=None, unit=None, unit_max_length=64, **kwargs):
+        if unit is None:
+            raise TypeError('UnitField needs a unit')
+        if not hasattr(unit, 'squeeze'):
+            unit = find_unit(unit)
+        self.unit = unit
+        self.unit_specifier = specifier_of(unit)
+        self.unit_max_length = unit_max_length
+        self._units = {}
+        kwargs.setdefault('db_index', True)
+        super(UnitField, self).__init__(verbose_name, name, **kwargs)
     
-    def __init__(self, quantity, unit, *args, **kwargs):
-        super(UnitField, self).__init__(*args, **kwargs)
+    def get_unit_attname(self):
+        """The name of the display unit column's attribute"""
+        return '%s_unit' % self.name
+    unit_attname = property(get_unit_attname)
     
-    def to_python(self, value):
-        if value in (None, ''):
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(UnitField, self).contribute_to_class(cls, name, *args, **kwargs)
+        specifier_field = UnitSpecifierField(max_length=self.unit_max_length, default=self.unit_specifier,
+                                             editable=False, null=self.null)
+        # Put the display unit before the magnitude, so that assigning a
+        # quantity when making an instance sets both.
+        specifier_field.creation_counter = self.creation_counter - 0.5
+        cls.add_to_class(self.unit_attname, specifier_field)
+        setattr(cls, self.name, QuantityDescriptor(self))
+    
+    def lookup_unit(self, specifier):
+        """The unit and exact factor for a display unit specifier,
+        cached."""
+        try:
+            return self._units[specifier]
+        except KeyError:
+            unit = find_unit(specifier)
+            if not compatible(unit, self.unit):
+                raise IncompatibleUnitsError()
+            factor = unit.factor
+            found = self._units[specifier] = (unit, factor.numerator, factor.denominator)
+            return found
+    
+    def to_base(self, quantity):
+        """The magnitude to store for a quantity."""
+        if not compatible(quantity.unit, self.unit):
+            raise IncompatibleUnitsError()
+        return float(quantity.base)
+    
+    def from_base(self, base, specifier):
+        """The Quantity in the unit with the given specifier whose
+        magnitude in leaf units is base."""
+        (unit, numerator, denominator) = self.lookup_unit(specifier or self.unit_specifier)
+        (base_numerator, base_denominator) = float(base).as_integer_ratio()
+        return Quantity(truediv(base_numerator * denominator, base_denominator * numerator), unit)
+    
+    def from_db_value(self, value, expression, connection, context):
+        # pylint: disable-msg=W0613
+        if value is None:
             return None
-        
+        return Magnitude(value)
+    
+    def pre_save(self, model_instance, add):
+        # Save the stored magnitude rather than remaking it from a Quantity.
+        return model_instance.__dict__.get(self.attname)
+    
+    def get_prep_value(self, value):
+        if isinstance(value, Quantity):
+            return self.to_base(value)
+        elif isinstance(value, Magnitude):
+            return float(value)
+        value = super(UnitField, self).get_prep_value(value)
+        if value is None:
+            return None
+        return self.to_base(Quantity(value, self.unit))
+    
+    def to_python(self, value):
         if isinstance(value, Quantity):
             return value
-        
-        qty, qty_unit = str(value).split()
-        qty = float(qty)
-        return unit(qty_unit)(qty)
+        return super(UnitField, self).to_python(value)
+    
+    def value_to_string(self, obj):
+        # A number in the field's unit, which to_python() reads back.
+        value = self.value_from_object(obj)
+        if value is None:
+            return None
+        return repr(self.unit(value).num)
+    
+    def formfield(self, **kwargs):
+        defaults = {'form_class': QuantityField, 'unit': self.unit}
+        defaults.update(kwargs)
+        return super(UnitField, self).formfield(**defaults)
     
-    def get_internal_type(self):
-        return 'CharField'
\ No newline at end of file
+    def deconstruct(self):
+        (name, path, args, kwargs) = super(UnitField, self).deconstruct()
+        kwargs['unit'] = self.unit_specifier
+        if self.unit_max_length != 64:
+            kwargs['unit_max_length'] = self.unit_max_length
+        if kwargs.get('db_index') is True:
+            del kwargs['db_index']
+        else:
+            kwargs['db_index'] = False
+        return (name, path, args, kwargs)
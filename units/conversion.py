@@ -0,0 +1,77 @@
+"""Cached conversion multipliers between pairs of compatible units."""
+
+from functools import partial
+from operator import mul
+
+from units.compatibility import compatible
+from units.exception import IncompatibleUnitsError
+from units.registry import REGISTRY, active
+
+FACTORS = REGISTRY.factors
+"""Map (source unit, target unit) pairs to their multipliers in the
+global registry. Resize it with FACTORS.maxsize and empty it with
+FACTORS.clear(). Other registries have their own caches, which are
+emptied whenever a unit in them or in a parent is redefined."""
+
+def multipliers(source, target):
+    """Return a pair (source_mult, target_mult), so that a number n in
+    the source unit is n * source_mult / target_mult in the target unit.
+    Raise IncompatibleUnitsError if the units are incompatible. Results
+    are cached, so a hit skips both the compatibility check and the
+    squeezing.
+    
+    The pair is (source.squeeze(), target.squeeze()) unless either is
+    a float. Then it is the ratio of the units' exact factors, rounded
+    once, and 1, so that converting feet to inches multiplies by exactly
+    12.0.
+    """
+    factors = active().factors
+    key = (source, target)
+    result = factors.get(key)
+    if result is None:
+        if not compatible(source, target):
+            raise IncompatibleUnitsError()
+        (source_mult, target_mult) = (source.squeeze(), target.squeeze())
+        if isinstance(source_mult, float) or isinstance(target_mult, float):
+            (source_mult, target_mult) = (float(source.factor / target.factor), 1)
+        result = factors.put(key, (source_mult, target_mult))
+    return result
+
+def warmup(pairs):
+    """Cache the multipliers for each (source unit, target unit) pair."""
+    for (source, target) in pairs:
+        multipliers(source, target)
+
+class Converter(partial):
+    """A callable converting plain numbers from one unit to another.
+    Compatibility is checked and the factor computed once, when the
+    converter is made; calling it is a single float multiplication.
+    
+    >>> from units import unit
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> feet_to_metres = Converter(unit('ft'), unit('m'))
+    >>> round(feet_to_metres(10.0), 6)
+    3.048
+    >>> [round(x, 6) for x in feet_to_metres.convert_many([1.0, 2.0])]
+    [0.3048, 0.6096]
+    """
+    
+    def __new__(cls, source, target):
+        (source_mult, target_mult) = multipliers(source, target)
+        factor = float(source_mult) / target_mult
+        converter = super(Converter, cls).__new__(cls, mul, factor)
+        converter.source = source
+        converter.target = target
+        converter.factor = factor
+        return converter
+    
+    def convert_many(self, values):
+        """Convert each number in values, returning a list."""
+        return map(self, values)
+    
+    def __repr__(self):
+        return '%(name)s(%(params)s)' % {
+            'name': self.__class__.__name__,
+            'params': ', '.join([repr(x) for x in [self.source, self.target]])
+        }
@@ -4,3 +4,18 @@ class IncompatibleUnitsError(Exception):
     """Raised when an invalid operation is performed on
         quantities with incompatible units."""
     pass
+
+
+class UnitExpressionError(ValueError):
+    """Raised when a unit expression cannot be parsed."""
+    pass
+
+
+class SnapshotError(ValueError):
+    """Raised when a registry snapshot is corrupt or stale."""
+    pass
+
+
+class RegistryFrozenError(Exception):
+    """Raised when defining or removing units in a frozen registry."""
+    pass
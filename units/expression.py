@@ -0,0 +1,171 @@
+"""Parse unit expressions such as 'kg * m / s^2' into units.
+
+Expressions are made of unit specifiers combined with '*' and '/',
+raised to integer or rational powers with '^' or '**', and grouped with
+parentheses. Rational powers are written in parentheses, as in
+'m^(1/2)'. Numbers stand for plain multipliers, as in '1 / s'.
+
+>>> from units import unit
+>>> unit('m / s^2') is unit('m') / unit('s') / unit('s')
+True
+>>> unit('(m * m)^(1/2)') is unit('m')
+True
+"""
+
+import re
+from fractions import Fraction
+
+from units.composed_unit import compose, exact, merge
+from units.exception import UnitExpressionError
+from units.registry import REGISTRY, active
+
+OPERATORS = '*/^()'
+
+TOKENS = re.compile(r'\*\*|[*/^()]|[^*/^()]+')
+
+PARSED = REGISTRY.parsed
+"""Map (registry version, expression string) pairs to the units they
+parsed to in the global registry. Once the registry changes, entries for
+earlier versions are never looked up again and age out of the cache.
+Other registries have their own caches."""
+
+def is_expression(text):
+    """True if text combines units with operators."""
+    for char in OPERATORS:
+        if char in text:
+            return True
+    return False
+
+def parse(text, resolve):
+    """Return the unit described by the expression text, looking up the
+    specifiers in it with resolve. Results are cached until the registry
+    next changes."""
+    registry = active()
+    key = (registry.version, text)
+    cached = registry.parsed.get(key)
+    if cached is not None:
+        return cached
+    
+    (exponents, multiplier, factor) = Parser(text, resolve).parse()
+    return registry.parsed.put(key, compose(exponents, multiplier, factor=lambda: factor))
+
+class Parser(object):
+    """A recursive descent parser for one unit expression. Expressions
+    are evaluated to an exponent map, a multiplier and the exact factor
+    the multiplier stands for as they are parsed, so no intermediate
+    units are made."""
+    
+    def __init__(self, text, resolve):
+        self.text = text
+        self.resolve = resolve
+        self.tokens = [token.strip() for token in TOKENS.findall(text) if token.strip()]
+        self.tokens = ['^' if token == '**' else token for token in self.tokens]
+        self.position = 0
+    
+    def error(self, message):
+        """Raise a UnitExpressionError about this expression."""
+        raise UnitExpressionError('%s in unit expression %r' % (message, self.text))
+    
+    def peek(self):
+        """The next token, or None at the end."""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+    
+    def take(self):
+        """Consume and return the next token."""
+        token = self.peek()
+        if token is None:
+            self.error('Unexpected end')
+        self.position += 1
+        return token
+    
+    def parse(self):
+        """Parse the whole expression."""
+        result = self.product()
+        if self.peek() is not None:
+            self.error('Unexpected %r' % self.peek())
+        return result
+    
+    def product(self):
+        """product := power (('*' | '/') power)*"""
+        (exponents, multiplier, factor) = self.power()
+        while self.peek() in ('*', '/'):
+            sign = {'*': 1, '/': -1}[self.take()]
+            (term_exponents, term_multiplier, term_factor) = self.power()
+            merge(exponents, term_exponents.items(), sign)
+            if term_multiplier != 1:
+                if sign > 0:
+                    multiplier *= term_multiplier
+                    factor *= term_factor
+                else:
+                    multiplier /= term_multiplier
+                    factor = Fraction(factor) / term_factor
+        return (exponents, multiplier, factor)
+    
+    def power(self):
+        """power := atom ('^' exponent)?"""
+        (exponents, multiplier, factor) = self.atom()
+        if self.peek() == '^':
+            self.take()
+            exponent = self.exponent()
+            exponents = merge({}, exponents.items(), exponent)
+            if multiplier != 1:
+                multiplier **= exponent
+                if isinstance(exponent, int):
+                    factor = Fraction(factor) ** exponent
+                else:
+                    factor = exact(multiplier)
+        return (exponents, multiplier, factor)
+    
+    def atom(self):
+        """atom := '(' product ')' | number | specifier"""
+        token = self.take()
+        if token == '(':
+            result = self.product()
+            if self.take() != ')':
+                self.error('Missing )')
+            return result
+        elif token in OPERATORS:
+            self.error('Unexpected %r' % token)
+        
+        number = to_number(token)
+        if number is not None:
+            return ({}, number, exact(number))
+        
+        unit = self.resolve(token)
+        return (dict(unit.dimension), unit.squeeze(), unit.factor)
+    
+    def exponent(self):
+        """exponent := integer | '(' integer ('/' integer)? ')'"""
+        token = self.take()
+        if token != '(':
+            return self.integer(token)
+        
+        numerator = self.integer(self.take())
+        if self.peek() == '/':
+            self.take()
+            exponent = Fraction(numerator, self.integer(self.take()))
+        else:
+            exponent = numerator
+        if self.take() != ')':
+            self.error('Missing )')
+        if exponent.denominator == 1:
+            return int(exponent)
+        return exponent
+    
+    def integer(self, token):
+        """Read an integer from token."""
+        try:
+            return int(token)
+        except ValueError:
+            self.error('Expected an integer exponent, not %r' % token)
+
+def to_number(token):
+    """The int or float spelled by token, or None."""
+    for kind in (int, float):
+        try:
+            return kind(token)
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,241 @@
+"""Opt-in instrumentation of the unit machinery.
+
+While instrumentation is enabled, calls into the hot paths are counted:
+composing units, cancelling and squeezing them, compatibility checks,
+conversions and registry lookups. stats() reports these counts along
+with the hit rates of the unit caches. Optionally, a profiling timer
+also samples the stack every so often and charges each sample taken
+inside this package to the line outside it that called in, which shows
+where a program spends its time in units.
+
+Nothing is hooked while instrumentation is disabled: enabling it swaps
+counting wrappers in for the instrumented functions and methods, and
+disabling it puts the originals back, so disabled instrumentation costs
+nothing.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> with instrumented():
+...     speed = unit('km')(3.0) / unit('h')(1.0)
+...     distance = unit('m')(speed * unit('h')(2.0))
+>>> stats()['counts']['convert']
+1
+
+Sampling uses SIGPROF, so it is only available on Unix and has to be
+enabled from the main thread. Counts from several threads at once may
+come out slightly low.
+"""
+
+import signal
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+import units.compatibility
+import units.composed_unit
+import units.conversion
+from units.composed_unit import ComposedUnit
+from units.leaf_unit import LeafUnit
+from units.named_composed_unit import NamedComposedUnit
+from units.registry import Registry, active
+
+FUNCTIONS = [
+    ('compose', units.composed_unit, 'compose'),
+    ('cancel', units.composed_unit, 'cancel'),
+    ('compatible', units.compatibility, 'compatible'),
+    ('convert', units.conversion, 'multipliers'),
+]
+"""(counter, module, function name) for the module-level functions to
+count calls of. Every module in the package that imported one of them
+gets the counting wrapper too."""
+
+METHODS = [
+    ('squeeze', ComposedUnit, 'squeeze'),
+    ('squeeze', LeafUnit, 'squeeze'),
+    ('squeeze', NamedComposedUnit, 'squeeze'),
+]
+"""(counter, class, method name) for the methods to count calls of."""
+
+CALLERS = ('units.tests', 'units.benchmarks')
+"""Modules in the package that count as callers when sampling."""
+
+COUNTS = Counter()
+SITES = Counter()
+SAMPLES = Counter()
+BASELINES = {}
+
+ENABLED = False
+INTERVAL = None
+MEASURED = None
+"""The registry whose caches are reported, taken when reset() runs."""
+PATCHES = []
+PREVIOUS_HANDLER = None
+
+def counted(counter, function):
+    """Wrap function so that each call counts towards counter."""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        """Count the call and make it."""
+        COUNTS[counter] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+def counted_get(self, specifier, default=None):
+    """Registry.get, counting hits and misses."""
+    found = dict.get(self, specifier)
+    if found is None:
+        COUNTS['registry.misses'] += 1
+        return default
+    COUNTS['registry.hits'] += 1
+    return found
+
+def patch(owner, name, replacement):
+    """Set owner.name to replacement, remembering how to undo it."""
+    PATCHES.append((owner, name, owner.__dict__.get(name)))
+    setattr(owner, name, replacement)
+
+def caches():
+    """Map names to the caches whose hit rates are reported."""
+    registry = MEASURED
+    if registry is None:
+        registry = active()
+    return {'interned': units.composed_unit.INTERNED,
+            'factors': registry.factors,
+            'parsed': registry.parsed}
+
+def in_package(frame):
+    """Whether frame is running code of this package, other than the
+    modules in CALLERS."""
+    name = frame.f_globals.get('__name__') or ''
+    if name != 'units' and not name.startswith('units.'):
+        return False
+    return not name.startswith(CALLERS)
+
+def call_site(frame):
+    """The (file name, line number) that called into this package from
+    outside it, for the innermost call into the package that frame is
+    part of, or None if frame is not inside a call into the package."""
+    inside = False
+    while frame is not None:
+        if in_package(frame):
+            inside = True
+        elif inside:
+            return (frame.f_code.co_filename, frame.f_lineno)
+        frame = frame.f_back
+    return None
+
+def sample(signum, frame):
+    """SIGPROF handler: charge the sample to its call site."""
+    # pylint: disable-msg=W0613
+    SAMPLES['total'] += 1
+    site = call_site(frame)
+    if site is not None:
+        SAMPLES['units'] += 1
+        SITES[site] += 1
+
+def reset():
+    """Zero the counts and samples, and measure the hit rates of the
+    caches of the active registry from now on."""
+    # pylint: disable-msg=W0603
+    global MEASURED
+    MEASURED = active()
+    COUNTS.clear()
+    SITES.clear()
+    SAMPLES.clear()
+    BASELINES.clear()
+    for cache in caches().values():
+        BASELINES[cache] = (cache.hits, cache.misses)
+
+def enable(sample_interval=None):
+    """Start counting. If sample_interval is given, also sample the
+    stack every sample_interval seconds of CPU time."""
+    # pylint: disable-msg=W0603
+    global ENABLED, INTERVAL, PREVIOUS_HANDLER
+    if ENABLED:
+        raise RuntimeError('Instrumentation is already enabled')
+    if sample_interval is not None:
+        PREVIOUS_HANDLER = signal.signal(signal.SIGPROF, sample)
+        signal.setitimer(signal.ITIMER_PROF, sample_interval, sample_interval)
+    INTERVAL = sample_interval
+    
+    for (counter, module, name) in FUNCTIONS:
+        original = getattr(module, name)
+        wrapper = counted(counter, original)
+        for (module_name, imported) in sys.modules.items():
+            if imported is None or not (module_name == 'units' or module_name.startswith('units.')):
+                continue
+            for (attribute, value) in vars(imported).items():
+                if value is original:
+                    patch(imported, attribute, wrapper)
+    for (counter, cls, name) in METHODS:
+        patch(cls, name, counted(counter, cls.__dict__[name]))
+    patch(Registry, 'get', counted_get)
+    ENABLED = True
+
+def disable():
+    """Stop counting and sampling. The counts are kept until reset()."""
+    # pylint: disable-msg=W0603
+    global ENABLED, PREVIOUS_HANDLER
+    if not ENABLED:
+        return
+    if INTERVAL is not None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, PREVIOUS_HANDLER or signal.SIG_DFL)
+        PREVIOUS_HANDLER = None
+    while PATCHES:
+        (owner, name, original) = PATCHES.pop()
+        if original is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+    ENABLED = False
+
+@contextmanager
+def instrumented(sample_interval=None):
+    """Reset the counts, then count (and sample, if sample_interval is
+    given) inside the block. Read the results with stats()."""
+    reset()
+    enable(sample_interval)
+    try:
+        yield
+    finally:
+        disable()
+
+def cache_stats(cache):
+    """Hits, misses and hit rate of cache since the last reset(), and
+    its size."""
+    (hits, misses) = BASELINES.get(cache, (0, 0))
+    if cache.hits < hits or cache.misses < misses:
+        # The cache has been cleared since.
+        (hits, misses) = (0, 0)
+    info = cache.info()
+    info['hits'] -= hits
+    info['misses'] -= misses
+    lookups = info['hits'] + info['misses']
+    info['hit_rate'] = None
+    if lookups:
+        info['hit_rate'] = float(info['hits']) / lookups
+    return info
+
+def stats():
+    """Return a dict describing what was recorded since the last
+    reset(): 'counts' maps counters to calls; 'caches' maps cache names
+    to their hits, misses, hit rates and sizes; and, if sampling was
+    used, 'sampling' holds the interval, the number of samples, the
+    number taken inside this package and 'sites', a list of (seconds,
+    file name, line number) for the call sites they were charged to,
+    most expensive first.
+    """
+    report = {'enabled': ENABLED,
+              'counts': dict(COUNTS),
+              'caches': dict([(name, cache_stats(cache)) for (name, cache) in caches().items()])}
+    if INTERVAL is not None:
+        sites = [(count * INTERVAL, filename, line) for ((filename, line), count) in SITES.items()]
+        sites.sort(reverse=True)
+        report['sampling'] = {'interval': INTERVAL,
+                              'samples': SAMPLES['total'],
+                              'units_samples': SAMPLES['units'],
+                              'sites': sites}
+    return report
@@ -2,13 +2,16 @@
 They are not compatible with any other kind of unit."""
 
 from units.abstract import AbstractUnit
-from units.registry import REGISTRY
-from units.composed_unit import ComposedUnit
+from units.compatibility import dimension
+from units.registry import active
+from units.composed_unit import ComposedUnit, compose, rational
 
 class LeafUnit(AbstractUnit):
     """Leaf units are not compatible with other units, but they can be
     composed to make other units."""
     
+    __slots__ = ('_specifier', '_symbal', '_name')
+    
     def get_specifier(self):
         """Return the symbol of the unit."""
         return self._specifier
@@ -24,27 +27,45 @@ class LeafUnit(AbstractUnit):
     name = property(get_name)
     
     def __new__(cls, specifier, symbal=u'', name=u'', is_si=False):
-        # pylint: disable-msg=W0613
-        if specifier not in REGISTRY:
-            REGISTRY[specifier] = super(LeafUnit, cls).__new__(cls)
-        return REGISTRY[specifier]
+        def create():
+            """Make the unit in full before it is registered, so other
+            threads never see it half made."""
+            leaf = super(LeafUnit, cls).__new__(cls)
+            leaf.__init__(specifier, symbal, name, is_si)
+            return leaf
+        return active().register(specifier, create)
     
     def __init__(self, specifier, symbal=u'', name=u'', is_si=False):
         """Make a new LeafUnit with the given unit specifier and
         SI-compatibility. A unit that is SI compatible can be prefixed,
         e.g. with k to mean 1000x.
+        
+        Python calls this again on the registered unit each time LeafUnit
+        is called for its specifier. That does nothing if the attributes
+        are unchanged, and otherwise redefines the unit in place, which a
+        frozen registry forbids.
         """
+        if not symbal:
+            symbal = specifier
+        if getattr(self, 'dimension', None) is None:
+            self._define(specifier, symbal, name, is_si)
+            self.dimension = dimension({self: 1})
+        elif (symbal, name, is_si) != (self._symbal, self._name, self._si):
+            active().redefine(specifier, lambda: self._define(specifier, symbal, name, is_si))
+    
+    def _define(self, specifier, symbal, name, is_si):
+        """Set the attributes and index the unit."""
         super(LeafUnit, self).__init__(is_si)
-        
         self._specifier = specifier
-        if symbal:
-            self._symbal = symbal
-        else:
-            self._symbal = specifier
+        self._symbal = symbal
         self._name = name
+        active().index(self)
     
     __str__ = get_specifier
     
+    def __reduce__(self):
+        return (restore, (self.specifier, self.symbal, self.name, self.is_si()))
+    
     def __repr__(self):
         return '%(name)s(%(params)s)' % {
             'name': self.__class__.__name__,
@@ -52,16 +73,10 @@ class LeafUnit(AbstractUnit):
         }
     
     def __mul__(self, other):
-        if hasattr(other, "numer"):
-            return other * self
-        else:
-            return ComposedUnit([self, other], [])
+        return ComposedUnit([self, other], [])
     
     def __div__(self, other):
-        if hasattr(other, "invert"):
-            return other.invert() * self
-        else:
-            return ComposedUnit([self], [other])
+        return ComposedUnit([self], [other])
     
     def invert(self):
         """Return (this unit)^-1"""
@@ -75,5 +90,18 @@ class LeafUnit(AbstractUnit):
         """A LeafUnit has no implicit quantity."""
         return 1
     
+    def get_factor(self):
+        """A LeafUnit is its own base."""
+        return 1
+    factor = property(get_factor)
+    
     def __pow__(self, exponent):
-        return ComposedUnit([self] * exponent, [], 1)
\ No newline at end of file
+        return compose({self: rational(exponent)})
+
+def restore(specifier, symbal, name, is_si):
+    """Unpickle a leaf unit as the unit registered under its specifier
+    in the active registry, defining it there if it is missing."""
+    unit = active().find(specifier)
+    if unit is None:
+        unit = LeafUnit(specifier, symbal, name, is_si)
+    return unit
@@ -2,10 +2,17 @@
 
 from units.abstract import AbstractUnit
 from units.composed_unit import ComposedUnit
-from units.registry import REGISTRY
+from units.registry import active
 
 class NamedComposedUnit(AbstractUnit):
-    """A NamedComposedUnit is a composed unit with its own symbol."""
+    """A NamedComposedUnit is a composed unit with its own symbol.
+    
+    It keeps its exact factor to leaf units, so that units defined in
+    terms of it can be worked out exactly too, and its multiplier, so
+    that squeezing it is an attribute read.
+    """
+    
+    __slots__ = ('_specifier', '_composed_unit', '_symbal', '_name', '_factor', '_multiplier')
     
     def get_specifier(self):
         """The key for the composed unit"""
@@ -27,22 +34,58 @@ class NamedComposedUnit(AbstractUnit):
         return self._composed_unit
     composed_unit = property(get_composed_unit)
     
-    def __new__(cls, specifier, composed_unit, symbal=u'', name=u'', is_si=False):
+    def get_factor(self):
+        """The exact factor to leaf units"""
+        return self._factor
+    factor = property(get_factor)
+    
+    def __new__(cls, specifier, composed_unit, symbal=u'', name=u'', is_si=False, factor=None):
         """Give a composed unit a new symbol."""
-        # pylint: disable-msg=W0613
-        if specifier not in REGISTRY:
-            REGISTRY[specifier] = super(NamedComposedUnit, cls).__new__(cls)
-        return REGISTRY[specifier]
+        def create():
+            """Make the unit in full before it is registered, so other
+            threads never see it half made."""
+            named = super(NamedComposedUnit, cls).__new__(cls)
+            named.__init__(specifier, composed_unit, symbal, name, is_si, factor)
+            return named
+        return active().register(specifier, create)
+    
+    def __init__(self, specifier, composed_unit, symbal=u'', name=u'', is_si=False, factor=None):
+        """factor is the exact factor of composed_unit to leaf units, if
+        known, as worked out by units.composed_unit.define().
+        
+        Python calls this again on the registered unit each time
+        NamedComposedUnit is called for its specifier. That does nothing
+        if the definition is unchanged, and otherwise redefines the unit
+        in place, which a frozen registry forbids.
+        """
+        if not symbal:
+            symbal = specifier
+        if factor is None:
+            factor = composed_unit.factor
+        if getattr(self, 'dimension', None) is None:
+            self._define(specifier, composed_unit, symbal, name, is_si, factor)
+        elif not self._defines(composed_unit, symbal, name, is_si, factor):
+            active().redefine(specifier, lambda: self._define(specifier, composed_unit, symbal, name, is_si, factor))
     
-    def __init__(self, specifier, composed_unit, symbal=u'', name=u'', is_si=False):
+    def _defines(self, composed_unit, symbal, name, is_si, factor):
+        """Whether this unit already has the given definition. Composed
+        units are compared by value, since INTERNED may have made a new
+        object for the same one."""
+        multiplier = composed_unit.squeeze()
+        return (composed_unit.dimension, type(multiplier), multiplier, factor, symbal, name, is_si) == \
+            (self.dimension, type(self._multiplier), self._multiplier, self._factor, self._symbal, self._name, self._si)
+    
+    def _define(self, specifier, composed_unit, symbal, name, is_si, factor):
+        """Set the attributes and index the unit."""
         super(NamedComposedUnit, self).__init__(is_si)
         self._specifier = specifier
         self._composed_unit = composed_unit
-        if symbal:
-            self._symbal = symbal
-        else:
-            self._symbal = specifier
+        self._symbal = symbal
         self._name = name
+        self._multiplier = composed_unit.squeeze()
+        self._factor = factor
+        self.dimension = composed_unit.dimension
+        active().index(self)
     
     def invert(self):
         """Return the invert of the underlying composed unit."""
@@ -54,7 +97,7 @@ class NamedComposedUnit(AbstractUnit):
     
     def squeeze(self):
         """Return the squeeze of the underlying composed unit."""
-        return self.composed_unit.squeeze()
+        return self._multiplier
     
     def __mul__(self, other):
         return ComposedUnit([self, other], [])
@@ -64,6 +107,9 @@ class NamedComposedUnit(AbstractUnit):
     
     __str__ = get_name
     
+    def __reduce__(self):
+        return (restore, (self.specifier, self.composed_unit, self.symbal, self.name, self.is_si()))
+    
     def __repr__(self):
         return '%(name)s(%(params)s)' % {
             'name': self.__class__.__name__,
@@ -74,4 +120,12 @@ class NamedComposedUnit(AbstractUnit):
         return self.composed_unit == other or other == self.composed_unit
     
     def __pow__(self, exponent):
-        return self.composed_unit ** exponent
\ No newline at end of file
+        return self.composed_unit ** exponent
+
+def restore(specifier, composed_unit, symbal, name, is_si):
+    """Unpickle a named unit as the unit registered under its specifier
+    in the active registry, defining it there if it is missing."""
+    unit = active().find(specifier)
+    if unit is None:
+        unit = NamedComposedUnit(specifier, composed_unit, symbal, name, is_si)
+    return unit
@@ -0,0 +1,214 @@
+"""Stream records with "<qty> <unit>" fields from CSV or JSON-lines
+files, converting each quantity column into a target unit.
+
+Rows are read, normalized and written one at a time, so memory use
+doesn't grow with the size of the input. Each column keeps the
+conversion factor for every unit it has seen, so converting a value is
+a dict lookup and a multiplication. Chunks of rows can be spread over a
+pool of processes.
+
+>>> from units.predefined import define_units
+>>> define_units()
+>>> rows = [{'id': '1', 'length': '2 km'}, {'id': '2', 'length': '30 ft'}]
+>>> for row in normalize_rows(rows, {'length': 'm'}):
+...     print('%s %.3f' % (row['id'], row['length']))
+1 2000.000
+2 9.144
+
+The same is available from the command line::
+
+    python -m units normalize -c length=m measurements.csv -o metres.csv
+"""
+
+import csv
+import json
+import sys
+from array import array
+from collections import OrderedDict, deque
+
+from units import unit
+from units.conversion import Converter
+from units.predefined import define_units
+
+def split_quantity(text):
+    """Split text such as '12.5 km' into the number 12.5 and the unit
+    specifier 'km'."""
+    try:
+        (number, specifier) = text.strip().split(None, 1)
+        return (float(number), specifier.strip())
+    except (AttributeError, ValueError):
+        raise ValueError('Expected "<qty> <unit>", not %r' % (text,))
+
+class Normalizer(object):
+    """Convert the quantity columns of rows into target units."""
+    
+    def __init__(self, targets):
+        """targets maps column names to units or unit specifiers."""
+        self.targets = {}
+        self._factors = {}
+        for (column, target) in targets.items():
+            if not hasattr(target, 'squeeze'):
+                target = unit(target)
+            self.targets[column] = target
+            self._factors[column] = {}
+    
+    def convert(self, column, value):
+        """Convert the "<qty> <unit>" text value of the given column into
+        a float in the column's target unit. Empty values become None."""
+        if value is None or value == '':
+            return None
+        (number, specifier) = split_quantity(value)
+        factors = self._factors[column]
+        factor = factors.get(specifier)
+        if factor is None:
+            factor = Converter(unit(specifier), self.targets[column]).factor
+            factors[specifier] = factor
+        return number * factor
+    
+    def normalize(self, row):
+        """Return a copy of the row dict, keeping its type and so its
+        field order, with its quantity columns converted."""
+        row = row.copy()
+        for column in self.targets:
+            row[column] = self.convert(column, row.get(column))
+        return row
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+WORKER_NORMALIZER = None
+
+def init_worker(targets):
+    """Set up a pool process to normalize chunks."""
+    # pylint: disable-msg=W0603
+    global WORKER_NORMALIZER
+    WORKER_NORMALIZER = Normalizer(targets)
+
+def normalize_chunk(rows):
+    """Normalize a chunk of rows in a pool process."""
+    return [WORKER_NORMALIZER.normalize(row) for row in rows]
+
+def normalize_rows(rows, targets, chunk_size=10000, workers=1):
+    """Yield normalized copies of the given rows, in order.
+    
+    targets maps column names to units or unit specifiers. With more than
+    one worker, chunks of chunk_size rows are normalized in a process
+    pool; targets must then be given as specifiers. At most two chunks
+    per worker are in flight at once, so memory use stays bounded.
+    """
+    if workers <= 1:
+        normalizer = Normalizer(targets)
+        for row in rows:
+            yield normalizer.normalize(row)
+        return
+    
+    import multiprocessing
+    pool = multiprocessing.Pool(workers, init_worker, (targets,))
+    try:
+        pending = deque()
+        for chunk in chunked(rows, chunk_size):
+            pending.append(pool.apply_async(normalize_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:
+                for row in pending.popleft().get():
+                    yield row
+        while pending:
+            for row in pending.popleft().get():
+                yield row
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def column_arrays(rows, columns):
+    """Collect the given columns of normalized rows into compact arrays
+    of doubles, with NaN for missing values. Return a dict of arrays."""
+    arrays = dict([(column, array('d')) for column in columns])
+    for row in rows:
+        for column in columns:
+            value = row.get(column)
+            if value is None:
+                value = float('nan')
+            arrays[column].append(value)
+    return arrays
+
+def read_csv(stream):
+    """Yield the rows of a CSV file with a header line, as OrderedDicts
+    in the order of the header."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield OrderedDict([(name, row.get(name)) for name in reader.fieldnames])
+
+def read_jsonl(stream):
+    """Yield the rows of a JSON-lines file, as OrderedDicts in the order
+    of their fields."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line, object_pairs_hook=OrderedDict)
+
+def write_csv(rows, stream):
+    """Write dict rows to a CSV file, taking the header from the first,
+    in its field order."""
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(stream, list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+
+def write_jsonl(rows, stream):
+    """Write dict rows to a JSON-lines file, in their field order."""
+    for row in rows:
+        stream.write(json.dumps(row))
+        stream.write('\n')
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl}
+
+def add_arguments(parser):
+    """Add the options of the normalize command to an argparse parser."""
+    parser.add_argument('input', nargs='?', help='input file (default: stdin)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('-c', '--column', action='append', required=True, metavar='COLUMN=UNIT',
+                        help='convert COLUMN into UNIT; may be repeated')
+    parser.add_argument('-f', '--format', choices=sorted(READERS),
+                        help='file format (default: from the file name, else csv)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per chunk')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='worker processes')
+
+def main(args):
+    """Run the normalize command with parsed argparse arguments."""
+    define_units()
+    
+    targets = {}
+    for option in args.column:
+        (column, target) = option.split('=', 1)
+        targets[column.strip()] = target.strip()
+    
+    file_format = args.format
+    if file_format is None:
+        file_format = 'jsonl' if (args.input or '').endswith(('.jsonl', '.json')) else 'csv'
+    
+    source = sys.stdin
+    if args.input:
+        source = open(args.input, 'rb' if file_format == 'csv' else 'r')
+    destination = sys.stdout
+    if args.output:
+        destination = open(args.output, 'wb' if file_format == 'csv' else 'w')
+    
+    try:
+        rows = READERS[file_format](source)
+        normalized = normalize_rows(rows, targets, args.chunk_size, args.workers)
+        WRITERS[file_format](normalized, destination)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if destination is not sys.stdout:
+            destination.close()
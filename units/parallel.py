@@ -0,0 +1,177 @@
+"""Convert and reduce large batches of numbers across a process pool.
+
+The conversion factor is worked out once, in the calling process. The
+numbers are copied into a block of shared memory that the pool's
+processes inherit, each process converts or reduces its own slices of
+that block in place, and the results come back in order without being
+pickled.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> list(convert_many([1.0, 2.5], 'km', 'm', workers=2))
+[1000.0, 2500.0]
+>>> print(reduce([1.0, 2.0, 3.0], 'km', 'm', operation='mean', workers=2))
+2000.000000 m
+"""
+
+import multiprocessing
+from array import array
+from ctypes import addressof, memmove, string_at
+from multiprocessing.sharedctypes import RawArray
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from units import converter
+from units.quantity import Quantity
+
+ITEMSIZE = array('d').itemsize
+
+SHARED = None
+"""The shared block of numbers, in a pool process."""
+
+def init_worker(shared):
+    """Set up a pool process to work on the shared block."""
+    # pylint: disable-msg=W0603
+    global SHARED
+    SHARED = shared
+
+def read_chunk(shared, start, stop):
+    """The numbers in shared[start:stop], as an array('d') or a NumPy
+    view."""
+    if numpy is not None:
+        return numpy.frombuffer(shared, dtype=numpy.float64)[start:stop]
+    chunk = array('d')
+    chunk.fromstring(string_at(addressof(shared) + start * ITEMSIZE, (stop - start) * ITEMSIZE))
+    return chunk
+
+def convert_chunk(bounds):
+    """Multiply shared[start:stop] by factor, in place."""
+    (start, stop, factor) = bounds
+    chunk = read_chunk(SHARED, start, stop)
+    if numpy is not None:
+        chunk *= factor
+    else:
+        converted = array('d', [number * factor for number in chunk])
+        memmove(addressof(SHARED) + start * ITEMSIZE, converted.buffer_info()[0],
+                len(converted) * ITEMSIZE)
+
+def chunk_sum(chunk):
+    """The sum of chunk."""
+    if numpy is not None:
+        return float(chunk.sum())
+    return float(sum(chunk))
+
+def chunk_min(chunk):
+    """The smallest number in chunk."""
+    if numpy is not None:
+        return float(chunk.min())
+    return min(chunk)
+
+def chunk_max(chunk):
+    """The largest number in chunk."""
+    if numpy is not None:
+        return float(chunk.max())
+    return max(chunk)
+
+def total(chunk):
+    """The sum and count of chunk."""
+    return (chunk_sum(chunk), len(chunk))
+
+def add_totals(totals):
+    """Combine the (sum, count) pairs of several chunks."""
+    return (sum([subtotal for (subtotal, _) in totals]), sum([count for (_, count) in totals]))
+
+OPERATIONS = {
+    'sum': (chunk_sum, sum),
+    'min': (chunk_min, min),
+    'max': (chunk_max, max),
+    'mean': (total, add_totals),
+}
+"""Map operation names to (reduce a chunk, combine the chunk results)
+pairs of functions."""
+
+def reduce_chunk(bounds):
+    """Reduce shared[start:stop] with the named operation."""
+    (start, stop, operation) = bounds
+    return OPERATIONS[operation][0](read_chunk(SHARED, start, stop))
+
+def share(values):
+    """Copy a sequence of numbers into a new shared block."""
+    shared = RawArray('d', len(values))
+    if numpy is not None:
+        numpy.frombuffer(shared, dtype=numpy.float64)[:] = values
+    else:
+        shared[:] = values
+    return shared
+
+def split(length, chunks):
+    """Return (start, stop) bounds dividing range(length) into at most
+    the given number of nearly equal chunks, in order."""
+    chunks = max(1, min(chunks, length))
+    return [(length * i // chunks, length * (i + 1) // chunks) for i in range(chunks)]
+
+def run(function, shared, tasks, workers):
+    """Apply function to each task, in a pool of the given number of
+    processes sharing the block, or in this process if workers is 1.
+    Return the results in order."""
+    if workers <= 1:
+        init_worker(shared)
+        try:
+            return [function(task) for task in tasks]
+        finally:
+            init_worker(None)
+    
+    pool = multiprocessing.Pool(workers, init_worker, (shared,))
+    try:
+        results = pool.map(function, tasks)
+        pool.close()
+        return results
+    finally:
+        pool.terminate()
+        pool.join()
+
+def convert_many(values, source, target, workers=None, chunks_per_worker=4):
+    """Convert a sequence of numbers from the source unit to the target
+    unit, given as units or unit specifiers, in a pool of the given
+    number of processes (by default, one per CPU). Return the converted
+    numbers, in order, as an array('d').
+    """
+    factor = converter(source, target).factor
+    workers = workers or multiprocessing.cpu_count()
+    
+    shared = share(values)
+    tasks = [(start, stop, factor)
+             for (start, stop) in split(len(values), workers * chunks_per_worker)]
+    run(convert_chunk, shared, tasks, workers)
+    
+    result = array('d')
+    result.fromstring(buffer(shared))
+    return result
+
+def reduce(values, source, target=None, operation='sum', workers=None, chunks_per_worker=4):
+    """Reduce a sequence of numbers in the source unit with the named
+    operation ('sum', 'mean', 'min' or 'max') in a pool of the given
+    number of processes (by default, one per CPU). Return the result as
+    a Quantity in the target unit, by default the source unit.
+    """
+    # pylint: disable-msg=W0622
+    conversion = converter(source, target or source)
+    if operation not in OPERATIONS:
+        raise ValueError('Unknown operation %r' % (operation,))
+    if not len(values):
+        raise ValueError('Cannot reduce an empty sequence')
+    workers = workers or multiprocessing.cpu_count()
+    
+    shared = share(values)
+    tasks = [(start, stop, operation)
+             for (start, stop) in split(len(values), workers * chunks_per_worker)]
+    result = OPERATIONS[operation][1](run(reduce_chunk, shared, tasks, workers))
+    if operation == 'mean':
+        (subtotal, count) = result
+        result = subtotal / count
+    # Sums, means, minima and maxima all scale with the unit.
+    return Quantity(result * conversion.factor, conversion.target)
@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 """Predefined units."""
-from units.composed_unit import ComposedUnit
 from units.leaf_unit import LeafUnit
 from units.named_composed_unit import NamedComposedUnit
 from units import unit, named_unit, scaled_unit
+from units.registry import REGISTRY, active
 
-def define_units():
+def define_units(lazy=False):
     """Define built-in units.
     
     >>> define_units()
@@ -15,15 +15,38 @@ def define_units():
     True
     >>> unit('h').is_si()
     False
+    
+    With lazy=True, units are not defined straight away. Instead, each
+    group of them (see GROUPS) is defined, along with the groups it
+    depends on, the first time unit() looks up one of its units or an
+    SI-prefixed form of one.
+    
+    >>> REGISTRY.clear()
+    >>> define_units(lazy=True)
+    >>> 'mi' in REGISTRY
+    False
+    >>> unit('mi').squeeze()
+    1609.344
+    >>> 'ly' in REGISTRY
+    False
     """
-    define_base_si_units()
-    define_complex_si_units()
-    define_time_units()
-    define_volumes()
-    define_imperial_units()
-    define_astronomical_units()
-    define_computer_units()
-    define_ridiculous_units()
+    if lazy:
+        for (name, group) in GROUPS.items():
+            active().provide(group[2], lambda name=name: define_group(name))
+    else:
+        for name in ORDER:
+            GROUPS[name][0]()
+
+def define_group(name):
+    """Define the named group of units, first defining the groups it
+    depends on that are still waiting to be loaded lazily."""
+    (define, dependencies, specifiers) = GROUPS[name]
+    registry = active()
+    registry.withdraw(specifiers)
+    for dependency in dependencies:
+        if GROUPS[dependency][2][0] in registry.providers:
+            define_group(dependency)
+    define()
 
 def define_base_si_units():
     """Define the basic SI units.
@@ -114,7 +137,7 @@ def define_volumes():
     """
     # Dangerous unit, 3L gives a long int.
     assert unit('m').is_si()
-    NamedComposedUnit('L', unit('dm') ** 3, is_si=True)
+    named_unit('L', ['dm'] * 3, [], is_si=True)
     
     scaled_unit('tsp', 'mL', 5.0)
     scaled_unit('tbsp', 'mL', 15.0)
@@ -145,10 +168,10 @@ def define_imperial_units():
     scaled_unit('ch', 'li', 100.0, name='chain')
     
     # area measure
-    NamedComposedUnit('acre', ComposedUnit([unit('rd')] * 2, [], 160.0), name='acre')
+    named_unit('acre', ['rd'] * 2, [], 160.0, name='acre', is_si=False)
     
     # liquid measures
-    NamedComposedUnit('pt', ComposedUnit([unit('inch')] * 3, [], 28.875), name='pint')
+    named_unit('pt', ['inch'] * 3, [], 28.875, name='pint', is_si=False)
     
     scaled_unit('gi', 'pt', 0.25, name='gills')
     scaled_unit('qt', 'pt', 2.0, name='quarts')
@@ -218,5 +241,31 @@ def define_ridiculous_units():
     
     scaled_unit('bottle', 'mL', 355.0, name='bottle')
     scaled_unit('keg', 'L', 50.0, name='keg')
-        
-        
\ No newline at end of file
+
+GROUPS = {
+    'base_si': (define_base_si_units, [],
+                ['m', 'g', 's', 'A', 'K', 'cd', 'mol', 'tonne']),
+    'complex_si': (define_complex_si_units, ['base_si'],
+                   ['rad', 'sr', 'Hz', 'N', 'Pa', 'J', 'W', 'C', 'V', 'Ohm', 'F', 'Wb', 'T', 'H',
+                    'lm', 'lx', 'Bq', 'Gy', 'Sv', 'S', 'kat']),
+    'time': (define_time_units, ['base_si'],
+             ['min', 'h', 'day', 'wk']),
+    'volumes': (define_volumes, ['base_si'],
+                ['L', 'tsp', 'tbsp', 'cups']),
+    'imperial': (define_imperial_units, ['base_si', 'complex_si'],
+                 ['inch', 'in', 'ft', 'yd', 'fm', 'rd', 'fur', 'mi', 'lea', 'NM', 'cable', 'li',
+                  'ch', 'acre', 'pt', 'gi', 'qt', 'gal', 'fl oz', 'fl dr', 'minim', 'oz', 'lb',
+                  'ton', 'grain', 'dr', 'cwt', 'dwt', 'oz t', 'lb t', 'hpl', 'hpm', 'hpe', 'BTU']),
+    'astronomical': (define_astronomical_units, ['base_si'],
+                     ['ly', 'AU', 'pc']),
+    'computer': (define_computer_units, ['base_si'],
+                 ['operation', 'flop', 'bit', 'B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB']),
+    'ridiculous': (define_ridiculous_units, ['base_si', 'complex_si', 'time', 'volumes', 'imperial'],
+                   ['firkin', 'fortnight', 'smoot', 'hiroshima', 'bottle', 'keg']),
+}
+"""Groups of predefined units by name: the function defining each, the
+groups it depends on and the specifiers it defines."""
+
+ORDER = ['base_si', 'complex_si', 'time', 'volumes', 'imperial',
+         'astronomical', 'computer', 'ridiculous']
+"""The order in which define_units() defines the groups."""
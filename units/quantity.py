@@ -2,11 +2,56 @@
 The combination of quantities is dependent on the compatibilities
 of their units."""
 
+from fractions import Fraction
+from math import isinf, isnan
+from operator import truediv
+
 from units.compatibility import compatible
+from units.conversion import multipliers
 from units.exception import IncompatibleUnitsError
 
+def base_value(num, unit):
+    """The magnitude of num of the given unit in the leaf units it is
+    made of. It is exact when num is an integer or a Fraction and the
+    unit's exact factor is too, and otherwise the float nearest to the
+    exact product, so that equal quantities in different units get the
+    same magnitude.
+    
+    >>> from units import unit
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> (base_value(1, unit('km')), base_value(1.0, unit('ft')), base_value(12, unit('inch')))
+    (1000, 0.3048, 0.3048)
+    """
+    factor = unit.factor
+    if isinstance(num, float):
+        if isinf(num) or isnan(num):
+            return num * unit.squeeze()
+        (numerator, denominator) = num.as_integer_ratio()
+        return truediv(numerator * factor.numerator, denominator * factor.denominator)
+    elif isinstance(num, (int, long, Fraction)):
+        if factor.denominator == 1 or isinstance(num, Fraction):
+            return num * factor
+        return truediv(num * factor.numerator, factor.denominator)
+    return num * unit.squeeze()
+
 class Quantity(object):
-    """A number with a unit attached."""
+    """A number with a unit attached.
+    
+    Quantities use __slots__, so each costs little more than its number
+    and a pointer to its unit. See units.benchmarks.memory.
+    
+    Quantities are hashable, and equal quantities in different units
+    hash alike, so they can be put in sets and used as dict keys:
+    
+    >>> from units import unit
+    >>> from units.predefined import define_units
+    >>> define_units()
+    >>> len(set([unit('km')(1), unit('m')(1000), unit('m')(5)]))
+    2
+    """
+    
+    __slots__ = ('_num', '_unit', '_base')
     
     def __new__(cls, num, unit):
         if hasattr(unit, 'is_si'):
@@ -17,6 +62,9 @@ class Quantity(object):
     def __init__(self, num, unit):
         self._num, self._unit = num, unit
     
+    def __reduce__(self):
+        return (self.__class__, (self.num, self.unit))
+    
     def get_num(self):
         """The scalar number of this quantity"""
         return self._num
@@ -27,6 +75,21 @@ class Quantity(object):
         return self._unit
     unit = property(get_unit)
     
+    def get_base(self):
+        """The magnitude of this quantity in the leaf units its unit is
+        made of, worked out on first use. See base_value()."""
+        try:
+            return self._base
+        except AttributeError:
+            self._base = base_value(self._num, self._unit)
+            return self._base
+    base = property(get_base)
+    
+    def get_dimension(self):
+        """The dimension signature of this quantity's unit"""
+        return self._unit.dimension
+    dimension = property(get_dimension)
+    
     def _ensure_same_type(self, other):
         """docstring for ensure_same_type"""
         if not compatible(self.unit, other.unit):
@@ -39,13 +102,21 @@ class Quantity(object):
         else:
             return self
     
+    # Composed units are interned, so quantities in the same unit almost
+    # always share one unit object. The operators below check for that
+    # first and then work on the bare numbers.
+    
     def __add__(self, other):
-        self._ensure_same_type(other)
-        return Quantity(self.num + ((other.num * other.unit.squeeze()) / self.unit.squeeze()), self.unit)
+        if other.unit is self.unit:
+            return Quantity(self.num + other.num, self.unit)
+        (other_mult, self_mult) = multipliers(other.unit, self.unit)
+        return Quantity(self.num + ((other.num * other_mult) / self_mult), self.unit)
     
     def __sub__(self, other):
-        self._ensure_same_type(other)
-        return Quantity(self.num - other.num * other.unit.squeeze() / self.unit.squeeze(), self.unit)
+        if other.unit is self.unit:
+            return Quantity(self.num - other.num, self.unit)
+        (other_mult, self_mult) = multipliers(other.unit, self.unit)
+        return Quantity(self.num - other.num * other_mult / self_mult, self.unit)
     
     def __mul__(self, other):
         if hasattr(other, 'num'):
@@ -77,18 +148,33 @@ class Quantity(object):
     def __rdiv__(self, other):
         return Quantity(other / self.num, self.unit.invert())
     
+    # Quantities in different units compare by their magnitudes in leaf
+    # units, which are cached, so hashing agrees with equality.
+    
     def __eq__(self, other):
-        if not compatible(self.unit, other.unit):
+        if not hasattr(other, 'unit'):
+            # Let comparisons with None and the like fall back to identity.
+            return NotImplemented
+        if other.unit is self.unit:
+            return self.num == other.num
+        elif not compatible(self.unit, other.unit):
             return False
         else:
-            return cmp(self, other) == 0
+            return self.base == other.base
     
     def __ne__(self, other):
         return not self == other
     
+    def __hash__(self):
+        return hash((self.unit.dimension, self.base))
+    
     def __cmp__(self, other):
+        if not hasattr(other, 'unit'):
+            return NotImplemented
+        if other.unit is self.unit:
+            return cmp(self.num, other.num)
         self._ensure_same_type(other)
-        return cmp(self.num * self.unit.squeeze(), other.num * other.unit.squeeze())
+        return cmp(self.base, other.base)
     
     def __complex__(self):
         return complex(self.num)
@@ -0,0 +1,235 @@
+"""Quantity arrays are NumPy arrays of numbers with a single unit attached.
+Units are checked and conversion factors computed once per operation,
+not once per element. Requires NumPy.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> lengths = QuantityArray([1.0, 2.0, 3.0], unit('m'))
+>>> print(lengths + QuantityArray([50.0, 50.0, 50.0], unit('cm')))
+[1.5 2.5 3.5] m
+>>> print(lengths.sum())
+6.000000 m
+>>> print(unit('mm')(lengths))
+[1000. 2000. 3000.] millimetre
+"""
+
+from fractions import Fraction
+
+import numpy
+
+from units.compatibility import compatible
+from units.conversion import multipliers
+from units.quantity import Quantity
+
+class QuantityArray(Quantity):
+    """An array of numbers with one unit attached."""
+    
+    __slots__ = ()
+    
+    __hash__ = None
+    
+    def __init__(self, num, unit):
+        # pylint: disable-msg=W0231
+        self._num = numpy.asarray(num, dtype=numpy.float64)
+        self._unit = unit
+    
+    def _factor(self, other):
+        """The factor converting numbers in other's unit into this unit."""
+        (other_mult, self_mult) = multipliers(other.unit, self.unit)
+        return float(other_mult) / self_mult
+    
+    def to(self, unit):
+        """Convert this array into the given unit, in place unless its
+        numbers are read-only, as those read from a columnar file are.
+        Return self."""
+        (from_mult, to_mult) = multipliers(self.unit, unit)
+        factor = float(from_mult) / to_mult
+        if self._num.flags.writeable:
+            self._num *= factor
+        else:
+            self._num = self._num * factor
+        self._unit = unit
+        return self
+    
+    def isclose(self, other, rtol=1e-05, atol=1e-08):
+        """Elementwise closeness to another quantity or quantity array,
+        with tolerances in this array's unit. See numpy.isclose.
+        """
+        return numpy.isclose(self.num, other.num * self._factor(other), rtol=rtol, atol=atol)
+    
+    def _wrap(self, num):
+        """Attach this array's unit to num, an array or a scalar."""
+        if numpy.ndim(num):
+            return QuantityArray(num, self.unit)
+        return Quantity(num.item(), self.unit)
+    
+    def sum(self, axis=None, **kwargs):
+        """The sum of the elements as a Quantity."""
+        return self._wrap(self.num.sum(axis=axis, **kwargs))
+    
+    def mean(self, axis=None, **kwargs):
+        """The mean of the elements as a Quantity."""
+        return self._wrap(self.num.mean(axis=axis, **kwargs))
+    
+    def min(self, axis=None, **kwargs):
+        """The smallest element as a Quantity."""
+        return self._wrap(self.num.min(axis=axis, **kwargs))
+    
+    def max(self, axis=None, **kwargs):
+        """The largest element as a Quantity."""
+        return self._wrap(self.num.max(axis=axis, **kwargs))
+    
+    def __len__(self):
+        return len(self.num)
+    
+    def __iter__(self):
+        for num in self.num:
+            yield Quantity(num.item(), self.unit)
+    
+    def __getitem__(self, index):
+        return self._wrap(self.num[index])
+    
+    def __setitem__(self, index, value):
+        self._num[index] = value.num * self._factor(value)
+    
+    def __abs__(self):
+        return QuantityArray(numpy.absolute(self.num), self.unit)
+    
+    def __neg__(self):
+        return QuantityArray(-self.num, self.unit)
+    
+    def __pos__(self):
+        return QuantityArray(+self.num, self.unit)
+    
+    def __nonzero__(self):
+        # Like NumPy, raises ValueError for more than one element.
+        return bool(self.num)
+    __bool__ = __nonzero__
+    
+    def __add__(self, other):
+        if not hasattr(other, 'unit'):
+            return NotImplemented
+        return QuantityArray(self.num + other.num * self._factor(other), self.unit)
+    
+    def __radd__(self, other):
+        if not hasattr(other, 'unit'):
+            return NotImplemented
+        return QuantityArray(other.num + self.num / self._factor(other), other.unit)
+    
+    def __sub__(self, other):
+        if not hasattr(other, 'unit'):
+            return NotImplemented
+        return QuantityArray(self.num - other.num * self._factor(other), self.unit)
+    
+    def __rsub__(self, other):
+        if not hasattr(other, 'unit'):
+            return NotImplemented
+        return QuantityArray(other.num - self.num / self._factor(other), other.unit)
+    
+    def __mul__(self, other):
+        if hasattr(other, 'unit'):
+            return make(self.num * other.num, self.unit * other.unit)
+        return QuantityArray(self.num * other, self.unit)
+    
+    def __rmul__(self, other):
+        if hasattr(other, 'unit'):
+            return make(other.num * self.num, other.unit * self.unit)
+        return QuantityArray(other * self.num, self.unit)
+    
+    def __div__(self, other):
+        if hasattr(other, 'unit'):
+            return make(self.num / other.num, self.unit / other.unit)
+        return QuantityArray(self.num / other, self.unit)
+    __truediv__ = __div__
+    
+    def __rdiv__(self, other):
+        if hasattr(other, 'unit'):
+            return make(other.num / self.num, other.unit / self.unit)
+        return QuantityArray(other / self.num, self.unit.invert())
+    __rtruediv__ = __rdiv__
+    
+    def __pow__(self, exponent):
+        return make(self.num ** float(exponent), self.unit ** exponent)
+    
+    def _compare(self, other, compare):
+        """Compare elementwise in this array's unit."""
+        return compare(self.num, other.num * self._factor(other))
+    
+    def __lt__(self, other):
+        return self._compare(other, numpy.less)
+    
+    def __le__(self, other):
+        return self._compare(other, numpy.less_equal)
+    
+    def __gt__(self, other):
+        return self._compare(other, numpy.greater)
+    
+    def __ge__(self, other):
+        return self._compare(other, numpy.greater_equal)
+    
+    def __eq__(self, other):
+        if not hasattr(other, 'unit') or not compatible(self.unit, other.unit):
+            return numpy.zeros(self.num.shape, dtype=bool)
+        return self._compare(other, numpy.equal)
+    
+    def __ne__(self, other):
+        return ~(self == other)
+    
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Let NumPy functions such as numpy.add or numpy.sqrt act on
+        quantity arrays by delegating to the unit-aware operators."""
+        if kwargs.get('out') is not None:
+            return NotImplemented
+        
+        if method == '__call__':
+            if ufunc in UNARY_UFUNCS and len(inputs) == 1:
+                return UNARY_UFUNCS[ufunc](self)
+            elif ufunc in BINARY_UFUNCS and len(inputs) == 2:
+                (name, reflected) = BINARY_UFUNCS[ufunc]
+                if inputs[0] is self:
+                    return getattr(self, name)(inputs[1])
+                else:
+                    return getattr(self, reflected)(inputs[0])
+        elif method == 'reduce' and ufunc in REDUCERS and inputs[0] is self:
+            return getattr(self, REDUCERS[ufunc])(axis=kwargs.get('axis', 0))
+        
+        return NotImplemented
+    
+    def __str__(self):
+        return '%(num)s %(unit)s' % {'num': self.num, 'unit': self.unit}
+
+def make(num, unit):
+    """Attach unit to the array num, unless the unit has unboxed
+    into a plain number."""
+    if hasattr(unit, 'squeeze'):
+        return QuantityArray(num, unit)
+    else:
+        return num * unit
+
+UNARY_UFUNCS = {
+    numpy.negative: QuantityArray.__neg__,
+    numpy.absolute: QuantityArray.__abs__,
+    numpy.sqrt: lambda array: array ** Fraction(1, 2),
+    numpy.square: lambda array: array ** 2,
+}
+
+BINARY_UFUNCS = {
+    numpy.add: ('__add__', '__radd__'),
+    numpy.subtract: ('__sub__', '__rsub__'),
+    numpy.multiply: ('__mul__', '__rmul__'),
+    numpy.divide: ('__div__', '__rdiv__'),
+    numpy.true_divide: ('__truediv__', '__rtruediv__'),
+    numpy.less: ('__lt__', '__gt__'),
+    numpy.less_equal: ('__le__', '__ge__'),
+    numpy.greater: ('__gt__', '__lt__'),
+    numpy.greater_equal: ('__ge__', '__le__'),
+    numpy.equal: ('__eq__', '__eq__'),
+    numpy.not_equal: ('__ne__', '__ne__'),
+}
+
+REDUCERS = {
+    numpy.add: 'sum',
+    numpy.minimum: 'min',
+    numpy.maximum: 'max',
+}
@@ -0,0 +1,372 @@
+"""Streaming reductions over iterables of quantities.
+
+Each reducer converts the quantities it is given into one unit, its
+output unit, and accumulates plain floats, so reducing a million
+quantities makes no intermediate Quantity objects. The conversion
+factor, and with it the compatibility check, is worked out once for
+each distinct unit seen. The output unit is the one asked for, or else
+the unit of the first quantity.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> legs = [unit('km')(1.5), unit('m')(250.0), unit('mi')(1.0)]
+>>> print(total(legs, 'm'))
+3359.344000 m
+>>> print(mean(legs, 'm'))
+1119.781333 m
+>>> median = quantile(legs, 0.5, 'm')
+>>> abs(median.num - 1500.0) <= 15.0
+True
+
+The reducers are also classes that can be fed in pieces and merged, for
+instance to combine partial results computed in other processes:
+
+>>> morning = Moments('m').update(legs[:2])
+>>> evening = Moments('km').update(legs[2:])
+>>> print(morning.merge(evening).mean())
+1119.781333 m
+"""
+
+from math import ceil, isnan, log, sqrt
+
+from units import unit as find_unit
+from units.conversion import multipliers
+from units.quantity import Quantity
+
+class Reducer(object):
+    """The common part of the reducers: converting quantities into the
+    output unit, given as a unit or unit specifier."""
+    
+    def __init__(self, unit=None):
+        if unit is not None and not hasattr(unit, 'squeeze'):
+            unit = find_unit(unit)
+        self.unit = unit
+        self.count = 0
+        self._factors = {}
+    
+    def factor(self, unit):
+        """The factor converting numbers in unit into the output unit.
+        The first unit seen becomes the output unit if there is none."""
+        try:
+            return self._factors[unit]
+        except KeyError:
+            if self.unit is None:
+                self.unit = unit
+            (from_mult, to_mult) = multipliers(unit, self.unit)
+            factor = self._factors[unit] = float(from_mult) / to_mult
+            return factor
+    
+    def values(self, quantities):
+        """Generate the numbers of quantities in the output unit."""
+        factors = self._factors
+        for quantity in quantities:
+            unit = quantity.unit
+            if unit in factors:
+                yield quantity.num * factors[unit]
+            else:
+                yield quantity.num * self.factor(unit)
+    
+    def add_value(self, value):
+        """Accumulate a number in the output unit."""
+        raise NotImplementedError
+    
+    def add(self, quantity):
+        """Accumulate one quantity. Return self."""
+        self.add_value(quantity.num * self.factor(quantity.unit))
+        return self
+    
+    def update(self, quantities):
+        """Accumulate an iterable of quantities. Return self."""
+        add_value = self.add_value
+        for value in self.values(quantities):
+            add_value(value)
+        return self
+    
+    def _merge_factor(self, other):
+        """The factor converting other's accumulated numbers into this
+        reducer's output unit."""
+        if other.unit is None or other.unit is self.unit:
+            return 1.0
+        return self.factor(other.unit)
+    
+    def _check_nonempty(self):
+        """Raise ValueError if nothing has been accumulated."""
+        if not self.count:
+            raise ValueError('Cannot reduce an empty sequence')
+
+class Sum(Reducer):
+    """The sum, with Neumaier's compensated summation, so that the
+    rounding errors of the additions do not pile up."""
+    
+    def __init__(self, unit=None):
+        super(Sum, self).__init__(unit)
+        self.total = 0.0
+        self.compensation = 0.0
+    
+    def add_value(self, value):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+        self.count += 1
+    
+    def update(self, quantities):
+        # The same as add_value(), inlined.
+        (total, compensation, count) = (self.total, self.compensation, self.count)
+        for value in self.values(quantities):
+            new_total = total + value
+            if abs(total) >= abs(value):
+                compensation += (total - new_total) + value
+            else:
+                compensation += (value - new_total) + total
+            total = new_total
+            count += 1
+        (self.total, self.compensation, self.count) = (total, compensation, count)
+        return self
+    
+    def merge(self, other):
+        """Add in another Sum. Return self."""
+        factor = self._merge_factor(other)
+        count = self.count + other.count
+        self.add_value(other.total * factor)
+        self.add_value(other.compensation * factor)
+        self.count = count
+        return self
+    
+    def result(self):
+        """The sum as a Quantity. The sum of nothing is zero, if there
+        is an output unit."""
+        if self.unit is None:
+            self._check_nonempty()
+        return Quantity(self.total + self.compensation, self.unit)
+
+class Moments(Reducer):
+    """The count, mean and variance, updated online with Welford's
+    method. Merging uses the pairwise update of Chan et al."""
+    
+    def __init__(self, unit=None):
+        super(Moments, self).__init__(unit)
+        self._mean = 0.0
+        self._squares = 0.0
+    
+    def add_value(self, value):
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._squares += delta * (value - self._mean)
+    
+    def merge(self, other):
+        """Add in another Moments. Return self."""
+        if not other.count:
+            return self
+        factor = self._merge_factor(other)
+        (other_mean, other_squares) = (other._mean * factor, other._squares * factor * factor)
+        count = self.count + other.count
+        delta = other_mean - self._mean
+        self._mean += delta * other.count / count
+        self._squares += other_squares + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+    
+    def mean(self):
+        """The mean as a Quantity."""
+        self._check_nonempty()
+        return Quantity(self._mean, self.unit)
+    
+    def variance(self, ddof=0):
+        """The variance as a Quantity in the square of the output unit.
+        ddof=1 gives the sample variance."""
+        if self.count <= ddof:
+            raise ValueError('Too few quantities for a variance')
+        return Quantity(self._squares / (self.count - ddof), self.unit ** 2)
+    
+    def stdev(self, ddof=0):
+        """The standard deviation as a Quantity."""
+        if self.count <= ddof:
+            raise ValueError('Too few quantities for a variance')
+        return Quantity(sqrt(self._squares / (self.count - ddof)), self.unit)
+    
+    result = mean
+
+class Extrema(Reducer):
+    """The smallest and largest quantities."""
+    
+    def __init__(self, unit=None):
+        super(Extrema, self).__init__(unit)
+        self.low = None
+        self.high = None
+    
+    def add_value(self, value):
+        if self.count == 0:
+            self.low = self.high = value
+        elif value < self.low:
+            self.low = value
+        elif value > self.high:
+            self.high = value
+        self.count += 1
+    
+    def merge(self, other):
+        """Add in another Extrema. Return self."""
+        if other.count:
+            factor = self._merge_factor(other)
+            count = self.count + other.count
+            self.add_value(other.low * factor)
+            self.add_value(other.high * factor)
+            self.count = count
+        return self
+    
+    def minimum(self):
+        """The smallest quantity."""
+        self._check_nonempty()
+        return Quantity(self.low, self.unit)
+    
+    def maximum(self):
+        """The largest quantity."""
+        self._check_nonempty()
+        return Quantity(self.high, self.unit)
+    
+    def result(self):
+        """The smallest and the largest quantity."""
+        return (self.minimum(), self.maximum())
+
+class QuantileSketch(Reducer):
+    """A mergeable sketch of the distribution, from which quantiles can
+    be read with a relative error of at most relative_accuracy.
+    
+    This is the DDSketch of Masson, Rim and Lee: numbers are counted in
+    buckets whose bounds grow geometrically, so the sketch stays small
+    however many numbers it sees, and merging two sketches adds up their
+    buckets.
+    """
+    
+    def __init__(self, unit=None, relative_accuracy=0.01):
+        super(QuantileSketch, self).__init__(unit)
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('The relative accuracy must be between 0 and 1')
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.low = None
+        self.high = None
+    
+    def add_value(self, value):
+        self._insert(value, 1)
+        if self.count == 0 or value < self.low:
+            self.low = value
+        if self.count == 0 or value > self.high:
+            self.high = value
+        self.count += 1
+    
+    def _insert(self, value, count):
+        """Count a number in the output unit in its bucket, count times."""
+        if value > 0:
+            key = int(ceil(log(value) / self._log_gamma))
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif value < 0:
+            key = int(ceil(log(-value) / self._log_gamma))
+            self.negative[key] = self.negative.get(key, 0) + count
+        elif isnan(value):
+            raise ValueError('Cannot sketch NaN')
+        else:
+            self.zeros += count
+    
+    def _bucket_value(self, key):
+        """The number standing for the bucket with the given key."""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+    
+    def merge(self, other):
+        """Add in another QuantileSketch with the same relative accuracy.
+        If it has another output unit, its buckets are converted one by
+        one, which can add up to the relative accuracy to the error.
+        Return self."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches of different accuracies')
+        if not other.count:
+            return self
+        factor = self._merge_factor(other)
+        if factor == 1.0:
+            for (buckets, others) in [(self.positive, other.positive), (self.negative, other.negative)]:
+                for (key, count) in others.items():
+                    buckets[key] = buckets.get(key, 0) + count
+            self.zeros += other.zeros
+        else:
+            for (key, count) in other.positive.items():
+                self._insert(other._bucket_value(key) * factor, count)
+            for (key, count) in other.negative.items():
+                self._insert(-other._bucket_value(key) * factor, count)
+            self.zeros += other.zeros
+        
+        (low, high) = (other.low * factor, other.high * factor)
+        if self.count:
+            (low, high) = (min(self.low, low), max(self.high, high))
+        (self.low, self.high) = (low, high)
+        self.count += other.count
+        return self
+    
+    def quantile(self, fraction):
+        """The quantity that the given fraction of the quantities, from
+        0 to 1, are less than or equal to."""
+        self._check_nonempty()
+        if not 0 <= fraction <= 1:
+            raise ValueError('Quantiles are fractions from 0 to 1')
+        # The extremes are known exactly.
+        if fraction == 0:
+            return Quantity(self.low, self.unit)
+        elif fraction == 1:
+            return Quantity(self.high, self.unit)
+        rank = fraction * (self.count - 1)
+        seen = 0
+        value = None
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                value = -self._bucket_value(key)
+                break
+        else:
+            seen += self.zeros
+            if seen > rank:
+                value = 0.0
+            else:
+                for key in sorted(self.positive):
+                    seen += self.positive[key]
+                    if seen > rank:
+                        value = self._bucket_value(key)
+                        break
+        if value is None:
+            value = self.high
+        return Quantity(max(self.low, min(self.high, value)), self.unit)
+    
+    def result(self):
+        """The median."""
+        return self.quantile(0.5)
+
+def total(quantities, unit=None):
+    """The compensated sum of an iterable of quantities, in unit."""
+    return Sum(unit).update(quantities).result()
+
+def mean(quantities, unit=None):
+    """The mean of an iterable of quantities, in unit."""
+    return Moments(unit).update(quantities).mean()
+
+def variance(quantities, unit=None, ddof=0):
+    """The variance of an iterable of quantities, in unit squared."""
+    return Moments(unit).update(quantities).variance(ddof)
+
+def stdev(quantities, unit=None, ddof=0):
+    """The standard deviation of an iterable of quantities, in unit."""
+    return Moments(unit).update(quantities).stdev(ddof)
+
+def extrema(quantities, unit=None):
+    """The smallest and largest of an iterable of quantities, in unit."""
+    return Extrema(unit).update(quantities).result()
+
+def quantile(quantities, fraction, unit=None, relative_accuracy=0.01):
+    """An approximate quantile of an iterable of quantities, in unit.
+    See QuantileSketch."""
+    return QuantileSketch(unit, relative_accuracy).update(quantities).quantile(fraction)
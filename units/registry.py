@@ -1,3 +1,314 @@
-"""Global registry mapping unit specifiers to unit objects."""
+"""Registries mapping unit specifiers to unit objects.
 
-REGISTRY = {}
+REGISTRY is the global registry. Independent registries can be made
+with Registry() and made active for the current thread with using(), so
+that unit() and unit definitions go to them instead. A registry can
+have a parent, such as a frozen registry of the predefined units, whose
+units it finds but never changes.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> base = Registry()
+>>> with using(base):
+...     define_units()
+>>> base.freeze()
+>>> tenant = Registry(parent=base)
+>>> with using(tenant):
+...     blog = unit('blog')
+...     unit('m') is base['m']
+True
+>>> 'blog' in tenant and 'blog' not in base
+True
+"""
+
+import threading
+import weakref
+from contextlib import contextmanager
+
+from units.cache import LRUCache
+from units.exception import RegistryFrozenError
+
+class Registry(dict):
+    """A dict of unit specifiers to units that counts its changes, so
+    caches derived from it can tell when they have gone stale.
+    
+    Units can also be provided lazily: a loader registered for some
+    specifiers is run the first time one of them is looked up.
+    
+    The registry also keeps prefix_index, which maps every SI-prefixed
+    form of every SI unit in it, such as 'km', to a (prefix, base
+    specifier) pair. It is kept up to date as SI units are defined.
+    
+    Units are only ever defined in the registry itself, never in its
+    parent; defining a unit the parent has shadows the parent's unit.
+    Each registry keeps its own caches of parsed unit expressions and of
+    conversion multipliers. A change to a registry also counts as a
+    change to the registries that have it as their parent.
+    
+    Reads are plain dict lookups and never lock. Changes are serialized
+    by a lock, and register() defines a unit at most once however many
+    threads ask for it at the same time. Once freeze() is called, units
+    can no longer be defined, redefined or removed, except that prefixed
+    forms of SI units are still made on demand.
+    """
+    
+    def __init__(self, parent=None):
+        super(Registry, self).__init__()
+        self.parent = parent
+        self.parsed = LRUCache(maxsize=1024)
+        self.factors = LRUCache(maxsize=4096)
+        self.version = 0
+        self._children = []
+        if parent is not None:
+            parent._adopt(self)
+        self.providers = {}
+        self.prefix_index = {}
+        self._indexed = set()
+        self.frozen = False
+        self._lock = threading.RLock()
+    
+    def find(self, specifier):
+        """Return the unit registered under specifier here or in a
+        parent registry, or None."""
+        unit = self.get(specifier)
+        if unit is None and self.parent is not None:
+            return self.parent.find(specifier)
+        return unit
+    
+    def register(self, specifier, create):
+        """Return the unit registered under specifier. If there is none,
+        call create() to make one and register it. Only one thread at a
+        time creates units, so concurrent callers get the same unit."""
+        unit = self.get(specifier)
+        if unit is not None:
+            return unit
+        self._lock.acquire()
+        try:
+            unit = self.get(specifier)
+            if unit is None:
+                unit = create()
+                self[specifier] = unit
+            return unit
+        finally:
+            self._lock.release()
+    
+    def freeze(self):
+        """Forbid any further changes to the units in the registry. Units
+        still provided lazily are loaded first, and expressions parsed
+        before the last change are dropped from the cache."""
+        self._lock.acquire()
+        try:
+            while self.providers:
+                self.load(iter(self.providers).next())
+            self.parsed.clear()
+            self.frozen = True
+        finally:
+            self._lock.release()
+    
+    def thaw(self):
+        """Allow changes again after freeze()."""
+        self._lock.acquire()
+        try:
+            self.frozen = False
+            self.changed()
+        finally:
+            self._lock.release()
+    
+    def redefine(self, specifier, change):
+        """Call change() to redefine the unit registered under specifier
+        in place, holding the lock. Raise RegistryFrozenError instead if
+        the registry is frozen."""
+        self._lock.acquire()
+        try:
+            self.check_frozen(specifier)
+            change()
+            self.changed()
+        finally:
+            self._lock.release()
+    
+    def check_frozen(self, specifier=None):
+        """Raise RegistryFrozenError if the registry is frozen."""
+        if self.frozen:
+            if specifier is None:
+                raise RegistryFrozenError('The registry is frozen')
+            raise RegistryFrozenError('Cannot define %s: the registry is frozen' % specifier)
+    
+    def index(self, unit):
+        """Add the prefixed forms of unit to the prefix index, if it is an
+        SI unit. Units call this once they are defined.
+        
+        Where one string is a prefixed form of two units, such as 'dam'
+        for 'm' and an SI unit called 'am', the unit with the longer
+        specifier wins, whichever was defined first.
+        """
+        if not unit.is_si():
+            if unit.specifier in self._indexed:
+                # An SI unit was redefined as a non-SI one.
+                self.reindex()
+            return
+        # Imported here because units.si needs the registry itself.
+        from units.si import PREFIXES
+        base = unit.specifier
+        self._indexed.add(base)
+        for prefix in PREFIXES:
+            current = self.prefix_index.get(prefix + base)
+            if current is None or len(current[1]) < len(base):
+                self.prefix_index[prefix + base] = (prefix, base)
+    
+    def reindex(self):
+        """Rebuild the prefix index from scratch."""
+        self.prefix_index.clear()
+        self._indexed.clear()
+        for unit in self.values():
+            if hasattr(unit, 'is_si'):
+                self.index(unit)
+    
+    def resolve(self, specifier):
+        """Return the (prefix, base specifier) pair that specifier is an
+        SI-prefixed form of here or in a parent registry, or None."""
+        pair = self.prefix_index.get(specifier)
+        if pair is None and self.parent is not None:
+            return self.parent.resolve(specifier)
+        return pair
+    
+    def changed(self):
+        """Note a change to the registry or to a unit in it that can make
+        caches derived from it stale: a unit redefined or removed, rather
+        than a new one defined. Empties the conversion cache, and passes
+        the change on to child registries."""
+        self.version += 1
+        self.factors.clear()
+        for child in self.children():
+            child.changed()
+    
+    def children(self):
+        """The registries alive that have this one as their parent."""
+        children = [child() for child in self._children]
+        return [child for child in children if child is not None]
+    
+    def _adopt(self, child):
+        """Keep a weak reference to a new child registry, dropping
+        references to children that are gone."""
+        self._lock.acquire()
+        try:
+            self._children = [weakref.ref(child) for child in self.children() + [child]]
+        finally:
+            self._lock.release()
+    
+    def provide(self, specifiers, loader):
+        """Arrange for loader() to be called to define the given
+        specifiers when one of them is first loaded."""
+        self.check_frozen()
+        for specifier in specifiers:
+            self.providers[specifier] = loader
+    
+    def withdraw(self, specifiers):
+        """Forget any loaders for the given specifiers."""
+        for specifier in specifiers:
+            self.providers.pop(specifier, None)
+    
+    def load(self, specifier):
+        """Run the loader providing specifier, if there is one, with this
+        registry active. Return whether a loader ran."""
+        self._lock.acquire()
+        try:
+            loader = self.providers.get(specifier)
+            if loader is None:
+                return False
+            with using(self):
+                loader()
+            self.withdraw([specifier])
+            return True
+        finally:
+            self._lock.release()
+    
+    def __setitem__(self, key, value):
+        self._lock.acquire()
+        try:
+            if key not in self.prefix_index:
+                self.check_frozen(key)
+            # Defining a new unit cannot change what any specifier looked
+            # up so far means, unless it replaces or shadows one.
+            redefined = key in self or (self.parent is not None and self.parent.find(key) is not None)
+            super(Registry, self).__setitem__(key, value)
+            if redefined:
+                self.changed()
+        finally:
+            self._lock.release()
+    
+    def __delitem__(self, key):
+        self.pop(key)
+    
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self.check_frozen()
+            super(Registry, self).clear()
+            self.providers.clear()
+            self.prefix_index.clear()
+            self._indexed.clear()
+            self.changed()
+        finally:
+            self._lock.release()
+    
+    def pop(self, *args):
+        self._lock.acquire()
+        try:
+            self.check_frozen()
+            result = super(Registry, self).pop(*args)
+            self.reindex()
+            self.changed()
+            return result
+        finally:
+            self._lock.release()
+    
+    def popitem(self):
+        self._lock.acquire()
+        try:
+            self.check_frozen()
+            result = super(Registry, self).popitem()
+            self.reindex()
+            self.changed()
+            return result
+        finally:
+            self._lock.release()
+    
+    def setdefault(self, key, default=None):
+        return self.register(key, lambda: default)
+    
+    def update(self, *args, **kwargs):
+        self._lock.acquire()
+        try:
+            self.check_frozen()
+            super(Registry, self).update(*args, **kwargs)
+            self.reindex()
+            self.changed()
+        finally:
+            self._lock.release()
+
+REGISTRY = Registry()
+
+class ActiveRegistry(threading.local):
+    """Per-thread record of the registry selected with using()."""
+    registry = None
+
+LOCAL = ActiveRegistry()
+
+def active():
+    """Return the registry active in this thread: the innermost one
+    selected with using(), or else REGISTRY."""
+    registry = LOCAL.registry
+    if registry is None:
+        return REGISTRY
+    return registry
+
+@contextmanager
+def using(registry):
+    """Make registry the active one in this thread for the duration of
+    a with block."""
+    previous = LOCAL.registry
+    LOCAL.registry = registry
+    try:
+        yield registry
+    finally:
+        LOCAL.registry = previous
@@ -2,7 +2,7 @@
 encodes logic to handle these PREFIXES and create SI units."""
 
 from __init__ import scaled_unit
-from units.registry import REGISTRY
+from units.registry import active
 
 PREFIXES = {
     'Y' : {'prefix': 'yotta', 'multiplier': 10 ** 24},
@@ -41,20 +41,15 @@ def without_prefix(unit_str):
         return unit_str[1:]
 
 def can_make(unit_str):
-    """True if the given unit string represents an SI unit."""
-    if prefixed(unit_str):
-        unit = REGISTRY.get(without_prefix(unit_str), None)
-        if unit:
-            return unit.is_si()
-    return False
+    """True if the given unit string is an SI prefix followed by the
+    specifier of a registered SI unit."""
+    return active().resolve(unit_str) is not None
 
 def prefixed_unit(unit_str):
     """Create a unit object from the given SI-unit string."""
-    base_unit = REGISTRY[without_prefix(unit_str)]
+    registry = active()
+    (prefix_str, base_str) = registry.resolve(unit_str)
+    base_unit = registry.find(base_str)
+    prefix = PREFIXES[prefix_str]
     
-    if unit_str[0:2] in PREFIXES:
-        prefix = PREFIXES[unit_str[0:2]]
-    else:
-        prefix = PREFIXES[unit_str[0]]
-        
-    return scaled_unit(unit_str, base_unit.name, multiplier=prefix['multiplier'], name='%s%s' % (prefix['prefix'], base_unit.name))
\ No newline at end of file
+    return scaled_unit(unit_str, base_unit.specifier, multiplier=prefix['multiplier'], name='%s%s' % (prefix['prefix'], base_unit.name))
\ No newline at end of file
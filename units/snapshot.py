@@ -0,0 +1,154 @@
+"""Save the registry to a compact binary snapshot and load it back, so a
+fresh process can skip running its unit definitions.
+
+A snapshot holds every registered leaf unit and every named unit, with
+each named unit flattened to its exponents over leaf units, its
+multiplier and its exact factor to the leaf units. It is stamped with a
+hash of the source code of the definitions it was made from, and
+loading a snapshot made from other definitions raises SnapshotError.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> data = dumps()
+>>> REGISTRY.clear()
+>>> loads(data)
+>>> unit('mi').squeeze()
+1609.344
+
+Most programs want load_or_define(), which loads a snapshot if there is
+a fresh one and otherwise runs the definitions and saves one.
+"""
+
+import hashlib
+import inspect
+import marshal
+import struct
+import sys
+import zlib
+from fractions import Fraction
+
+import units
+import units.predefined
+from units.composed_unit import compose
+from units.exception import SnapshotError
+from units.leaf_unit import LeafUnit
+from units.named_composed_unit import NamedComposedUnit
+from units.registry import REGISTRY, active
+
+MAGIC = 'UNITSNAP'
+FORMAT = 2
+HEADER = struct.Struct('<8sH20s')
+
+def definition_hash(sources=None):
+    """Hash the source code of the given modules or functions, which
+    define the units in the registry. Defaults to units.predefined."""
+    if sources is None:
+        sources = [units.predefined]
+    digest = hashlib.sha1()
+    digest.update('%s %s %s' % (FORMAT, units.__version__, sys.version_info[0]))
+    for source in sources:
+        text = inspect.getsource(source)
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        digest.update(text)
+    return digest.digest()
+
+def encode_exponent(exponent):
+    """A Fraction or integer exponent as a (numerator, denominator) pair."""
+    exponent = Fraction(exponent)
+    return (exponent.numerator, exponent.denominator)
+
+def decode_exponent(numerator, denominator):
+    """The inverse of encode_exponent."""
+    if denominator == 1:
+        return numerator
+    return Fraction(numerator, denominator)
+
+def dumps(sources=None):
+    """Return a snapshot of the active registry as bytes. sources
+    are the modules or functions that defined its units."""
+    leaves = []
+    leaf_index = {}
+    named = []
+    
+    registry = active()
+    for (specifier, registered) in sorted(registry.items()):
+        if isinstance(registered, LeafUnit):
+            leaf_index[registered] = len(leaves)
+            leaves.append((specifier, registered.symbal, registered.name, registered.is_si()))
+    
+    for (specifier, registered) in sorted(registry.items()):
+        if isinstance(registered, NamedComposedUnit):
+            try:
+                exponents = tuple([(leaf_index[leaf],) + encode_exponent(exponent)
+                                   for (leaf, exponent) in registered.dimension])
+            except KeyError:
+                raise SnapshotError('%s is made of unregistered units' % specifier)
+            named.append((specifier, registered.symbal, registered.name, registered.is_si(),
+                          exponents, registered.squeeze(), encode_exponent(registered.factor)))
+        elif not isinstance(registered, LeafUnit):
+            raise SnapshotError('Cannot snapshot %r' % (registered,))
+    
+    body = zlib.compress(marshal.dumps((leaves, named), 2))
+    return HEADER.pack(MAGIC, FORMAT, definition_hash(sources)) + body
+
+def loads(data, sources=None):
+    """Define the units in a snapshot made by dumps() in the active
+    registry. sources must be the modules or functions the snapshot was
+    made from, unchanged."""
+    if len(data) < HEADER.size:
+        raise SnapshotError('Truncated snapshot')
+    (magic, file_format, digest) = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC or file_format != FORMAT:
+        raise SnapshotError('Not a version %d unit snapshot' % FORMAT)
+    if digest != definition_hash(sources):
+        raise SnapshotError('Snapshot is stale: the unit definitions have changed')
+    
+    try:
+        (leaves, named) = marshal.loads(zlib.decompress(data[HEADER.size:]))
+    except (ValueError, EOFError, TypeError, zlib.error):
+        raise SnapshotError('Corrupt snapshot')
+    
+    leaf_units = [LeafUnit(specifier, symbal, name, is_si)
+                  for (specifier, symbal, name, is_si) in leaves]
+    
+    for (specifier, symbal, name, is_si, exponents, multiplier, factor) in named:
+        composed = compose(dict([(leaf_units[index], decode_exponent(numerator, denominator))
+                                 for (index, numerator, denominator) in exponents]),
+                           multiplier)
+        NamedComposedUnit(specifier, composed, symbal, name, is_si, Fraction(*factor))
+
+def save(path, sources=None):
+    """Write a snapshot of the registry to the file at path."""
+    snapshot = open(path, 'wb')
+    try:
+        snapshot.write(dumps(sources))
+    finally:
+        snapshot.close()
+
+def load(path, sources=None):
+    """Define the units in the snapshot file at path."""
+    snapshot = open(path, 'rb')
+    try:
+        data = snapshot.read()
+    finally:
+        snapshot.close()
+    loads(data, sources)
+
+def load_or_define(path, define=None, sources=None):
+    """Load the snapshot at path if it exists and is fresh. Otherwise,
+    call define() and save a new snapshot to path. define defaults to
+    units.predefined.define_units. Return whether a snapshot was loaded.
+    """
+    try:
+        load(path, sources)
+        return True
+    except (IOError, SnapshotError):
+        pass
+    
+    if define is None:
+        define = units.predefined.define_units
+    define()
+    save(path, sources)
+    return False
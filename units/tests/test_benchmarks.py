@@ -0,0 +1,48 @@
+"""Tests for the benchmark suite runner."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import json
+
+from units.benchmarks.suite import compare, main, run
+from units.registry import REGISTRY
+
+def test_run_filtered():
+    """Only matching benchmarks run, with float overheads where known."""
+    results = run('quantity.add.same', budget=0.001)
+    assert list(results) == ['quantity.add.same']
+    assert results['quantity.add.same']['overhead'] > 1
+    
+    results = run('memory.Quantity', budget=0.001)
+    assert sorted(results) == ['memory.Quantity', 'memory.Quantity with __dict__']
+    
+    results = run('__dict__', budget=0.001)
+    assert list(results) == ['memory.Quantity with __dict__']
+
+def test_compare():
+    """Slowdowns beyond the threshold are regressions."""
+    baseline = {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}, 'c': {'bytes': 10.0}}
+    results = {'a': {'seconds': 1.2}, 'b': {'seconds': 1.5}, 'c': {'bytes': 20.0},
+               'd': {'seconds': 9.0}}
+    assert compare(results, baseline) == [('b', 1.0, 1.5, 1.5), ('c', 10.0, 20.0, 2.0)]
+
+def test_main(tmpdir):
+    """The runner writes JSON and fails on regressions."""
+    output = str(tmpdir.join('results.json'))
+    assert main(['-k', 'lookup.hit', '--budget', '0.001', '-o', output]) == 0
+    report = json.load(open(output))
+    assert 'lookup.hit' in report['results']
+    
+    report['results']['lookup.hit']['seconds'] /= 100
+    json.dump(report, open(output, 'w'))
+    assert main(['-k', 'lookup.hit', '--budget', '0.001', '-b', output]) == 1
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,91 @@
+"""Tests for memory-mapped columnar quantity files."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+numpy = py.test.importorskip('numpy')
+
+from units import unit
+from units.predefined import define_units
+from units.registry import REGISTRY
+from units.columnar import ColumnFile, write
+from units.quantity_array import QuantityArray
+
+def write_sample(tmpdir, rows=10000):
+    """Write a file with float, fixed-point and delta-encoded columns."""
+    path = str(tmpdir.join('sample.ucol'))
+    times = numpy.arange(rows) * 0.25 + 1000.0
+    write(path, [('time', QuantityArray(times, unit('s'))),
+                 ('speed', QuantityArray(numpy.sin(times), unit('km') / unit('h'))),
+                 ('depth', QuantityArray(numpy.arange(rows) * 0.01, unit('m')))],
+          scales={'time': 0.001, 'depth': 0.001}, delta=['time'])
+    return (path, times)
+
+def test_round_trip(tmpdir):
+    """Each encoding reads back the written values."""
+    (path, times) = write_sample(tmpdir)
+    columns = ColumnFile(path)
+    assert len(columns) == 10000
+    assert columns.names == ['time', 'speed', 'depth']
+    assert numpy.allclose(columns['time'].array().num, times)
+    assert numpy.array_equal(columns['speed'].array().num, numpy.sin(times))
+    assert numpy.allclose(columns['depth'].array().num, numpy.arange(10000) * 0.01)
+    assert columns['speed'].unit is unit('km') / unit('h')
+
+def test_slices(tmpdir):
+    """Slices and items decode correctly, across delta blocks too."""
+    (path, times) = write_sample(tmpdir)
+    time = ColumnFile(path)['time']
+    assert numpy.allclose(time[4090:4200].num, times[4090:4200])
+    assert numpy.allclose(time[8191:].num, times[8191:])
+    assert numpy.allclose(time[::1000].num, times[::1000])
+    for name in ['time', 'speed', 'depth']:
+        column = ColumnFile(path)[name]
+        expected = column.array().num
+        for index in [slice(4, 1, -1), slice(None, None, -3), slice(-2, None, -4097),
+                      slice(5, 9, -1), slice(-3, -1)]:
+            assert numpy.array_equal(column[index].num, expected[index])
+    assert time[-1] == unit('s')(times[-1])
+    py.test.raises(IndexError, time.__getitem__, 10000)
+
+def test_views(tmpdir):
+    """Float64 columns are read-only views of the mapped file."""
+    (path, _) = write_sample(tmpdir)
+    speed = ColumnFile(path)['speed'][10:20]
+    assert not speed.num.flags.writeable
+    assert not speed.num.flags.owndata
+    metres_per_second = speed.to(unit('m') / unit('s'))
+    assert metres_per_second.unit is unit('m') / unit('s')
+    assert metres_per_second.num.flags.writeable
+
+def test_to(tmpdir):
+    """Converting a column is one multiplication per encoding."""
+    (path, times) = write_sample(tmpdir)
+    columns = ColumnFile(path)
+    assert numpy.allclose(columns['time'].to(unit('ms')).num, times * 1000)
+    assert numpy.allclose(columns['depth'].to(unit('cm'), 5, 8).num, [5.0, 6.0, 7.0])
+    assert columns['speed'].to(unit('m') / unit('s')).unit is unit('m') / unit('s')
+
+def test_errors(tmpdir):
+    """Mismatched lengths, delta floats and bad files are rejected."""
+    path = str(tmpdir.join('bad.ucol'))
+    py.test.raises(ValueError, write, path, [('a', QuantityArray([1.0], unit('m'))),
+                                             ('b', QuantityArray([1.0, 2.0], unit('m')))])
+    py.test.raises(ValueError, write, path, [('a', QuantityArray([1.0], unit('m')))], delta=['a'])
+    open(path, 'wb').write('not a column file at all')
+    py.test.raises(ValueError, ColumnFile, path)
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
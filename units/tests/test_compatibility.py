@@ -0,0 +1,50 @@
+"""Tests for unit compatibility and dimension signatures."""
+
+import gc
+
+from units import unit
+from units.compatibility import compatible
+from units.composed_unit import ComposedUnit
+from units.leaf_unit import LeafUnit
+from units.named_composed_unit import NamedComposedUnit
+from units.registry import REGISTRY, Registry
+
+def test_leaf_dimension():
+    """A leaf unit's dimension is itself to the first power."""
+    assert unit('m').dimension == ((unit('m'), 1),)
+    assert compatible(unit('m'), unit('m'))
+    assert not compatible(unit('m'), unit('s'))
+
+def test_composed_dimension():
+    """Composed units count the exponents of their leaves."""
+    m_per_s_s = unit('m') / unit('s') / unit('s')
+    assert dict(m_per_s_s.dimension) == {unit('m'): 1, unit('s'): -2}
+
+def test_dimension_equal():
+    """Units with the same exponents have equal dimensions."""
+    area = unit('m') * unit('m')
+    scaled_area = ComposedUnit([unit('m'), unit('m')], [], 0.5)
+    assert area is not scaled_area
+    assert area.dimension == scaled_area.dimension
+    assert compatible(area, scaled_area)
+
+def test_dropped_units_freed():
+    """Leaf units are freed along with the registry defining them."""
+    tenant = Registry()
+    leaf = id(unit('gizmo', registry=tenant))
+    del tenant
+    gc.collect()
+    assert leaf not in [id(found) for found in gc.get_objects() if isinstance(found, LeafUnit)]
+
+def test_named_dimension():
+    """Named units share the dimension of the unit they name."""
+    vel = NamedComposedUnit('vel', unit('m') / unit('s'))
+    assert vel.dimension == (unit('m') / unit('s')).dimension
+    assert compatible(vel, unit('m') / unit('s'))
+    assert not compatible(vel, unit('m') * unit('s'))
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
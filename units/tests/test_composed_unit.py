@@ -1,7 +1,9 @@
 """Tests specific to composed units and their complexities."""
 
+from fractions import Fraction
+
 from units import unit
-from units.composed_unit import ComposedUnit
+from units.composed_unit import ComposedUnit, INTERNED
 from units.registry import REGISTRY
 
 def test_unbox_to_num():
@@ -12,6 +14,65 @@ def test_unbox_to_leaf():
     """Test that composed units collaple properly to leaf units."""
     assert ComposedUnit([unit('m')], []) == unit('m')
 
+def test_interned():
+    """Structurally identical composed units are the same object."""
+    m_per_s = unit('m') / unit('s')
+    assert ComposedUnit([unit('m')], [unit('s')]) is m_per_s
+    assert unit('m') * unit('g') / unit('s') is unit('g') * unit('m') / unit('s')
+
+def test_interned_multiplier_type():
+    """Int and float multipliers don't share an interned unit."""
+    int_unit = ComposedUnit([unit('day')], [], 28)
+    float_unit = ComposedUnit([unit('day')], [], 28.0)
+    assert int_unit is not float_unit
+    assert isinstance(int_unit.squeeze(), int)
+    assert isinstance(float_unit.squeeze(), float)
+
+def test_interned_counters():
+    """The interning cache counts its hits and misses."""
+    INTERNED.clear()
+    ComposedUnit([unit('m')], [unit('s')])
+    ComposedUnit([unit('m')], [unit('s')])
+    assert INTERNED.misses == 1
+    assert INTERNED.hits == 1
+
+def test_interned_bounded():
+    """The interning cache evicts once it is full."""
+    maxsize = INTERNED.maxsize
+    INTERNED.maxsize = 2
+    try:
+        for exponent in range(2, 6):
+            unit('m') ** exponent
+        assert len(INTERNED) == 2
+    finally:
+        INTERNED.maxsize = maxsize
+
+def test_large_power():
+    """Large powers are stored as exponents, not repeated units."""
+    big = unit('m') ** 50
+    assert big.exponents == {unit('m'): 50}
+    assert len(big.numer) == 50
+    assert big / unit('m') ** 49 is unit('m')
+
+def test_negative_power():
+    """Negative powers move units to the denominator."""
+    assert unit('m') ** -2 is ComposedUnit([], [unit('m'), unit('m')])
+    assert (unit('m') / unit('s')) ** -1 is unit('s') / unit('m')
+
+def test_rational_power():
+    """Units can be raised to Fraction powers."""
+    root_m = unit('m') ** Fraction(1, 2)
+    assert root_m.exponents == {unit('m'): Fraction(1, 2)}
+    assert root_m * root_m is unit('m')
+    assert (unit('m') ** 2) ** Fraction(1, 2) is unit('m')
+    assert str(root_m / unit('s')) == 'm ** 1/2 / s'
+
+def test_cancel():
+    """Cancelling only keeps the leftover units."""
+    numer = [unit('m')] * 3 + [unit('g')]
+    denom = [unit('m')] * 2 + [unit('s')]
+    assert ComposedUnit(numer, denom).exponents == {unit('m'): 1, unit('g'): 1, unit('s'): -1}
+
 def teardown_module(module):
     # Disable warning about not using module.
     # pylint: disable-msg=W0613
@@ -1,7 +1,17 @@
 """Test conversion between units using the 'in' operator"""
 
-from units import unit
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from units import converter, unit, warmup
 from units.compatibility import within_epsilon
+from units.composed_unit import ComposedUnit
+from units.conversion import FACTORS, multipliers
+from units.exception import IncompatibleUnitsError
+from units.named_composed_unit import NamedComposedUnit
 from units.predefined import define_units
 from units.quantity import Quantity
 from units.registry import REGISTRY
@@ -97,6 +107,51 @@ def test_convert_from_num():
     metre = unit('m')
     assert metre(3) == Quantity(3, metre)
 
+def test_factor_cache():
+    """Conversions reuse cached multipliers."""
+    FACTORS.clear()
+    league = Quantity(1, unit('lea'))
+    unit('m')(league)
+    unit('m')(league)
+    assert FACTORS.misses == 1
+    assert FACTORS.hits == 1
+    assert multipliers(unit('lea'), unit('m')) == (unit('lea').squeeze(), 1)
+
+def test_factor_cache_incompatible():
+    """Incompatible pairs are never cached."""
+    FACTORS.clear()
+    py.test.raises(IncompatibleUnitsError, multipliers, unit('m'), unit('s'))
+    assert len(FACTORS) == 0
+
+def test_warmup():
+    """Warming up caches the given pairs."""
+    FACTORS.clear()
+    warmup([('mi', 'km'), (unit('ft'), unit('m'))])
+    assert (unit('mi'), unit('km')) in FACTORS
+    assert (unit('ft'), unit('m')) in FACTORS
+    
+    unit('km')(Quantity(1, unit('mi')))
+    assert FACTORS.hits == 1
+
+def test_redefinition_invalidates():
+    """Redefining a named unit drops stale multipliers."""
+    NamedComposedUnit('stadion', ComposedUnit([unit('m')], [], 185.0))
+    assert within_epsilon(unit('m')(Quantity(1, unit('stadion'))), Quantity(185.0, unit('m')))
+    
+    NamedComposedUnit('stadion', ComposedUnit([unit('m')], [], 192.0))
+    assert within_epsilon(unit('m')(Quantity(1, unit('stadion'))), Quantity(192.0, unit('m')))
+
+def test_converter():
+    """Converters turn numbers in one unit into numbers in another."""
+    mi_to_km = converter('mi', unit('km'))
+    assert mi_to_km.factor == 1.609344
+    assert within_epsilon(Quantity(mi_to_km(2), unit('km')), Quantity(3.218688, unit('km')))
+    assert [round(x, 6) for x in mi_to_km.convert_many([1, 10])] == [1.609344, 16.09344]
+
+def test_converter_incompatible():
+    """Converters refuse incompatible units when they are made."""
+    py.test.raises(IncompatibleUnitsError, converter, 'm', 's')
+
 def setup_module(module):
     # Disable warning about not using module.
     # pylint: disable-msg=W0613
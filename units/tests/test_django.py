@@ -0,0 +1,147 @@
+"""Tests for the Django UnitField, against an in-memory SQLite database."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from units import unit
+from units.exception import IncompatibleUnitsError
+from units.predefined import define_units
+from units.registry import REGISTRY
+
+TRIP = None
+
+def setup_module(module):
+    # Disable pylint warning about not using module
+    # pylint: disable-msg=W0603,W0613
+    """Configure Django and make a table of trips."""
+    global TRIP
+    django = py.test.importorskip('django')
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                                                  'NAME': ':memory:'}})
+        django.setup()
+    from django.db import connection, models
+    from units.contrib.django.models import UnitField
+    define_units()
+    
+    class Trip(models.Model):
+        """A trip with a distance."""
+        distance = UnitField(unit='km', null=True)
+        
+        class Meta:
+            """Not part of an installed app."""
+            app_label = 'units_tests'
+    
+    with connection.schema_editor() as editor:
+        editor.create_model(Trip)
+    TRIP = Trip
+
+def teardown_module(module):
+    # Disable pylint warning about not using module
+    # pylint: disable-msg=W0613
+    """Drop the table."""
+    from django.db import connection
+    with connection.schema_editor() as editor:
+        editor.delete_model(TRIP)
+    REGISTRY.clear()
+
+def setup_function(function):
+    # Disable pylint warning about not using function
+    # pylint: disable-msg=W0613
+    """Start each test with no trips."""
+    TRIP.objects.all().delete()
+
+def test_round_trip():
+    """Quantities come back in the unit they were saved in."""
+    trip = TRIP.objects.create(distance=unit('mi')(26.2))
+    loaded = TRIP.objects.get(pk=trip.pk)
+    assert loaded.distance == unit('mi')(26.2)
+    assert loaded.distance.unit is unit('mi')
+    assert loaded.distance_unit == 'mi'
+    assert TRIP.objects.values_list('distance', flat=True)[0] == unit('m')(unit('mi')(26.2)).num
+
+def test_composed_units():
+    """Units without specifiers of their own are stored as expressions."""
+    field = TRIP._meta.get_field('distance')
+    trip = TRIP.objects.create(distance=unit('m')(2.0) * unit('s')(3.0) / unit('s')(1.0))
+    loaded = TRIP.objects.get(pk=trip.pk)
+    assert loaded.distance == unit('m')(6.0)
+    assert field.from_base(1.0, '0.5 * m').num == 2.0
+
+def test_filters_and_ordering():
+    """Range lookups and ordering work on the stored magnitudes."""
+    for (number, specifier) in [(3.0, 'km'), (1.0, 'mi'), (2500.0, 'm'), (10.0, 'ft')]:
+        TRIP.objects.create(distance=unit(specifier)(number))
+    ordered = [trip.distance for trip in TRIP.objects.order_by('distance')]
+    assert ordered == [unit('ft')(10.0), unit('mi')(1.0), unit('m')(2500.0), unit('km')(3.0)]
+    
+    near = TRIP.objects.filter(distance__range=(unit('mi')(1.0), unit('km')(2.9)))
+    assert sorted([trip.distance_unit for trip in near]) == ['m', 'mi']
+    assert TRIP.objects.filter(distance__lt=unit('ft')(11.0)).count() == 1
+
+def test_incompatible():
+    """Quantities of other dimensions are refused."""
+    trip = TRIP()
+    py.test.raises(IncompatibleUnitsError, setattr, trip, 'distance', unit('s')(1.0))
+    py.test.raises(IncompatibleUnitsError, TRIP.objects.filter, distance__gt=unit('s')(1.0))
+
+def test_null_and_deferred():
+    """None is stored as NULL, and deferred fields load on access."""
+    TRIP.objects.create(distance=None)
+    TRIP.objects.create(distance=unit('km')(1.0))
+    assert TRIP.objects.order_by('distance')[0].distance is None
+    deferred = TRIP.objects.defer('distance').get(distance__isnull=False)
+    assert deferred.distance == unit('km')(1.0)
+
+def test_deconstruct():
+    """Migrations can rebuild the field."""
+    field = TRIP._meta.get_field('distance')
+    (_, path, _, kwargs) = field.deconstruct()
+    assert path == 'units.contrib.django.models.UnitField'
+    assert kwargs['unit'] == 'km' and 'db_index' not in kwargs
+    assert [f.name for f in TRIP._meta.local_fields] == ['id', 'distance_unit', 'distance']
+
+def test_plain_numbers():
+    """Plain numbers are in the field's unit, assigned or looked up."""
+    trip = TRIP(distance=5)
+    assert trip.distance == unit('km')(5.0)
+    trip.save()
+    TRIP.objects.create(distance=unit('mi')(26.2))
+    assert TRIP.objects.get(pk=trip.pk).distance == unit('km')(5.0)
+    assert [t.distance_unit for t in TRIP.objects.filter(distance__gte=40)] == ['mi']
+    assert TRIP.objects.filter(distance__lt=40).get().pk == trip.pk
+
+def test_full_clean():
+    """Model validation accepts quantities, new and loaded."""
+    trip = TRIP.objects.create(distance=unit('mi')(26.2))
+    trip.full_clean()
+    TRIP.objects.get(pk=trip.pk).full_clean()
+
+def test_model_form():
+    """A ModelForm shows quantities with their units and saves them."""
+    from django.forms import modelform_factory
+    form_class = modelform_factory(TRIP, fields=['distance'])
+    trip = TRIP.objects.create(distance=unit('mi')(26.2))
+    
+    assert 'value="26.2 mi"' in str(form_class(instance=trip)['distance'])
+    resubmitted = form_class({'distance': '26.2 mi'}, instance=trip)
+    assert resubmitted.is_valid() and not resubmitted.has_changed()
+    
+    saved = form_class({'distance': '40 km'}, instance=trip).save()
+    assert TRIP.objects.get(pk=saved.pk).distance == unit('km')(40.0)
+    assert TRIP.objects.get(pk=saved.pk).distance_unit == 'km'
+    assert form_class({'distance': '12'}).save().distance == unit('km')(12.0)
+    assert form_class({'distance': '3 m / s * s'}).save().distance == unit('m')(3.0)
+
+def test_form_errors():
+    """Forms refuse unknown and incompatible units without defining any."""
+    from django.forms import modelform_factory
+    form_class = modelform_factory(TRIP, fields=['distance'])
+    for text in ['26.2 furlongz', '26.2', '5 s', 'far']:
+        form = form_class({'distance': text})
+        assert form.is_valid() == (text == '26.2')
+    assert REGISTRY.find('furlongz') is None
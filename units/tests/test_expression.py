@@ -0,0 +1,96 @@
+"""Tests for parsing unit expressions."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from fractions import Fraction
+
+from units import scaled_unit, unit
+from units.composed_unit import ComposedUnit
+from units.exception import UnitExpressionError
+from units.expression import PARSED
+from units.predefined import define_units
+from units.registry import REGISTRY
+
+def test_product_quotient():
+    """Products and quotients build the same interned units as operators."""
+    assert unit('kg*m/s^2') is unit('kg') * unit('m') / unit('s') / unit('s')
+    assert unit('km/h') is unit('km') / unit('h')
+    assert unit('N') * unit('s') is unit('kg * m / s')
+
+def test_powers():
+    """Integer, negative and rational powers."""
+    assert unit('m^3') is unit('m') ** 3
+    assert unit('m**3') is unit('m') ** 3
+    assert unit('s^-1') is unit('Hz').composed_unit
+    assert unit('m^(1/2)') is unit('m') ** Fraction(1, 2)
+    assert unit('(m^2)^(1/2)') is unit('m')
+
+def test_parentheses():
+    """Parentheses group subexpressions."""
+    assert unit('J / (kg * K)') is unit('J') / (unit('kg') * unit('K'))
+    assert unit('(m / s)^2') is (unit('m') / unit('s')) ** 2
+
+def test_numbers():
+    """Numbers are plain multipliers."""
+    assert unit('1 / s') is ComposedUnit([], [unit('s')])
+    assert unit('100 * m').squeeze() == 100
+
+def test_spaced_specifiers():
+    """Specifiers with spaces in them still work inside expressions."""
+    assert unit('fl oz / s') is unit('fl oz') / unit('s')
+
+def test_cached():
+    """Repeated expressions are served from the cache."""
+    PARSED.clear()
+    first = unit('ft / min')
+    assert unit('ft / min') is first
+    assert PARSED.hits == 1
+
+def test_cache_invalidated():
+    """Clearing the registry makes cached expressions stale."""
+    before = unit('m / s')
+    REGISTRY.clear()
+    after = unit('m / s')
+    assert before is not after
+    assert dict(after.dimension) == {unit('m'): 1, unit('s'): -1}
+    define_units()
+
+def test_cache_survives_new_units():
+    """Defining new units keeps cached expressions; a redefinition makes
+    them stale once, after which the new result is cached."""
+    first = unit('ft / min')
+    unit('blorp')
+    unit('Mm')
+    hits = PARSED.hits
+    assert unit('ft / min') is first
+    assert PARSED.hits == hits + 1
+    
+    scaled_unit('smoot', 'inch', 67)
+    speed = unit('smoot / s')
+    scaled_unit('smoot', 'inch', 67.5)
+    hits = PARSED.hits
+    assert unit('smoot / s').squeeze() == unit('smoot').squeeze()
+    assert PARSED.hits == hits
+    assert unit('smoot / s').squeeze() == speed.squeeze() * 67.5 / 67
+    assert PARSED.hits == hits + 1
+
+def test_syntax_errors():
+    """Malformed expressions raise UnitExpressionError."""
+    for text in ['m /', '(m * s', 'm ^ s', 'm * ) s', 'm^(1/2']:
+        py.test.raises(UnitExpressionError, unit, text)
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,82 @@
+"""Tests for hashing quantities and their cached magnitudes."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from units import unit
+from units.exception import IncompatibleUnitsError
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.registry import REGISTRY
+
+EQUAL = [('km', 1, 'm', 1000),
+         ('ft', 1.0, 'inch', 12.0),
+         ('mi', 1, 'ft', 5280),
+         ('L', 1, 'mL', 1000),
+         ('keg', 1, 'L', 50.0),
+         ('h', 2.5, 's', 9000),
+         ('lb', 1, 'oz', 16)]
+
+def test_equal_quantities_hash_alike():
+    """Quantities equal across units have equal hashes."""
+    for (unit1, num1, unit2, num2) in EQUAL:
+        quant1 = Quantity(num1, unit(unit1))
+        quant2 = Quantity(num2, unit(unit2))
+        assert quant1 == quant2
+        assert hash(quant1) == hash(quant2)
+
+def test_composed_units_hash_alike():
+    """Equal quantities in composed units are equal and hash alike."""
+    metres_per_second = Quantity(1.0, unit('m') / unit('s'))
+    kilometres_per_hour = Quantity(3.6, unit('km') / unit('h'))
+    assert metres_per_second == kilometres_per_hour
+    assert hash(metres_per_second) == hash(kilometres_per_hour)
+    assert len(set([metres_per_second, kilometres_per_hour, unit('km / h')(3.6)])) == 1
+
+def test_sets_and_dicts():
+    """Quantities dedupe in sets and work as dict keys."""
+    lengths = set([unit('km')(1), unit('m')(1000), unit('m')(1000.0), unit('cm')(5)])
+    assert len(lengths) == 2
+    prices = {unit('ft')(1.0): 'foot'}
+    assert prices[unit('inch')(12.0)] == 'foot'
+    assert unit('s')(1) not in set([unit('m')(1)])
+
+def test_base_is_cached():
+    """The magnitude in leaf units is worked out once."""
+    quantity = unit('mi')(2)
+    assert quantity.base == 3218.688
+    assert quantity.base is quantity.base
+    assert quantity.dimension is unit('mi').dimension
+
+def test_base_exact_for_integers():
+    """Integer quantities in integer units keep exact magnitudes."""
+    assert unit('ly')(10 ** 6).base == 9460730472580800 * 10 ** 6
+    assert unit('Ym')(3).base == 3 * 10 ** 24
+    assert unit('ym')(1) < unit('ym')(2)
+
+def test_comparisons_across_units():
+    """Ordering across units uses the cached magnitudes."""
+    assert unit('inch')(11.9) < unit('ft')(1.0) < unit('inch')(12.1)
+    assert unit('m')(0.1) == unit('km')(0.0001)
+    py.test.raises(IncompatibleUnitsError, cmp, unit('m')(1), unit('s')(1))
+
+def test_quantity_arrays_unhashable():
+    """Quantity arrays stay unhashable."""
+    numpy = py.test.importorskip('numpy')
+    from units.quantity_array import QuantityArray
+    py.test.raises(TypeError, hash, QuantityArray(numpy.zeros(2), unit('m')))
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,106 @@
+"""Tests for opt-in instrumentation."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import time
+
+import units
+import units.composed_unit
+import units.conversion
+import units.instrument
+import units.quantity
+from units import unit
+from units.leaf_unit import LeafUnit
+from units.predefined import define_units
+from units.registry import REGISTRY, Registry, using
+
+def setup_module(module):
+    # Disable pylint warning about not using module
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable pylint warning about not using module
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
+
+def test_counts():
+    """Conversions, compatibility checks and composition are counted."""
+    units.conversion.FACTORS.clear()
+    with units.instrumented():
+        metres = unit('m')(3.0) + unit('ft')(4.0)
+        unit('m')(unit('ft')(1.0))
+        unit('m') / unit('s')
+    counts = units.stats()['counts']
+    assert counts['convert'] == 2
+    assert counts['compatible'] == 1
+    assert counts['compose'] >= 1
+    assert counts['squeeze'] >= 2
+    assert metres.unit is unit('m')
+
+def test_registry_lookups():
+    """Registry hits and misses are counted."""
+    scratch = Registry()
+    with units.instrumented():
+        unit('m')
+        unit('blog', registry=scratch)
+    counts = units.stats()['counts']
+    assert counts['registry.hits'] >= 1
+    assert counts['registry.misses'] >= 1
+
+def test_cache_hit_rates():
+    """Cache hit rates count from the start of the block."""
+    units.conversion.FACTORS.clear()
+    with units.instrumented():
+        for _ in range(4):
+            unit('m')(unit('ft')(1.0))
+    factors = units.stats()['caches']['factors']
+    assert (factors['hits'], factors['misses']) == (3, 1)
+    assert factors['hit_rate'] == 0.75
+
+def test_cache_hit_rates_of_measured_registry():
+    """Hit rates are those of the registry active at the start."""
+    units.conversion.FACTORS.clear()
+    with units.instrumented():
+        unit('m')(unit('ft')(1.0))
+    with using(Registry()):
+        factors = units.stats()['caches']['factors']
+    assert (factors['hits'], factors['misses']) == (0, 1)
+
+def test_disabled_restores_originals():
+    """Disabling puts back the very same functions and methods."""
+    compose = units.composed_unit.compose
+    multipliers = units.quantity.multipliers
+    squeeze = LeafUnit.__dict__['squeeze']
+    with units.instrumented():
+        assert units.quantity.multipliers is not multipliers
+    assert units.composed_unit.compose is compose
+    assert units.quantity.multipliers is multipliers
+    assert LeafUnit.__dict__['squeeze'] is squeeze
+    assert 'get' not in Registry.__dict__
+    assert not units.stats()['enabled']
+
+def test_enable_twice():
+    """Instrumentation cannot be enabled twice."""
+    with units.instrumented():
+        py.test.raises(RuntimeError, units.instrument.enable)
+
+def test_sampling():
+    """Samples in the package are charged to the line calling in."""
+    metre = unit('m')
+    foot = unit('ft')
+    with units.instrumented(sample_interval=0.001):
+        start = time.clock()
+        while not units.instrument.SITES and time.clock() - start < 10:
+            for _ in range(100):
+                metre(foot(1.0))
+    sampling = units.stats()['sampling']
+    assert sampling['samples'] >= sampling['units_samples'] > 0
+    filenames = [filename.rstrip('c') for (_, filename, _) in sampling['sites']]
+    assert __file__.rstrip('c') in filenames
@@ -0,0 +1,101 @@
+"""Tests for streaming normalization of quantity records."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import json
+import math
+from StringIO import StringIO
+
+from units.__main__ import main
+from units.exception import IncompatibleUnitsError
+from units.normalize import (Normalizer, column_arrays, normalize_rows,
+                             read_csv, read_jsonl, split_quantity)
+from units.predefined import define_units
+from units.registry import REGISTRY
+
+CSV = 'id,length\n1,2 km\n2,30 ft\n3,\n4,1 mi\n'
+
+def test_split_quantity():
+    """Values split into a number and a possibly spaced specifier."""
+    assert split_quantity(' 12.5 km ') == (12.5, 'km')
+    assert split_quantity('2 fl oz') == (2.0, 'fl oz')
+    py.test.raises(ValueError, split_quantity, 'km')
+    py.test.raises(ValueError, split_quantity, 5)
+
+def test_normalizer_caches_factors():
+    """Each column remembers the factor of each unit it has seen."""
+    normalizer = Normalizer({'length': 'm'})
+    assert normalizer.convert('length', '2 km') == 2000.0
+    assert normalizer.convert('length', '3 km') == 3000.0
+    assert list(normalizer._factors['length']) == ['km']
+
+def test_normalizer_incompatible():
+    """Values in incompatible units are rejected."""
+    normalizer = Normalizer({'length': 'm'})
+    py.test.raises(IncompatibleUnitsError, normalizer.convert, 'length', '2 s')
+
+def test_csv_rows():
+    """CSV rows come out converted, in order, with other columns kept."""
+    rows = list(normalize_rows(read_csv(StringIO(CSV)), {'length': 'm'}))
+    assert [row['id'] for row in rows] == ['1', '2', '3', '4']
+    assert [row['length'] for row in rows] == [2000.0, 30 * 0.3048, None, 1609.344]
+
+def test_jsonl_rows():
+    """JSON-lines rows are read one per line."""
+    lines = '{"t": "1 h"}\n\n{"t": "90 s"}\n'
+    rows = list(normalize_rows(read_jsonl(StringIO(lines)), {'t': 'min'}))
+    assert [row['t'] for row in rows] == [60.0, 1.5]
+
+def test_parallel_rows():
+    """Chunks normalized in a process pool come back in order."""
+    rows = [{'id': i, 'length': '%d km' % i} for i in range(50)]
+    normalized = list(normalize_rows(rows, {'length': 'm'}, chunk_size=7, workers=2))
+    assert [row['id'] for row in normalized] == range(50)
+    assert [row['length'] for row in normalized] == [1000.0 * i for i in range(50)]
+
+def test_column_arrays():
+    """Normalized columns collect into arrays of doubles."""
+    rows = normalize_rows(read_csv(StringIO(CSV)), {'length': 'm'})
+    lengths = column_arrays(rows, ['length'])['length']
+    assert lengths.typecode == 'd'
+    assert lengths[0] == 2000.0
+    assert math.isnan(lengths[2])
+
+def test_command_line(tmpdir):
+    """The normalize command converts a file into another."""
+    source = tmpdir.join('in.jsonl')
+    source.write('{"d": "1 mi"}\n{"d": "1 km"}\n')
+    destination = tmpdir.join('out.jsonl')
+    main(['normalize', '-c', 'd=m', str(source), '-o', str(destination)])
+    rows = [json.loads(line) for line in destination.readlines()]
+    assert rows == [{'d': 1609.344}, {'d': 1000.0}]
+
+def test_field_order(tmpdir):
+    """Both formats keep the input's field order."""
+    source = tmpdir.join('in.csv')
+    source.write('z,length,a\n1,2 km,x\n')
+    destination = tmpdir.join('out.csv')
+    main(['normalize', '-c', 'length=m', str(source), '-o', str(destination)])
+    assert destination.readlines()[0].strip() == 'z,length,a'
+    
+    source = tmpdir.join('in.jsonl')
+    source.write('{"z": 1, "length": "2 km", "a": "x"}\n')
+    destination = tmpdir.join('out.jsonl')
+    main(['normalize', '-c', 'length=m', str(source), '-o', str(destination)])
+    assert destination.read().strip() == '{"z": 1, "length": 2000.0, "a": "x"}'
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
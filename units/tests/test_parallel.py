@@ -0,0 +1,63 @@
+"""Tests for bulk conversion and reduction across processes."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from units import unit
+from units.exception import IncompatibleUnitsError
+from units.predefined import define_units
+from units.registry import REGISTRY
+import units.parallel
+from units.parallel import convert_many, reduce, split
+
+def test_split():
+    """Chunks cover the input in order without gaps."""
+    assert split(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split(2, 8) == [(0, 1), (1, 2)]
+    assert split(0, 4) == [(0, 0)]
+
+def test_convert_many():
+    """Numbers come back converted and in order."""
+    values = [float(i) for i in range(1000)]
+    for workers in [1, 3]:
+        converted = convert_many(values, 'km', unit('m'), workers=workers)
+        assert list(converted) == [i * 1000.0 for i in range(1000)]
+
+def test_convert_many_without_numpy():
+    """The pure Python path gives the same results."""
+    numpy = units.parallel.numpy
+    units.parallel.numpy = None
+    try:
+        assert list(convert_many([1.0, 2.0, 3.0], 'ft', 'inch', workers=1)) == [12.0, 24.0, 36.0]
+        assert reduce([1.0, 5.0, 3.0], 'ft', 'inch', 'max', workers=1) == unit('inch')(60.0)
+    finally:
+        units.parallel.numpy = numpy
+
+def test_reduce():
+    """Each operation reduces across chunks and converts the result."""
+    values = [float(i) for i in range(1, 101)]
+    assert reduce(values, 'm', workers=2) == unit('m')(5050.0)
+    assert reduce(values, 'm', 'cm', 'mean', workers=2) == unit('cm')(5050.0)
+    assert reduce(values, 'm', 'km', 'min', workers=2) == unit('km')(0.001)
+    assert reduce(values, 'm', 'km', 'max', workers=1) == unit('km')(0.1)
+
+def test_errors():
+    """Incompatible units, unknown operations and empty input fail."""
+    py.test.raises(IncompatibleUnitsError, convert_many, [1.0], 'm', 's', workers=1)
+    py.test.raises(ValueError, reduce, [1.0], 'm', operation='median', workers=1)
+    py.test.raises(ValueError, reduce, [], 'm', workers=1)
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
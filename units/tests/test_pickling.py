@@ -0,0 +1,73 @@
+"""Tests for pickling units and quantities."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import pickle
+from fractions import Fraction
+
+from units import unit
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.registry import REGISTRY, Registry, using
+
+def round_trip(obj):
+    """Pickle and unpickle obj with each protocol, returning the
+    results."""
+    return [pickle.loads(pickle.dumps(obj, protocol))
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1)]
+
+def test_units_keep_identity():
+    """Registered and composed units unpickle as the same objects."""
+    for original in [unit('m'), unit('km'), unit('N'),
+                     unit('km') / unit('h'), unit('m') ** Fraction(1, 2)]:
+        for copy in round_trip(original):
+            assert copy is original
+
+def test_quantities():
+    """Quantities unpickle with their number and the same unit."""
+    speeds = [Quantity(float(i), unit('km') / unit('h')) for i in range(10)]
+    for copy in round_trip(speeds):
+        assert copy == speeds
+        assert copy[3].unit is speeds[3].unit
+
+def test_compact():
+    """A unit is pickled once however many quantities share it."""
+    one = pickle.dumps([Quantity(1.0, unit('mi'))], 2)
+    many = pickle.dumps([Quantity(1.0, unit('mi'))] * 2 + [Quantity(2.0, unit('mi'))], 2)
+    assert len(many) - len(one) < 30
+
+def test_define_missing():
+    """Units the receiving registry lacks are defined there."""
+    data = pickle.dumps(Quantity(3.0, unit('mi')), 2)
+    receiver = Registry()
+    with using(receiver):
+        distance = pickle.loads(data)
+    assert receiver['mi'] is distance.unit
+    assert distance.unit.squeeze() == unit('mi').squeeze()
+
+def test_reintern():
+    """Units unpickle into the receiving registry."""
+    data = pickle.dumps(Quantity(3.0, unit('mi') / unit('h')), 2)
+    receiver = Registry()
+    with using(receiver):
+        define_units()
+        speed = pickle.loads(data)
+        assert speed.unit is unit('mi') / unit('h')
+    assert receiver['m'] is not REGISTRY['m']
+    assert speed.unit is not unit('mi') / unit('h')
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
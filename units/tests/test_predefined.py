@@ -1,7 +1,9 @@
 """Tests for predefined units."""
 
+from fractions import Fraction
+
 from units import unit
-from units.predefined import define_units
+from units.predefined import GROUPS, ORDER, define_group, define_units
 from units.quantity import Quantity
 from units.registry import REGISTRY
 
@@ -15,6 +17,75 @@ def test_volume():
     assert Quantity(1, litres) == Quantity(1000, millilitres)
     assert Quantity(1, millilitres) == Quantity(1, cm_cubed)
 
+def test_exact_factors():
+    """Chains of scaled units are worked out exactly and rounded once."""
+    assert unit('L').squeeze() == 0.001
+    assert unit('mL').squeeze() == 1e-06
+    assert unit('pt').factor == Fraction(473176473, 10 ** 12)
+    assert unit('minim').factor == unit('pt').factor / 16 / 8 / 60
+    assert unit('minim').squeeze() == float(unit('minim').factor)
+    assert unit('ly').factor == 9460730472580800
+    assert unit('ym').factor == Fraction(1, 10 ** 24)
+
+def test_exact_conversions():
+    """Converting between units with exactly related factors is exact."""
+    assert unit('inch')(unit('ft')(1.0)).num == 12.0
+    assert unit('fl oz')(unit('gal')(1.0)).num == 128.0
+    assert unit('mi')(unit('lea')(1.0)).num == 3.0
+
+def test_composed_factors():
+    """Composed units work their factors out from their units' factors,
+    so speeds convert as exactly as lengths."""
+    (metres_per_second, kilometres_per_hour) = (unit('m') / unit('s'), unit('km') / unit('h'))
+    assert kilometres_per_hour.factor == Fraction(5, 18)
+    assert unit('km / h').factor == Fraction(5, 18)
+    assert (unit('mi') / unit('h')).factor == unit('mi').factor / 3600
+    assert metres_per_second(kilometres_per_hour(3.6)).num == 1.0
+    assert kilometres_per_hour(metres_per_second(1.0)).num == 3.6
+
+def test_groups_declare_their_units():
+    """Each group lists exactly the units it defines, besides the
+    SI-prefixed units it uses along the way."""
+    for name in ORDER:
+        REGISTRY.clear()
+        for dependency in GROUPS[name][1]:
+            define_group(dependency)
+        before = set(REGISTRY)
+        define_group(name)
+        defined = set(REGISTRY) - before
+        declared = set(GROUPS[name][2])
+        assert declared <= defined
+        for specifier in defined - declared:
+            assert specifier[1:] in REGISTRY or specifier[2:] in REGISTRY
+    REGISTRY.clear()
+    define_units()
+
+def test_lazy():
+    """Lazily defined groups load on first use, with their dependencies."""
+    REGISTRY.clear()
+    define_units(lazy=True)
+    assert len(REGISTRY) == 0
+    
+    assert unit('day').squeeze() == 86400.0
+    assert 's' in REGISTRY
+    assert 'N' not in REGISTRY
+    
+    assert Quantity(1, unit('keg')) == Quantity(50, unit('L'))
+    assert 'lb' in REGISTRY
+    assert 'ly' not in REGISTRY
+    REGISTRY.clear()
+    define_units()
+
+def test_lazy_prefixed():
+    """SI-prefixed units load the group of their base unit."""
+    REGISTRY.clear()
+    define_units(lazy=True)
+    assert unit('kN').squeeze() == 1000000
+    assert 'Hz' in REGISTRY
+    assert 'min' not in REGISTRY
+    REGISTRY.clear()
+    define_units()
+
 def setup_module(module):
     # Disable warning about not using module.
     # pylint: disable-msg=W0613
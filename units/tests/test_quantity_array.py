@@ -0,0 +1,128 @@
+"""Tests for NumPy-backed quantity arrays."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+numpy = py.test.importorskip('numpy')
+
+from units import unit
+from units.exception import IncompatibleUnitsError
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.quantity_array import QuantityArray
+from units.registry import REGISTRY
+
+def test_add_converts_once():
+    """Adding arrays in compatible units converts the right operand."""
+    metres = QuantityArray([1.0, 2.0], unit('m'))
+    centimetres = QuantityArray([50.0, 150.0], unit('cm'))
+    total = metres + centimetres
+    assert total.unit is unit('m')
+    assert numpy.allclose(total.num, [1.5, 3.5])
+
+def test_add_quantity():
+    """Quantities broadcast over arrays from either side."""
+    metres = QuantityArray([1.0, 2.0], unit('m'))
+    left = metres + Quantity(1, unit('km'))
+    right = Quantity(1, unit('km')) + metres
+    assert numpy.allclose(left.num, [1001.0, 1002.0])
+    assert right.unit is unit('km')
+    assert numpy.allclose(right.num, [1.001, 1.002])
+
+def test_add_incompatible():
+    """Incompatible arrays don't add."""
+    metres = QuantityArray([1.0], unit('m'))
+    seconds = QuantityArray([1.0], unit('s'))
+    py.test.raises(IncompatibleUnitsError, lambda: metres + seconds)
+
+def test_multiply_divide():
+    """Multiplication and division combine units."""
+    metres = QuantityArray([2.0, 4.0], unit('m'))
+    seconds = QuantityArray([1.0, 2.0], unit('s'))
+    speeds = metres / seconds
+    assert speeds.unit is unit('m') / unit('s')
+    assert numpy.allclose(speeds.num, [2.0, 2.0])
+    assert numpy.allclose((metres * 2).num, [4.0, 8.0])
+    assert numpy.allclose(metres / metres, [1.0, 1.0])
+
+def test_compare():
+    """Comparisons are elementwise and unit-aware."""
+    metres = QuantityArray([1.0, 2000.0], unit('m'))
+    kilometre = Quantity(1, unit('km'))
+    assert list(metres < kilometre) == [True, False]
+    assert list(metres == QuantityArray([100.0, 200000.0], unit('cm'))) == [True, True]
+    assert list(metres == QuantityArray([1.0, 2000.0], unit('s'))) == [False, False]
+
+def test_reductions():
+    """Reductions return quantities in the array's unit."""
+    metres = QuantityArray([1.0, 2.0, 6.0], unit('m'))
+    assert metres.sum() == Quantity(9.0, unit('m'))
+    assert metres.mean() == Quantity(3.0, unit('m'))
+    assert metres.min() == Quantity(1.0, unit('m'))
+    assert numpy.max(metres) == Quantity(6.0, unit('m'))
+    assert numpy.add.reduce(metres) == Quantity(9.0, unit('m'))
+
+def test_isclose():
+    """isclose compares across units."""
+    metres = QuantityArray([1.0, 2.0], unit('m'))
+    assert list(metres.isclose(QuantityArray([100.0, 201.0], unit('cm')))) == [True, False]
+
+def test_ufuncs():
+    """NumPy ufuncs act through the unit-aware operators."""
+    areas = QuantityArray([4.0, 9.0], unit('m') ** 2)
+    sides = numpy.sqrt(areas)
+    assert sides.unit is unit('m')
+    assert numpy.allclose(sides.num, [2.0, 3.0])
+    assert numpy.add(sides, sides).unit is unit('m')
+    assert (numpy.array([1.0, 2.0]) * sides).unit is unit('m')
+
+def test_to_in_place():
+    """Converting with to() rescales the existing array."""
+    metres = QuantityArray([1000.0, 2500.0], unit('m'))
+    num = metres.num
+    assert metres.to(unit('km')) is metres
+    assert metres.num is num
+    assert metres.unit is unit('km')
+    assert numpy.allclose(num, [1.0, 2.5])
+
+def test_unit_call():
+    """Units convert quantity arrays into new quantity arrays."""
+    kilometres = unit('km')(QuantityArray([1.0, 2.0], unit('m')))
+    assert isinstance(kilometres, QuantityArray)
+    assert numpy.allclose(kilometres.num, [0.001, 0.002])
+
+def test_indexing():
+    """Indexing yields quantities and slicing yields arrays."""
+    metres = QuantityArray([1.0, 2.0, 3.0], unit('m'))
+    assert metres[1] == Quantity(2.0, unit('m'))
+    assert isinstance(metres[1:], QuantityArray)
+    assert list(metres)[2] == Quantity(3.0, unit('m'))
+    metres[0] = Quantity(50, unit('cm'))
+    assert metres[0] == Quantity(0.5, unit('m'))
+
+def test_unary_and_truth():
+    """Unary plus keeps the unit, and truth is ambiguous for more than
+    one element, as in NumPy."""
+    metres = QuantityArray([-1.0, 2.0], unit('m'))
+    positive = +metres
+    assert isinstance(positive, QuantityArray)
+    assert positive.unit is unit('m')
+    assert list(positive.num) == [-1.0, 2.0]
+    py.test.raises(ValueError, bool, metres)
+    assert bool(QuantityArray([2.0], unit('m')))
+    assert not QuantityArray([0.0], unit('m'))
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
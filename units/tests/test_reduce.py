@@ -0,0 +1,127 @@
+"""Tests for streaming reductions over quantities."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import random
+
+from units import unit
+from units.exception import IncompatibleUnitsError
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.reduce import (Extrema, Moments, QuantileSketch, Sum, extrema, mean, quantile,
+                          stdev, total, variance)
+from units.registry import REGISTRY
+
+def lengths(count, seed=1):
+    """count random lengths in metres, centimetres and kilometres."""
+    generator = random.Random(seed)
+    specifiers = ['m', 'cm', 'km']
+    return [Quantity(generator.uniform(0, 100), unit(specifiers[i % 3])) for i in range(count)]
+
+def in_metres(quantities):
+    """The numbers of quantities, converted into metres."""
+    return [unit('m')(quantity).num for quantity in quantities]
+
+def test_total_mixed_units():
+    """Sums convert into the output unit, by default the first unit."""
+    assert total([unit('km')(1), unit('m')(500.0)]) == unit('km')(1.5)
+    assert total([unit('km')(1), unit('m')(500.0)], 'm').unit is unit('m')
+    assert total([], 'm') == unit('m')(0.0)
+    py.test.raises(ValueError, total, [])
+
+def test_total_compensated():
+    """Compensated summation does not lose small terms."""
+    metre = unit('m')
+    quantities = [metre(1e16), metre(1.0), metre(-1e16)] * 10
+    assert sum([quantity.num for quantity in quantities]) != 10.0
+    assert total(quantities).num == 10.0
+
+def test_incompatible():
+    """Incompatible units are refused."""
+    py.test.raises(IncompatibleUnitsError, total, [unit('m')(1.0), unit('s')(1.0)])
+
+def test_moments():
+    """Means and variances match a direct computation."""
+    quantities = lengths(1000)
+    numbers = in_metres(quantities)
+    expected_mean = sum(numbers) / len(numbers)
+    expected_variance = sum([(x - expected_mean) ** 2 for x in numbers]) / (len(numbers) - 1)
+    
+    assert abs(mean(quantities, 'm').num - expected_mean) < 1e-9
+    assert abs(variance(quantities, 'm', ddof=1).num - expected_variance) < 1e-6
+    assert variance(quantities, 'm').unit == unit('m') ** 2
+    assert abs(stdev(quantities, 'm', ddof=1).num - expected_variance ** 0.5) < 1e-9
+    py.test.raises(ValueError, mean, [])
+    py.test.raises(ValueError, variance, [unit('m')(1.0)], ddof=1)
+
+def test_merge():
+    """Merging partial reductions gives the result of one reduction."""
+    quantities = lengths(1000)
+    whole = Moments('m').update(quantities)
+    merged = Moments('m').update(quantities[:300]).merge(Moments('cm').update(quantities[300:]))
+    assert merged.count == 1000
+    assert abs(merged.mean().num - whole.mean().num) < 1e-9
+    assert abs(merged.variance().num - whole.variance().num) < 1e-6
+    
+    whole_sum = Sum('m').update(quantities).result()
+    merged_sum = Sum('m').update(quantities[:10]).merge(Sum('km').update(quantities[10:])).result()
+    assert abs(merged_sum.num - whole_sum.num) < 1e-9
+    
+    merged_extrema = Extrema('m').update(quantities[:10]).merge(Extrema('km').update(quantities[10:]))
+    assert merged_extrema.result() == extrema(quantities, 'm')
+
+def test_extrema():
+    """The smallest and largest quantities, across units."""
+    (low, high) = extrema([unit('km')(1), unit('m')(2.0), unit('cm')(300.0)])
+    assert low == unit('m')(2.0)
+    assert high == unit('km')(1)
+    assert low.unit is unit('km')
+
+def test_quantiles():
+    """Quantiles are within the sketch's relative accuracy."""
+    quantities = lengths(5000)
+    numbers = sorted(in_metres(quantities))
+    sketch = QuantileSketch('m', 0.01).update(quantities)
+    for fraction in [0.0, 0.1, 0.5, 0.9, 0.99, 1.0]:
+        expected = numbers[int(fraction * (len(numbers) - 1))]
+        assert abs(sketch.quantile(fraction).num - expected) <= 0.01 * expected
+    assert sketch.quantile(0.0).num == numbers[0]
+    assert sketch.quantile(1.0).num == numbers[-1]
+    assert len(sketch.positive) < 1000
+    py.test.raises(ValueError, sketch.quantile, 1.5)
+
+def test_quantiles_signs():
+    """Negative numbers and zeros are sketched too."""
+    metre = unit('m')
+    quantities = [metre(float(x)) for x in range(-50, 51)]
+    assert quantile(quantities, 0.5).num == 0.0
+    assert abs(quantile(quantities, 0.25).num + 25.0) <= 0.25
+    py.test.raises(ValueError, quantile, [metre(float('nan'))], 0.5)
+
+def test_quantile_merge():
+    """Sketches merge, in the same unit or another."""
+    quantities = lengths(2000)
+    numbers = sorted(in_metres(quantities))
+    same = QuantileSketch('m').update(quantities[:700]).merge(QuantileSketch('m').update(quantities[700:]))
+    other = QuantileSketch('m').update(quantities[:700]).merge(QuantileSketch('cm').update(quantities[700:]))
+    median = numbers[len(numbers) // 2]
+    assert same.count == other.count == 2000
+    assert abs(same.quantile(0.5).num - median) <= 0.01 * median
+    assert abs(other.quantile(0.5).num - median) <= 0.02 * median
+    py.test.raises(ValueError, same.merge, QuantileSketch('m', 0.05))
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
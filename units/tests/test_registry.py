@@ -0,0 +1,238 @@
+"""Tests for the unit registry."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import threading
+
+from units import unit, scaled_unit
+from units.composed_unit import INTERNED
+from units.exception import RegistryFrozenError
+from units.leaf_unit import LeafUnit
+from units.predefined import define_units
+from units.registry import REGISTRY, Registry, active, using
+
+def test_concurrent_first_use():
+    """Threads looking up a new unit at the same time share one object."""
+    specifiers = ['widget%d' % i for i in range(200)]
+    results = []
+    start = threading.Event()
+    
+    def look_up():
+        """Look up every specifier once start is set."""
+        start.wait()
+        results.append([unit(specifier) for specifier in specifiers])
+    
+    threads = [threading.Thread(target=look_up) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    
+    for found in results:
+        for (specifier, widget) in zip(specifiers, found):
+            assert widget is REGISTRY[specifier]
+            assert widget.specifier == specifier
+
+def test_freeze():
+    """A frozen registry refuses new and changed definitions."""
+    metre = unit('m')
+    REGISTRY.freeze()
+    try:
+        assert unit('m') is metre
+        py.test.raises(RegistryFrozenError, unit, 'blog')
+        py.test.raises(RegistryFrozenError, scaled_unit, 'mi', 'km', 2)
+        py.test.raises(RegistryFrozenError, REGISTRY.pop, 'm')
+        py.test.raises(RegistryFrozenError, REGISTRY.clear)
+        assert 'm' in REGISTRY
+    finally:
+        REGISTRY.thaw()
+    assert unit('blog').specifier == 'blog'
+
+def test_freeze_prefixed():
+    """Prefixed forms of SI units can still be made once frozen."""
+    REGISTRY.freeze()
+    try:
+        assert unit('Gm').squeeze() == 10 ** 9
+    finally:
+        REGISTRY.thaw()
+
+def test_freeze_loads_lazy_units():
+    """Lazily provided units are defined when the registry is frozen."""
+    REGISTRY.clear()
+    define_units(lazy=True)
+    REGISTRY.freeze()
+    try:
+        assert not REGISTRY.providers
+        assert 'mi' in REGISTRY
+    finally:
+        REGISTRY.thaw()
+
+def test_redefine_same():
+    """Repeating a definition is allowed once frozen."""
+    REGISTRY.freeze()
+    try:
+        LeafUnit('m', name='metre', is_si=True)
+        define_units()
+    finally:
+        REGISTRY.thaw()
+
+def test_redefine_after_interned_cleared():
+    """Repeating definitions whose composed units were evicted from the
+    intern cache changes nothing, frozen or not."""
+    version = REGISTRY.version
+    INTERNED.clear()
+    define_units()
+    assert REGISTRY.version == version
+    REGISTRY.freeze()
+    try:
+        INTERNED.clear()
+        define_units()
+    finally:
+        REGISTRY.thaw()
+
+def test_redefine_frozen():
+    """Redefining a unit differently once frozen leaves it untouched."""
+    metre = unit('m')
+    REGISTRY.freeze()
+    try:
+        py.test.raises(RegistryFrozenError, LeafUnit, 'm')
+        assert (metre.name, metre.is_si()) == ('metre', True)
+        assert unit('Gm').squeeze() == 10 ** 9
+    finally:
+        REGISTRY.thaw()
+
+def test_freeze_after_redefinition():
+    """Expressions parsed before a redefinition are not used once frozen."""
+    scaled_unit('stad', 'm', 185.0)
+    assert unit('stad / s').squeeze() == 185.0
+    scaled_unit('stad', 'm', 192.0)
+    REGISTRY.freeze()
+    try:
+        assert unit('stad / s').squeeze() == 192.0
+    finally:
+        REGISTRY.thaw()
+
+def make_base():
+    """A frozen registry of the predefined units."""
+    base = Registry()
+    with using(base):
+        define_units()
+    base.freeze()
+    return base
+
+def test_scoped():
+    """Units defined in a scoped registry stay there."""
+    tenant = Registry()
+    with using(tenant):
+        assert active() is tenant
+        blog = unit('blog')
+        assert unit('blog') is blog
+    assert active() is REGISTRY
+    assert 'blog' in tenant
+    assert 'blog' not in REGISTRY
+    assert unit('blog') is not blog
+
+def test_explicit():
+    """A registry can be passed to unit() instead of activated."""
+    tenant = Registry(parent=make_base())
+    blog = unit('blog', registry=tenant)
+    assert tenant['blog'] is blog
+    assert 'blog' not in REGISTRY
+    assert unit('km', registry=tenant).squeeze() == 1000
+    assert 'km' in tenant
+
+def test_parent():
+    """A child finds its parent's units and shadows them by redefining."""
+    base = make_base()
+    tenant = Registry(parent=base)
+    with using(tenant):
+        assert unit('m') is base['m']
+        assert unit('kPa').squeeze() == 1000000
+        scaled_unit('pt', 'L', 0.5)
+        assert unit('pt / L') == 0.5
+    assert base['pt'] is not tenant['pt']
+    assert unit('pt / L', registry=base) != 0.5
+
+def test_lazy_parent():
+    """A child loads units its parent provides lazily into the parent."""
+    base = Registry()
+    with using(base):
+        define_units(lazy=True)
+    tenant = Registry(parent=base)
+    mile = unit('mi', registry=tenant)
+    assert mile.squeeze() == 1609.344
+    assert base['mi'] is mile
+    assert 'mi' not in tenant
+
+def test_tenant_caches():
+    """Redefining a unit in a tenant leaves other registries' conversion
+    caches alone; redefining one in a parent makes its children's
+    cached expressions and conversions stale."""
+    base = Registry()
+    with using(base):
+        define_units()
+    tenant = Registry(parent=base)
+    with using(tenant):
+        scaled_unit('stad', 'm', 185.0)
+        scaled_unit('stad', 'm', 192.0)
+    unit('m')(unit('km')(1.0))
+    assert (unit('km'), unit('m')) in REGISTRY.factors
+    
+    with using(tenant):
+        assert unit('fur / s').squeeze() == 201.168
+        assert unit('m')(unit('fur')(1.0)).num == 201.168
+    with using(base):
+        scaled_unit('fur', 'm', 200.0)
+    with using(tenant):
+        assert unit('fur / s').squeeze() == 200.0
+        assert unit('m')(unit('fur')(1.0)).num == 200.0
+
+def test_tenants_concurrently():
+    """Tenants with conflicting definitions run side by side."""
+    base = make_base()
+    errors = []
+    
+    def tenant(size):
+        """Define a 'cup' of the given size and use it repeatedly."""
+        try:
+            with using(Registry(parent=base)):
+                scaled_unit('cup', 'mL', size)
+                for _ in range(200):
+                    assert round(unit('cup / mL'), 6) == size
+        except Exception, error: # pylint: disable-msg=W0703
+            errors.append(error)
+    
+    threads = [threading.Thread(target=tenant, args=(size,)) for size in [200, 250, 300, 350]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+def test_nested():
+    """using() blocks nest and restore the previous registry."""
+    outer = Registry()
+    inner = Registry()
+    with using(outer):
+        with using(inner):
+            assert active() is inner
+        assert active() is outer
+    assert active() is REGISTRY
+
+def setup_function(function):
+    # Disable warning about not using function.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running each test here."""
+    REGISTRY.clear()
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,71 @@
+"""Tests for resolving SI-prefixed unit specifiers."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from units import unit, scaled_unit
+from units.leaf_unit import LeafUnit
+from units.predefined import define_units
+from units.registry import REGISTRY
+from units.si import can_make
+
+def test_prefixed():
+    """Prefixed forms of SI units resolve to their prefix and base."""
+    assert REGISTRY.resolve('km') == ('k', 'm')
+    assert REGISTRY.resolve('dam') == ('da', 'm')
+    assert REGISTRY.resolve('mmol') == ('m', 'mol')
+    assert REGISTRY.resolve('kPa') == ('k', 'Pa')
+    assert unit('dam').squeeze() == 10
+
+def test_not_prefixed():
+    """Non-SI units and plain strings don't resolve."""
+    assert REGISTRY.resolve('kft') is None
+    assert REGISTRY.resolve('m') is None
+    assert REGISTRY.resolve('kkm') is None
+    assert not can_make('blog')
+
+def test_registered_shadow_prefixed():
+    """Units such as candela, mole and minute aren't read as prefixed."""
+    assert unit('cd').name == 'candela'
+    assert unit('mol').name == 'mole'
+    assert unit('min').name == 'minute'
+
+def test_ambiguous():
+    """The longest base specifier wins, whatever the definition order."""
+    LeafUnit('am', is_si=True)
+    assert REGISTRY.resolve('dam') == ('d', 'am')
+    
+    REGISTRY.clear()
+    LeafUnit('am', is_si=True)
+    define_units()
+    assert REGISTRY.resolve('dam') == ('d', 'am')
+
+def test_incremental():
+    """The index follows definitions, redefinitions and removals."""
+    LeafUnit('blip', is_si=True)
+    assert REGISTRY.resolve('Mblip') == ('M', 'blip')
+    
+    scaled_unit('B', 'bit', 8.0, name='byte')
+    assert REGISTRY.resolve('kB') is None
+    
+    del REGISTRY['blip']
+    assert REGISTRY.resolve('Mblip') is None
+    
+    REGISTRY.clear()
+    assert REGISTRY.resolve('km') is None
+
+def setup_function(function):
+    # Disable warning about not using function.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running each test here."""
+    REGISTRY.clear()
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
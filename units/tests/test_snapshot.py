@@ -0,0 +1,88 @@
+"""Tests for registry snapshots."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+from fractions import Fraction
+
+from units import unit
+from units.composed_unit import compose
+from units.exception import SnapshotError
+from units.named_composed_unit import NamedComposedUnit
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.registry import REGISTRY
+from units.snapshot import dumps, load_or_define, loads
+import units.snapshot
+
+def custom_units():
+    """Definitions that aren't in units.predefined."""
+    NamedComposedUnit('rootm', compose({unit('m'): Fraction(1, 2)}, 3))
+
+def describe_registry():
+    """Summarize every registered unit in terms of specifiers."""
+    summary = {}
+    for (specifier, registered) in REGISTRY.items():
+        summary[specifier] = (registered.__class__, registered.symbal, registered.name,
+                              registered.is_si(), registered.squeeze(),
+                              sorted([(leaf.specifier, exponent)
+                                      for (leaf, exponent) in registered.dimension]))
+    return summary
+
+def test_round_trip():
+    """A loaded snapshot defines the same units as were saved."""
+    expected = describe_registry()
+    data = dumps()
+    REGISTRY.clear()
+    loads(data)
+    actual = describe_registry()
+    assert actual == expected
+    assert Quantity(1, unit('keg')) == Quantity(50, unit('L'))
+    assert unit('N').composed_unit is unit('kg') * unit('m') / unit('s') ** 2
+
+def test_rational_exponents():
+    """Fractional exponents survive a round trip."""
+    custom_units()
+    data = dumps([custom_units])
+    REGISTRY.clear()
+    loads(data, [custom_units])
+    assert unit('rootm').composed_unit.exponents == {unit('m'): Fraction(1, 2)}
+    assert unit('rootm').squeeze() == 3
+
+def test_stale():
+    """Snapshots made from other definitions are rejected."""
+    data = dumps([custom_units])
+    py.test.raises(SnapshotError, loads, data)
+
+def test_corrupt():
+    """Damaged snapshots are rejected."""
+    data = dumps()
+    py.test.raises(SnapshotError, loads, data[:10])
+    py.test.raises(SnapshotError, loads, 'X' + data[1:])
+    py.test.raises(SnapshotError, loads, data[:-10])
+
+def test_load_or_define(tmpdir):
+    """The first run defines and saves; later runs load."""
+    path = str(tmpdir.join('units.snap'))
+    REGISTRY.clear()
+    assert not load_or_define(path)
+    assert 'mi' in REGISTRY
+    REGISTRY.clear()
+    assert load_or_define(path)
+    assert 'mi' in REGISTRY
+
+def setup_function(function):
+    # Disable warning about not using function.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running each test here."""
+    REGISTRY.clear()
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,109 @@
+"""Tests for the binary quantity encoding."""
+
+# Disable pylint and figleaf warnings about not being able to import py.test.
+# pylint: disable-msg=F0401,C0321
+try: import py.test
+except ImportError: pass
+# pylint: enable-msg=F0401,C0321
+
+import mmap
+from fractions import Fraction
+
+from units import unit
+from units.predefined import define_units
+from units.quantity import Quantity
+from units.registry import REGISTRY, Registry, using
+import units.wire
+from units.wire import PER_ELEMENT, SINGLE, dumps, loads
+
+def test_single_unit():
+    """Quantities sharing a unit store it once."""
+    speed = unit('km') / unit('h')
+    quantities = [Quantity(float(i), speed) for i in range(100)]
+    data = dumps(quantities)
+    packed = loads(data)
+    assert packed.layout == SINGLE
+    assert packed.units == (speed,)
+    assert list(packed) == quantities
+    assert packed[-1].unit is speed
+    assert len(data) < 100 * 8 + 64
+
+def test_per_element():
+    """Each quantity keeps its own unit."""
+    quantities = [Quantity(1.5, unit('m')), Quantity(2.0, unit('ft')),
+                  Quantity(3.0, unit('m') ** Fraction(1, 2)), Quantity(4, unit('m') * unit('s'))]
+    packed = loads(dumps(quantities))
+    assert packed.layout == PER_ELEMENT
+    assert [(quantity.num, quantity.unit) for quantity in packed] == \
+           [(quantity.num, quantity.unit) for quantity in quantities]
+    assert [packed[i].unit for i in range(4)] == [quantity.unit for quantity in quantities]
+
+def test_sources():
+    """Data can be decoded from a memoryview, an mmap or at an offset."""
+    quantities = [Quantity(float(i), unit('m')) for i in range(10)]
+    data = dumps(quantities)
+    assert list(loads(memoryview(data))) == quantities
+    assert list(loads('xyz' + data, 3)) == quantities
+    
+    mapped = mmap.mmap(-1, len(data))
+    mapped.write(data)
+    assert list(loads(mapped)) == quantities
+
+def test_without_numpy():
+    """The encoding doesn't depend on NumPy."""
+    numpy = units.wire.numpy
+    units.wire.numpy = None
+    try:
+        quantities = [Quantity(2.0, unit('m')), Quantity(3.0, unit('ft'))]
+        packed = loads(dumps(quantities))
+        assert list(packed) == quantities
+        assert list(packed.numbers) == [2.0, 3.0]
+        assert list(packed.indices) == [0, 1]
+    finally:
+        units.wire.numpy = numpy
+
+def test_array():
+    """Quantity arrays round trip through a zero-copy view."""
+    numpy = py.test.importorskip('numpy')
+    from units.quantity_array import QuantityArray
+    lengths = QuantityArray(numpy.arange(5.0), unit('mm'))
+    packed = loads(dumps(lengths))
+    assert packed.to_array().isclose(lengths).all()
+    assert not packed.numbers.flags.owndata
+
+def test_corrupt():
+    """Bad headers and truncated data are rejected."""
+    data = dumps([Quantity(1.0, unit('m'))] * 4)
+    py.test.raises(ValueError, loads, data[:8])
+    py.test.raises(ValueError, loads, data[:-1])
+    py.test.raises(ValueError, loads, 'X' + data[1:])
+
+def test_unknown_units():
+    """Decoding never defines units, but makes prefixed and lazy ones."""
+    with using(Registry(parent=REGISTRY)):
+        gizmo = unit('gizmo')
+        named = dumps([Quantity(1.0, gizmo)])
+        composed = dumps([Quantity(2.0, gizmo / unit('s'))])
+    fresh = Registry(parent=REGISTRY)
+    with using(fresh):
+        py.test.raises(ValueError, loads, named)
+        py.test.raises(ValueError, loads, composed)
+    assert 'gizmo' not in fresh and 'gizmo' not in REGISTRY
+    
+    data = dumps([Quantity(1.0, unit('Gm')), Quantity(1.0, unit('mi'))])
+    lazy = Registry()
+    with using(lazy):
+        define_units(lazy=True)
+        assert loads(data)[1] == Quantity(1.0, unit('mi'))
+
+def setup_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called by py.test before running any of the tests here."""
+    define_units()
+
+def teardown_module(module):
+    # Disable warning about not using module.
+    # pylint: disable-msg=W0613
+    """Called after running all of the tests here."""
+    REGISTRY.clear()
@@ -0,0 +1,323 @@
+"""A compact binary encoding for sequences of quantities.
+
+An encoded sequence is laid out as follows, with all integers and
+floats little-endian:
+
+- A 16-byte header: the magic bytes 'UQTY', a format version byte, a
+  layout byte (0 when every quantity has the same unit, 1 when each
+  has its own), the number of units in the unit table (uint16) and the
+  number of quantities (uint64).
+- The unit table. Each entry is a kind byte followed by its body:
+  kind 0 is a unit registered under a specifier, given as a string;
+  kind 1 is any other unit, given as a number of terms (uint16), each a
+  leaf unit specifier string with an exponent numerator and denominator
+  (two int32s), followed by its multiplier. Strings are a uint16 byte
+  length and UTF-8 bytes. Multipliers are a type byte, 'i' or 'd',
+  followed by an int64 or a float64.
+- In the per-element layout, one uint16 index into the unit table per
+  quantity.
+- Zero padding to a multiple of 8 bytes, then one float64 magnitude
+  per quantity.
+
+Decoding reads the header and the unit table and then leaves the
+magnitudes where they are: loads() returns a Packed sequence that
+unpacks each quantity when it is asked for, and whose numbers attribute
+is a NumPy view of the encoded magnitudes when NumPy is available.
+
+>>> from units import unit
+>>> from units.predefined import define_units
+>>> define_units()
+>>> speeds = [unit('km')(1.5) / unit('h')(1), unit('km')(3.0) / unit('h')(1)]
+>>> packed = loads(dumps(speeds))
+>>> packed[1] == speeds[1] and packed.layout == SINGLE
+True
+>>> packed = loads(dumps([unit('m')(2.0), unit('ft')(3.0)]))
+>>> packed[1] == unit('ft')(3.0) and packed.layout == PER_ELEMENT
+True
+"""
+
+import struct
+from array import array
+from fractions import Fraction
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from units import unit as find_unit
+from units.composed_unit import compose
+from units.quantity import Quantity
+from units.registry import active
+from units.si import prefixed, without_prefix
+
+MAGIC = 'UQTY'
+VERSION = 1
+SINGLE = 0
+PER_ELEMENT = 1
+
+HEADER = struct.Struct('<4sBBHQ')
+REGISTERED = 0
+COMPOSED = 1
+
+def encode_string(text):
+    """A uint16 length followed by UTF-8 bytes."""
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8')
+    return struct.pack('<H', len(text)) + text
+
+def decode_string(data, offset):
+    """Return the string at offset and the offset after it."""
+    (length,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    return (to_bytes(data[offset:offset + length]).decode('utf-8'), offset + length)
+
+def to_bytes(chunk):
+    """A slice of a str, buffer, memoryview or mmap as a str."""
+    if isinstance(chunk, memoryview):
+        return chunk.tobytes()
+    return bytes(chunk)
+
+def encode_multiplier(multiplier):
+    """A type byte and an int64 or float64."""
+    if isinstance(multiplier, (int, long)) and -2 ** 63 <= multiplier < 2 ** 63:
+        return struct.pack('<cq', 'i', multiplier)
+    return struct.pack('<cd', 'd', float(multiplier))
+
+def decode_multiplier(data, offset):
+    """Return the multiplier at offset and the offset after it."""
+    (kind,) = struct.unpack_from('<c', data, offset)
+    if kind == 'i':
+        (multiplier,) = struct.unpack_from('<q', data, offset + 1)
+    else:
+        (multiplier,) = struct.unpack_from('<d', data, offset + 1)
+    return (multiplier, offset + 9)
+
+def encode_unit(unit):
+    """The unit table entry for unit."""
+    specifier = getattr(unit, 'specifier', None)
+    if specifier is not None and active().find(specifier) is unit:
+        return struct.pack('<B', REGISTERED) + encode_string(specifier)
+    
+    parts = [struct.pack('<BH', COMPOSED, len(unit.dimension))]
+    for (leaf, exponent) in unit.dimension:
+        exponent = Fraction(exponent)
+        parts.append(encode_string(leaf.specifier))
+        parts.append(struct.pack('<ii', exponent.numerator, exponent.denominator))
+    parts.append(encode_multiplier(unit.squeeze()))
+    return ''.join(parts)
+
+def lookup(specifier):
+    """The unit registered under specifier in the active registry or a
+    parent. Units provided lazily and SI-prefixed forms of registered
+    units are made as unit() makes them, but unknown specifiers raise
+    ValueError rather than define new leaf units."""
+    registry = active()
+    found = registry.find(specifier)
+    if found is None:
+        if not (registry.resolve(specifier) is not None or provided(registry, specifier)):
+            raise ValueError('Unknown unit %r' % specifier)
+        found = find_unit(specifier)
+    return found
+
+def provided(registry, specifier):
+    """Whether the registry or a parent provides specifier, or the unit
+    it is an SI prefix of, lazily."""
+    while registry is not None:
+        if specifier in registry.providers:
+            return True
+        if prefixed(specifier) and without_prefix(specifier) in registry.providers:
+            return True
+        registry = registry.parent
+    return False
+
+def decode_unit(data, offset):
+    """Return the unit at offset in the unit table and the offset
+    after it."""
+    (kind,) = struct.unpack_from('<B', data, offset)
+    offset += 1
+    if kind == REGISTERED:
+        (specifier, offset) = decode_string(data, offset)
+        return (lookup(specifier), offset)
+    elif kind != COMPOSED:
+        raise ValueError('Unknown unit kind %d' % kind)
+    
+    (terms,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    exponents = {}
+    for _ in range(terms):
+        (specifier, offset) = decode_string(data, offset)
+        (numerator, denominator) = struct.unpack_from('<ii', data, offset)
+        offset += 8
+        exponent = Fraction(numerator, denominator)
+        if denominator == 1:
+            exponent = numerator
+        exponents[lookup(specifier)] = exponent
+    (multiplier, offset) = decode_multiplier(data, offset)
+    return (compose(exponents, multiplier), offset)
+
+def padding(offset):
+    """The number of zero bytes that align offset to 8 bytes."""
+    return -offset % 8
+
+def dumps(quantities):
+    """Encode a sequence of quantities, or a QuantityArray, as bytes."""
+    if hasattr(quantities, 'num') and numpy is not None and numpy.ndim(quantities.num):
+        units = [quantities.unit]
+        indices = None
+        numbers = numpy.ascontiguousarray(quantities.num, dtype='<f8').ravel().tostring()
+    else:
+        units = []
+        positions = {}
+        indices = array('H')
+        numbers = array('d')
+        for quantity in quantities:
+            if quantity.unit not in positions:
+                positions[quantity.unit] = len(units)
+                units.append(quantity.unit)
+            indices.append(positions[quantity.unit])
+            numbers.append(quantity.num)
+        if len(units) <= 1:
+            indices = None
+        numbers = little_endian(numbers).tostring()
+    
+    count = len(numbers) // 8
+    layout = PER_ELEMENT
+    if indices is None:
+        layout = SINGLE
+    parts = [HEADER.pack(MAGIC, VERSION, layout, len(units), count)]
+    parts.extend([encode_unit(unit) for unit in units])
+    if indices is not None:
+        parts.append(little_endian(indices).tostring())
+    length = sum([len(part) for part in parts])
+    parts.append('\0' * padding(length))
+    parts.append(numbers)
+    return ''.join(parts)
+
+def little_endian(values):
+    """Byte-swap an array on big-endian machines."""
+    if struct.pack('=H', 1) != struct.pack('<H', 1):
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+def loads(data, offset=0):
+    """Decode quantities encoded by dumps() from bytes, a buffer, a
+    memoryview or an mmap, starting at offset. Return a Packed
+    sequence that refers to data rather than copying it."""
+    if len(data) - offset < HEADER.size:
+        raise ValueError('Truncated quantity data')
+    (magic, version, layout, unit_count, count) = HEADER.unpack_from(data, offset)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not version %d quantity data' % VERSION)
+    
+    position = offset + HEADER.size
+    units = []
+    for _ in range(unit_count):
+        (unit, position) = decode_unit(data, position)
+        units.append(unit)
+    
+    indices = None
+    if layout == PER_ELEMENT:
+        indices = position
+        position += 2 * count
+    elif layout != SINGLE:
+        raise ValueError('Unknown layout %d' % layout)
+    position += padding(position - offset)
+    if len(data) < position + 8 * count:
+        raise ValueError('Truncated quantity data')
+    return Packed(data, units, count, position, indices)
+
+class Packed(object):
+    """A read-only sequence of quantities decoded lazily from encoded
+    data. See loads()."""
+    
+    def __init__(self, data, units, count, numbers_offset, indices_offset=None):
+        self.data = data
+        self.units = tuple(units)
+        self.count = count
+        self.numbers_offset = numbers_offset
+        self.indices_offset = indices_offset
+    
+    def get_layout(self):
+        """SINGLE if all quantities share one unit, else PER_ELEMENT."""
+        if self.indices_offset is None:
+            return SINGLE
+        return PER_ELEMENT
+    layout = property(get_layout)
+    
+    def _view(self, dtype, offset, count):
+        """A NumPy array over count items of data at offset, or None."""
+        if numpy is None:
+            return None
+        if isinstance(self.data, memoryview):
+            raw = numpy.asarray(self.data)
+        else:
+            raw = numpy.frombuffer(self.data, dtype=numpy.uint8)
+        return raw[offset:offset + count * numpy.dtype(dtype).itemsize].view(dtype)
+    
+    def get_numbers(self):
+        """The magnitudes, as a read-only NumPy view of the data, or as
+        an array('d') copy without NumPy."""
+        numbers = self._view('<f8', self.numbers_offset, self.count)
+        if numbers is None:
+            numbers = array('d')
+            numbers.fromstring(to_bytes(self.data[self.numbers_offset:self.numbers_offset + 8 * self.count]))
+            little_endian(numbers)
+        return numbers
+    numbers = property(get_numbers)
+    
+    def get_indices(self):
+        """The unit table index of each quantity, or None in the single
+        unit layout."""
+        if self.indices_offset is None:
+            return None
+        indices = self._view('<u2', self.indices_offset, self.count)
+        if indices is None:
+            indices = array('H')
+            indices.fromstring(to_bytes(self.data[self.indices_offset:self.indices_offset + 2 * self.count]))
+            little_endian(indices)
+        return indices
+    indices = property(get_indices)
+    
+    def unit_of(self, index):
+        """The unit of the quantity at index."""
+        if self.indices_offset is None:
+            return self.units[0]
+        (position,) = struct.unpack_from('<H', self.data, self.indices_offset + 2 * index)
+        return self.units[position]
+    
+    def to_array(self):
+        """The quantities as a QuantityArray over the data. Only for
+        the single unit layout; needs NumPy."""
+        from units.quantity_array import QuantityArray
+        if self.indices_offset is not None:
+            raise ValueError('Quantities have more than one unit')
+        return QuantityArray(self.numbers, self.units[0])
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('Quantity index out of range')
+        (number,) = struct.unpack_from('<d', self.data, self.numbers_offset + 8 * index)
+        return Quantity(number, self.unit_of(index))
+    
+    def __iter__(self):
+        numbers = self.numbers
+        indices = self.indices
+        if numpy is not None:
+            numbers = numbers.tolist()
+            if indices is not None:
+                indices = indices.tolist()
+        if indices is None:
+            unit = self.units[0]
+            for number in numbers:
+                yield Quantity(number, unit)
+        else:
+            units = self.units
+            for (number, index) in zip(numbers, indices):
+                yield Quantity(number, units[index])